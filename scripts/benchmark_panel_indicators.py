@@ -0,0 +1,42 @@
+"""
+Times calculate_technical_indicators in a per-ticker loop against the batched
+panel engine on synthetic random-walk prices.
+
+    python -m scripts.benchmark_panel_indicators --tickers 1000 --days 2500
+"""
+import argparse
+import time
+
+from scripts.synthetic_data import make_close_panel
+from src.financial_analysis import calculate_technical_indicators
+from src.panel_indicators import calculate_panel_indicators
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tickers', type=int, default=1000)
+    parser.add_argument('--days', type=int, default=2500)
+    parser.add_argument('--loop-sample', type=int, default=100,
+                        help='Tickers timed in the per-ticker loop; the loop time is scaled up.')
+    args = parser.parse_args()
+
+    close = make_close_panel(args.tickers, args.days)
+
+    sample = close.columns[:min(args.loop_sample, args.tickers)]
+    start = time.perf_counter()
+    for ticker in sample:
+        calculate_technical_indicators(close[[ticker]].dropna().rename(columns={ticker: 'Close'}))
+    loop_seconds = (time.perf_counter() - start) * args.tickers / len(sample)
+
+    start = time.perf_counter()
+    calculate_panel_indicators(close)
+    panel_seconds = time.perf_counter() - start
+
+    print(f"{args.tickers} tickers x {args.days} days")
+    print(f"  per-ticker loop (extrapolated): {loop_seconds:8.2f} s")
+    print(f"  panel engine:                   {panel_seconds:8.2f} s")
+    print(f"  speed-up:                       {loop_seconds / panel_seconds:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
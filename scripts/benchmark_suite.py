@@ -0,0 +1,262 @@
+"""
+Times and memory-profiles the src hot paths on synthetic data at several scales,
+stores the results as JSON and compares them with a baseline run.
+
+    python -m scripts.benchmark_suite --scales small medium --output bench.json
+    python -m scripts.benchmark_suite --baseline bench.json --threshold 0.25
+
+Exits with status 1 when a case is slower (or peaks higher in memory) than the
+baseline by more than the threshold fraction.
+"""
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+from scripts.synthetic_data import (make_close_panel, make_news_frame, make_stock_data_dict, price_dates,
+                                    write_price_csvs)
+from src import backtest, correlation_analysis, data_processing, financial_analysis, sentiment_tool
+from src.panel_indicators import calculate_panel_indicators
+
+RESULTS_FORMAT_VERSION = 1
+DEFAULT_REGRESSION_THRESHOLD = 0.25  # Fractional slow-down (or memory growth) that fails the run
+DEFAULT_MIN_SECONDS = 0.05  # Timing differences below this are noise, never regressions
+SCALES = {
+    'small': {'headlines': 20_000, 'tickers': 20, 'days': 1_000},
+    'medium': {'headlines': 200_000, 'tickers': 200, 'days': 2_500},
+    'large': {'headlines': 2_000_000, 'tickers': 2_000, 'days': 10_000},
+}
+
+
+class Workload:
+    """Synthetic inputs for one scale, generated on first use and shared by the cases."""
+
+    def __init__(self, headlines: int, tickers: int, days: int, workdir: str, seed: int = 0):
+        self.n_headlines, self.n_tickers, self.n_days = headlines, tickers, days
+        self.workdir = workdir
+        self.seed = seed
+
+    @cached_property
+    def stock_data_dict(self) -> dict:
+        return make_stock_data_dict(self.n_tickers, self.n_days, self.seed)
+
+    @cached_property
+    def price_dir(self) -> str:
+        directory = os.path.join(self.workdir, 'prices')
+        write_price_csvs(directory, self.n_tickers, self.n_days, self.seed)
+        return directory
+
+    @cached_property
+    def close_panel(self) -> pd.DataFrame:
+        return make_close_panel(self.n_tickers, self.n_days, self.seed)
+
+    @cached_property
+    def news(self) -> pd.DataFrame:
+        dates = price_dates(self.n_days)  # News spans the price history so merges find matches
+        return make_news_frame(self.n_headlines, n_tickers=self.n_tickers, start=str(dates[0]), end=str(dates[-1]),
+                               seed=self.seed, with_sentiment=True)
+
+    @cached_property
+    def news_csv(self) -> str:
+        path = os.path.join(self.workdir, 'news.csv')
+        self.news.drop(columns='sentiment_score').to_csv(path, index=False)
+        return path
+
+    @cached_property
+    def scored_news(self) -> pd.DataFrame:
+        """News with sentiment scores and a tz-naive calendar day per article, as the price index has."""
+        return self.news.assign(date_sentiment=self.news['date'].dt.tz_localize(None).dt.normalize())
+
+    @cached_property
+    def aggregated_sentiment(self) -> pd.DataFrame:
+        return _quiet(correlation_analysis.aggregate_daily_sentiment, self.scored_news)
+
+    @cached_property
+    def returns_dict(self) -> dict:
+        return {ticker: correlation_analysis.calculate_daily_stock_returns(df)
+                for ticker, df in self.stock_data_dict.items()}
+
+    @cached_property
+    def backtest_data(self) -> backtest.BacktestData:
+        return backtest.prepare_backtest_data(self.stock_data_dict, self.aggregated_sentiment)
+
+    @cached_property
+    def merged(self) -> pd.DataFrame:
+        return correlation_analysis.merge_sentiment_with_returns(self.aggregated_sentiment, self.returns_dict)
+
+
+def _quiet(func, *args, **kwargs):
+    """Calls func with its progress prints swallowed."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return func(*args, **kwargs)
+
+
+# name -> (prepare(workload) -> zero-argument callable, rows(workload) -> input size)
+CASES = {
+    'load_financial_news_data': (
+        lambda w: (lambda p=w.news_csv: data_processing.load_financial_news_data(p)),
+        lambda w: w.n_headlines),
+    'preprocess_text_data': (
+        lambda w: (lambda df=w.news[['headline']]: data_processing.preprocess_text_data(df)),
+        lambda w: w.n_headlines),
+    'add_sentiment_to_df': (
+        lambda w: (lambda df=w.news[['headline']]: sentiment_tool.add_sentiment_to_df(df, 'headline')),
+        lambda w: w.n_headlines),
+    'load_stock_prices_from_csvs': (
+        lambda w: (lambda d=w.price_dir, t=list(w.stock_data_dict):
+                   financial_analysis.load_stock_prices_from_csvs(t, d)),
+        lambda w: sum(len(df) for df in w.stock_data_dict.values())),
+    'calculate_technical_indicators': (
+        lambda w: (lambda d=w.stock_data_dict:
+                   [financial_analysis.calculate_technical_indicators(df) for df in d.values()]),
+        lambda w: sum(len(df) for df in w.stock_data_dict.values())),
+    'calculate_panel_indicators': (
+        lambda w: (lambda panel=w.close_panel: calculate_panel_indicators(panel)),
+        lambda w: w.close_panel.size),
+    'aggregate_daily_sentiment': (
+        lambda w: (lambda df=w.scored_news: correlation_analysis.aggregate_daily_sentiment(df)),
+        lambda w: w.n_headlines),
+    'merge_sentiment_with_returns': (
+        lambda w: (lambda agg=w.aggregated_sentiment, d=w.returns_dict:
+                   correlation_analysis.merge_sentiment_with_returns(agg, d)),
+        lambda w: len(w.aggregated_sentiment)),
+    'calculate_pearson_correlation': (
+        lambda w: (lambda m=w.merged: [correlation_analysis.calculate_pearson_correlation(
+            group, 'avg_sentiment_score', 'daily_return') for _, group in m.groupby('stock_symbol')]),
+        lambda w: len(w.merged)),
+    'run_parameter_sweep': (
+        lambda w: (lambda data=w.backtest_data: backtest.run_parameter_sweep(data)),
+        lambda w: len(backtest.parameter_grid())),
+}
+
+
+# Optional packages and NLTK data a case needs; it is skipped when they are missing
+CASE_MODULES = {'preprocess_text_data': ['nltk'], 'add_sentiment_to_df': ['vaderSentiment']}
+CASE_NLTK_RESOURCES = {'preprocess_text_data': ['stopwords']}
+
+
+def missing_requirements(name: str) -> list:
+    """What case `name` needs but this environment lacks (NLTK data is fetched first if allowed)."""
+    missing = [f'module {module}' for module in CASE_MODULES.get(name, ())
+               if importlib.util.find_spec(module) is None]
+    if not missing and name in CASE_NLTK_RESOURCES:
+        missing = [f'NLTK {resource}' for resource in data_processing.ensure_nltk_resources(
+            download=data_processing.AUTO_DOWNLOAD_NLTK, resources=CASE_NLTK_RESOURCES[name])]
+    return missing
+
+
+def measure(func, repeat: int = 3) -> dict:
+    """Peak traced memory from one run, then the best wall time of `repeat` runs."""
+    tracemalloc.start()
+    try:
+        _quiet(func)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        _quiet(func)
+        timings.append(time.perf_counter() - start)
+    return {'seconds': min(timings), 'peak_mb': peak / 2 ** 20}
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {'python': platform.python_version(), 'numpy': np.__version__, 'pandas': pd.__version__,
+            'platform': platform.platform(), 'cpu_count': os.cpu_count(), 'git_commit': commit}
+
+
+def run_suite(scales=('small',), cases=None, repeat: int = 3, scale_specs: dict = None, seed: int = 0,
+              log=print) -> dict:
+    """
+    Runs `cases` (default all) at each scale and returns the results document.
+    A case that cannot run here (e.g. missing NLTK data) is recorded with a `skipped` reason.
+    """
+    scale_specs = scale_specs or SCALES
+    cases = list(cases or CASES)
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for scale in scales:
+            workload = Workload(workdir=os.path.join(workdir, scale), seed=seed, **scale_specs[scale])
+            os.makedirs(workload.workdir, exist_ok=True)
+            for name in cases:
+                prepare, rows = CASES[name]
+                missing = missing_requirements(name)
+                if missing:
+                    entry = {'skipped': f"missing {', '.join(missing)}"}
+                    log(f"{name:32s} {scale:8s} skipped ({entry['skipped']})")
+                else:
+                    entry = measure(prepare(workload), repeat)
+                    entry['rows'] = int(rows(workload))
+                    log(f"{name:32s} {scale:8s} {entry['seconds']:9.3f} s {entry['peak_mb']:9.1f} MB")
+                results.setdefault(name, {})[scale] = entry
+    return {'format_version': RESULTS_FORMAT_VERSION,
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'environment': environment(), 'repeat': repeat, 'results': results}
+
+
+def find_regressions(current: dict, baseline: dict, threshold: float = DEFAULT_REGRESSION_THRESHOLD,
+                     min_seconds: float = DEFAULT_MIN_SECONDS) -> list:
+    """Messages for every case/scale measured in both runs that got worse by more than `threshold`."""
+    regressions = []
+    for name, scales in current['results'].items():
+        for scale, entry in scales.items():
+            before = baseline.get('results', {}).get(name, {}).get(scale)
+            if 'skipped' in entry or not before or 'skipped' in before:
+                continue
+            if entry['seconds'] > before['seconds'] * (1 + threshold) and \
+                    entry['seconds'] - before['seconds'] > min_seconds:
+                regressions.append(f"{name} [{scale}]: {before['seconds']:.3f} s -> {entry['seconds']:.3f} s")
+            if entry['peak_mb'] > before['peak_mb'] * (1 + threshold) and entry['peak_mb'] - before['peak_mb'] > 1.0:
+                regressions.append(f"{name} [{scale}]: peak {before['peak_mb']:.1f} MB -> {entry['peak_mb']:.1f} MB")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scales', nargs='+', default=['small'], choices=list(SCALES))
+    parser.add_argument('--cases', nargs='+', default=None, choices=list(CASES))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Write the results JSON here.')
+    parser.add_argument('--baseline', help='Results JSON of an earlier run to compare against.')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_REGRESSION_THRESHOLD,
+                        help='Allowed fractional slow-down before a case counts as a regression.')
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.scales, args.cases, args.repeat, seed=args.seed)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = find_regressions(results, json.load(f), args.threshold)
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%} of {args.baseline}.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""
+Peak memory per pipeline stage in the default mode and in memory_mode.compact_mode,
+on synthetic news and prices.
+
+    python -m scripts.memory_report --headlines 200000 --tickers 100 --output memory.csv
+
+For each stage, peak_mb is the tracemalloc peak above the allocation at the start of
+the stage, and output_mb is the deep size of what the stage returns.
+"""
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import tracemalloc
+
+import pandas as pd
+
+from scripts.synthetic_data import make_news_frame, price_dates, write_price_csvs
+from src import correlation_analysis, data_processing, financial_analysis, pipeline, sentiment_tool
+from src.memory_mode import compact_mode, frame_memory_mb
+
+
+def _stages(news_path: str, prices_dir: str, tickers: list, preprocess: bool = True):
+    """
+    (name, func(state) -> output) in pipeline order; each output is stored in state under
+    the name. Without `preprocess` the text stage is left out and the raw headlines are scored.
+    """
+    text_stage = [('preprocess_text', lambda s: data_processing.preprocess_text_data(s['load_news'], 'headline'))]
+    news_stage = 'preprocess_text' if preprocess else 'load_news'
+    return [
+        ('load_news', lambda s: data_processing.load_financial_news_data(news_path)),
+        *(text_stage if preprocess else []),
+        ('date_features', lambda s: data_processing.extract_date_features(s[news_stage], 'date')),
+        ('sentiment', lambda s: sentiment_tool.add_sentiment_to_df(
+            s['date_features'], 'processed_headline' if 'processed_headline' in s['date_features'] else 'headline')),
+        ('daily_sentiment', lambda s: pipeline.daily_sentiment(s['sentiment'])),
+        ('load_prices', lambda s: financial_analysis.load_stock_prices_from_csvs(tickers, prices_dir)),
+        ('technical_indicators', lambda s: {t: financial_analysis.calculate_technical_indicators(df)
+                                            for t, df in s['load_prices'].items()}),
+        ('returns', lambda s: {t: correlation_analysis.calculate_daily_stock_returns(df)
+                               for t, df in s['technical_indicators'].items()}),
+        ('merge', lambda s: correlation_analysis.merge_sentiment_with_returns(s['daily_sentiment'], s['returns'])),
+    ]
+
+
+def missing_text_requirements() -> list:
+    """NLTK data preprocess_text_data needs but this machine lacks (fetched first if allowed)."""
+    return data_processing.ensure_nltk_resources(download=data_processing.AUTO_DOWNLOAD_NLTK,
+                                                 resources=['stopwords'])
+
+
+def _warm_up(preprocess: bool = True):
+    """Imports and caches the lazily loaded NLTK/VADER pieces so their allocations are not charged to a stage."""
+    sample = pd.DataFrame({'headline': ['Stock rises on strong earnings']})
+    with contextlib.redirect_stdout(io.StringIO()):
+        if preprocess:
+            data_processing.preprocess_text_data(sample, 'headline')
+        sentiment_tool.add_sentiment_to_df(sample, 'headline')
+
+
+def profile_stages(news_path: str, prices_dir: str, tickers: list, preprocess: bool = True) -> pd.DataFrame:
+    """Runs the stages once in the current mode; one row per stage."""
+    _warm_up(preprocess)
+    state, rows = {}, []
+    tracemalloc.start()
+    try:
+        for name, func in _stages(news_path, prices_dir, tickers, preprocess):
+            start = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            with contextlib.redirect_stdout(io.StringIO()):
+                state[name] = func(state)
+            peak = tracemalloc.get_traced_memory()[1]
+            rows.append({'stage': name, 'peak_mb': (peak - start) / 2 ** 20,
+                         'output_mb': frame_memory_mb(state[name]),
+                         'held_mb': tracemalloc.get_traced_memory()[0] / 2 ** 20})
+    finally:
+        tracemalloc.stop()
+    return pd.DataFrame(rows).set_index('stage')
+
+
+def memory_report(news_path: str, prices_dir: str, tickers: list) -> pd.DataFrame:
+    """
+    Stage-by-stage default vs. compact-mode memory, side by side. The text stage is
+    skipped, with a message, when its NLTK data is missing.
+    """
+    missing = missing_text_requirements()
+    if missing:
+        print(f"Skipping preprocess_text: missing NLTK {', '.join(missing)}; scoring the raw headlines.")
+    default = profile_stages(news_path, prices_dir, tickers, preprocess=not missing)
+    with compact_mode():
+        compact = profile_stages(news_path, prices_dir, tickers, preprocess=not missing)
+    report = default.join(compact, lsuffix='_default', rsuffix='_compact')
+    return report[[f'{metric}_{mode}' for metric in ('peak_mb', 'output_mb', 'held_mb')
+                   for mode in ('default', 'compact')]]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--headlines', type=int, default=200_000)
+    parser.add_argument('--tickers', type=int, default=100)
+    parser.add_argument('--days', type=int, default=2_500)
+    parser.add_argument('--output', help='Also write the report to this CSV.')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        dates = price_dates(args.days)
+        news = make_news_frame(args.headlines, n_tickers=args.tickers, start=str(dates[0]), end=str(dates[-1]))
+        # UTC timestamps: a mix of -04:00/-05:00 offsets would load as object dates
+        news_path = os.path.join(workdir, 'news.csv')
+        news.assign(date=news['date'].dt.tz_convert('UTC')).to_csv(news_path, index=False)
+        del news
+        tickers = write_price_csvs(os.path.join(workdir, 'prices'), args.tickers, args.days)
+        report = memory_report(news_path, os.path.join(workdir, 'prices'), tickers)
+
+    print(report.to_string(float_format='{:.1f}'.format))
+    if args.output:
+        report.to_csv(args.output)
+    return report
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+"""
+Deterministic synthetic inputs for benchmarks and tests: news frames shaped like the
+analyst-ratings dataset (skewed publishers and tickers, repeated headlines) and
+random-walk prices as wide panels or per-ticker OHLCV CSVs.
+The same arguments and seed always give the same data.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+SUBJECTS = ['Shares', 'Stock', 'Earnings', 'Revenue', 'Guidance', 'Analyst', 'Options', 'Board', 'CEO', 'Dividend']
+VERBS = ['rise', 'fall', 'jump', 'slide', 'beat', 'miss', 'raise', 'cut', 'hold', 'surge', 'drop', 'trade',
+         'upgrade', 'downgrade', 'initiate', 'maintain', 'reiterate', 'announce', 'report', 'expand']
+OBJECTS = ['estimates', 'price target', 'outlook', 'buy rating', 'sell rating', 'neutral rating', 'quarter',
+           'guidance', 'buyback', 'merger talks', 'sales', 'margins', 'volume', 'session', 'premarket',
+           'dividend', 'forecast', 'expectations', 'coverage', 'stake']
+QUALIFIERS = ['', '', 'after earnings', 'on heavy volume', 'in premarket trading', 'amid sector weakness',
+              'on upgrade', 'despite strong results', 'ahead of guidance', 'for the third straight day',
+              'to $', 'by 5%', 'by 12%', 'at open', 'mid-day']
+PRICE_START_DATE = '2000-01-03'
+
+
+def make_tickers(n_tickers: int) -> np.ndarray:
+    """Distinct upper-case tickers: A..Z, then AA..ZZ, and so on."""
+    tickers = []
+    length = 1
+    while len(tickers) < n_tickers:
+        codes = np.arange(min(26 ** length, n_tickers - len(tickers)))
+        letters = [np.array(list('ABCDEFGHIJKLMNOPQRSTUVWXYZ'))[(codes // 26 ** k) % 26] for k in range(length)][::-1]
+        tickers.extend(''.join(chars) for chars in zip(*letters))
+        length += 1
+    return np.array(tickers[:n_tickers], dtype=object)
+
+
+def _zipf_choice(rng, n_items: int, size: int, exponent: float = 1.1) -> np.ndarray:
+    """Indices in [0, n_items) drawn with probability ~ 1 / rank**exponent."""
+    weights = 1.0 / np.arange(1, n_items + 1) ** exponent
+    return rng.choice(n_items, size=size, p=weights / weights.sum())
+
+
+def make_news_frame(n_headlines: int, n_tickers: int = 500, n_publishers: int = 200,
+                    duplicate_rate: float = 0.3, start: str = '2011-01-01', end: str = '2020-06-30',
+                    seed: int = 0, with_sentiment: bool = False) -> pd.DataFrame:
+    """
+    News frame with headline, url, publisher, date (tz-aware, US/Eastern) and stock columns.
+    About `duplicate_rate` of the rows repeat an earlier headline (syndicated stories),
+    and tickers and publishers follow a Zipf-like popularity skew.
+    with_sentiment=True adds a sentiment_score column in [-1, 1].
+    """
+    rng = np.random.default_rng(seed)
+    tickers = make_tickers(n_tickers)
+    n_unique = max(1, int(round(n_headlines * (1.0 - duplicate_rate))))
+
+    story_stock = _zipf_choice(rng, n_tickers, n_unique, exponent=0.9)
+    story_text = (pd.Series(tickers[story_stock]) + ' ' +
+                  pd.Series(np.array(SUBJECTS, dtype=object)[rng.integers(0, len(SUBJECTS), n_unique)]).str.lower() + ' ' +
+                  pd.Series(np.array(VERBS, dtype=object)[rng.integers(0, len(VERBS), n_unique)]) + ' ' +
+                  pd.Series(np.array(OBJECTS, dtype=object)[rng.integers(0, len(OBJECTS), n_unique)]) + ' ' +
+                  pd.Series(np.array(QUALIFIERS, dtype=object)[rng.integers(0, len(QUALIFIERS), n_unique)]))
+    story_text = story_text.str.strip().to_numpy(dtype=object)
+
+    # Every story appears once; the remaining rows re-publish popular stories
+    repeats = _zipf_choice(rng, n_unique, n_headlines - n_unique, exponent=1.0) if n_headlines > n_unique \
+        else np.empty(0, dtype=np.int64)
+    story = rng.permutation(np.concatenate([np.arange(n_unique), repeats]))[:n_headlines]
+
+    start_s, end_s = pd.Timestamp(start).value // 10 ** 9, pd.Timestamp(end).value // 10 ** 9
+    dates = pd.to_datetime(np.sort(rng.integers(start_s, end_s, n_headlines)), unit='s')
+    df = pd.DataFrame({
+        'headline': story_text[story],
+        'url': 'https://news.example.com/' + pd.Series(np.arange(n_headlines).astype(str)),
+        'publisher': make_tickers(n_publishers).astype(object)[_zipf_choice(rng, n_publishers, n_headlines)] + ' News',
+        'date': dates.tz_localize('UTC').tz_convert('America/New_York'),
+        'stock': tickers[story_stock[story]],
+    })
+    if with_sentiment:
+        df['sentiment_score'] = np.round(np.tanh(rng.normal(0.05, 0.4, n_headlines)), 4)
+    return df
+
+
+def write_news_csv(path: str, n_headlines: int, **kwargs) -> str:
+    """Writes make_news_frame(...) as a CSV readable by load_financial_news_data."""
+    make_news_frame(n_headlines, **kwargs).to_csv(path, index=False)
+    return path
+
+
+def price_dates(n_days: int) -> pd.DatetimeIndex:
+    """The business days of the synthetic price history."""
+    return pd.bdate_range(PRICE_START_DATE, periods=n_days, name='Date')
+
+
+def make_close_panel(n_tickers: int, n_days: int, seed: int = 0, tickers=None) -> pd.DataFrame:
+    """
+    Dates x tickers random-walk closes with staggered listing dates (NaN before listing).
+    Columns are T00000, T00001... unless `tickers` names them.
+    """
+    rng = np.random.default_rng(seed)
+    dates = price_dates(n_days)
+    log_returns = rng.normal(0.0, 0.02, size=(n_days, n_tickers))
+    close = 50.0 * np.exp(np.cumsum(log_returns, axis=0))
+    listing_day = rng.integers(0, n_days // 4, size=n_tickers)  # Staggered histories
+    close[np.arange(n_days)[:, None] < listing_day] = np.nan
+    columns = [f'T{i:05d}' for i in range(n_tickers)] if tickers is None else list(tickers)
+    return pd.DataFrame(close, index=dates, columns=columns)
+
+
+def make_ohlcv_frame(close: pd.Series, seed: int = 0) -> pd.DataFrame:
+    """Date-indexed OHLCV frame around a close series (missing closes dropped)."""
+    close = close.dropna()
+    rng = np.random.default_rng(seed)
+    spread = np.abs(rng.normal(0.0, 0.01, (len(close), 2)))
+    open_ = close.to_numpy() * (1.0 + rng.normal(0.0, 0.005, len(close)))
+    return pd.DataFrame({
+        'Open': open_,
+        'High': np.maximum(open_, close.to_numpy()) * (1.0 + spread[:, 0]),
+        'Low': np.minimum(open_, close.to_numpy()) * (1.0 - spread[:, 1]),
+        'Close': close.to_numpy(),
+        'Adj Close': close.to_numpy(),
+        'Volume': rng.integers(100_000, 10_000_000, len(close)).astype(np.int64),
+    }, index=close.index)
+
+
+def make_stock_data_dict(n_tickers: int, n_days: int, seed: int = 0) -> dict:
+    """{TICKER: OHLCV frame} as returned by load_stock_prices_from_csvs, for the tickers of make_news_frame."""
+    panel = make_close_panel(n_tickers, n_days, seed, tickers=make_tickers(n_tickers))
+    return {ticker: make_ohlcv_frame(panel[ticker], seed + i) for i, ticker in enumerate(panel.columns)}
+
+
+def write_price_csvs(directory: str, n_tickers: int, n_days: int, seed: int = 0,
+                     filename_template: str = "{}_historical_data.csv") -> list:
+    """Writes one OHLCV CSV per ticker in the layout load_stock_prices_from_csvs reads; returns the tickers."""
+    os.makedirs(directory, exist_ok=True)
+    stock_dict = make_stock_data_dict(n_tickers, n_days, seed)
+    for ticker, df in stock_dict.items():
+        df.to_csv(os.path.join(directory, filename_template.format(ticker)), float_format='%.6f')
+    return list(stock_dict)
@@ -0,0 +1,286 @@
+"""
+Vectorized backtests of daily sentiment signals filtered by technical indicators,
+swept over a parameter grid. Inputs are aligned once on a dates x tickers panel;
+indicators, rolling sentiment and every filter are computed once per distinct
+parameter value and shared by all combinations using it. Combinations are then
+simulated `chunk_size` at a time as (combinations, dates, tickers) arrays,
+optionally spread over a process pool.
+
+A combination goes long a ticker at a close where its rolling sentiment is at least
+`sentiment_threshold` and the enabled filters agree (RSI below `rsi_limit`, MACD
+above or crossing above its signal, SMA fast above slow), and short on the mirror
+image; the position is held for `holding_days` panel dates after the last signal.
+Positions earn the close-to-next-close return, the portfolio is equally weighted
+over the tickers with a bar that day, and `cost_bps` is charged per unit of position change.
+Sentiment should be aggregated by the session it can trade in (see
+trading_calendar.align_news_to_sessions) to keep after-close news out of that day's signal.
+"""
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from . import config
+from .correlation_matrix import sentiment_panel
+from .financial_analysis import build_price_panel
+from .instrumentation import instrumented, stage
+from .panel_indicators import DEFAULT_MACD_PERIODS, DEFAULT_RSI_PERIOD, DEFAULT_SMA_PERIODS, calculate_panel_indicators
+
+MACD_FILTERS = ('none', 'above', 'cross')
+DEFAULT_PARAMETER_GRID = {
+    'sentiment_window': [1, 3, 5],          # Panel dates averaged into the sentiment signal
+    'sentiment_threshold': [0.05, 0.1, 0.2, 0.3],
+    'rsi_limit': [100, 70, 60],             # Longs need RSI below it, shorts above 100 - it; 100 is off
+    'macd_filter': list(MACD_FILTERS),
+    'trend_filter': [False, True],          # Longs need SMA fast > slow, shorts the opposite
+    'holding_days': [1, 3, 5, 10],
+}
+PARAMETERS = tuple(DEFAULT_PARAMETER_GRID)
+METRIC_COLUMNS = ['sharpe', 'annual_return', 'annual_volatility', 'max_drawdown', 'turnover', 'exposure', 'n_trades']
+DEFAULT_COST_BPS = 5.0
+DEFAULT_CHUNK_SIZE = 8  # Combinations simulated together; memory ~ chunk x dates x tickers x 6 bytes
+TRADING_DAYS_PER_YEAR = 252
+
+
+class BacktestData(NamedTuple):
+    """dates x tickers inputs shared by every parameter combination."""
+    dates: pd.DatetimeIndex
+    tickers: list
+    close: np.ndarray            # NaN where a ticker has no bar
+    forward_returns: np.ndarray  # Close to the ticker's next close; NaN on its last bar and missing bars
+    sentiment: np.ndarray        # Aggregated daily sentiment, NaN on days without news
+    indicators: dict             # RSI, MACD, MACD_signal and the two SMAs from calculate_panel_indicators
+
+
+def _forward_returns(close: np.ndarray) -> np.ndarray:
+    """Return from each bar to the same ticker's next bar, skipping dates it has no bar on."""
+    n_dates = len(close)
+    valid = ~np.isnan(close)
+    positions = np.where(valid, np.arange(n_dates)[:, None], n_dates)
+    following = np.minimum.accumulate(positions[::-1], axis=0)[::-1]  # First bar at or after each date
+    next_bar = np.vstack([following[1:], np.full((1, close.shape[1]), n_dates)])
+    padded = np.vstack([close, np.full((1, close.shape[1]), np.nan)])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        forward = np.take_along_axis(padded, next_bar, axis=0) / close - 1.0
+    forward[~valid] = np.nan
+    return forward
+
+
+@instrumented
+def prepare_backtest_data(stock_data_dict: dict, aggregated_sentiment_df: pd.DataFrame, price_col: str = 'Close',
+                          sentiment_stock_col=config.AGG_SENTIMENT_STOCK_COLUMN,
+                          sentiment_date_col=config.AGG_SENTIMENT_DATE_COLUMN,
+                          sentiment_score_col=config.AGG_SENTIMENT_AVG_SCORE_COLUMN,
+                          sma_periods=DEFAULT_SMA_PERIODS, rsi_period: int = DEFAULT_RSI_PERIOD,
+                          macd_periods=DEFAULT_MACD_PERIODS) -> BacktestData:
+    """Aligns {TICKER: OHLCV df} and aggregate_daily_sentiment output on one panel and computes the indicators."""
+    panel = build_price_panel(stock_data_dict, fields=[price_col])
+    close = panel.values[0]
+    indicators = calculate_panel_indicators(close, sma_periods=sma_periods, rsi_period=rsi_period,
+                                            macd_periods=macd_periods)
+    fast, slow = sma_periods
+    indicators = {'RSI': indicators[f'RSI_{rsi_period}'], 'MACD': indicators['MACD'],
+                  'MACD_signal': indicators['MACD_signal'], 'SMA_fast': indicators[f'SMA_{fast}'],
+                  'SMA_slow': indicators[f'SMA_{slow}']}
+    sentiment = sentiment_panel(aggregated_sentiment_df, panel.dates, panel.tickers, sentiment_stock_col,
+                                sentiment_date_col, sentiment_score_col)
+    return BacktestData(panel.dates, panel.tickers, close, _forward_returns(close), sentiment, indicators)
+
+
+def parameter_grid(grid: dict = None) -> pd.DataFrame:
+    """Every combination of the grid's values (missing parameters take the default grid's first value)."""
+    grid = {**{name: values[:1] for name, values in DEFAULT_PARAMETER_GRID.items()},
+            **(DEFAULT_PARAMETER_GRID if grid is None else grid)}
+    unknown = set(grid) - set(PARAMETERS)
+    if unknown:
+        raise ValueError(f"Unknown backtest parameters: {sorted(unknown)}. Expected {list(PARAMETERS)}.")
+    if not set(grid['macd_filter']) <= set(MACD_FILTERS):
+        raise ValueError(f"macd_filter values must be among {MACD_FILTERS}.")
+    combos = pd.DataFrame(list(itertools.product(*(grid[name] for name in PARAMETERS))), columns=list(PARAMETERS))
+    return combos.astype({'sentiment_window': 'int64', 'sentiment_threshold': 'float64', 'rsi_limit': 'float64',
+                          'trend_filter': 'bool', 'holding_days': 'int64'})
+
+
+def _rolling_sentiment(sentiment: np.ndarray, window: int) -> np.ndarray:
+    """Mean of the sentiment available over the last `window` panel dates (NaN if none)."""
+    observed = ~np.isnan(sentiment)
+    sums = np.vstack([np.zeros((1, sentiment.shape[1])), np.cumsum(np.where(observed, sentiment, 0.0), axis=0)])
+    counts = np.vstack([np.zeros((1, sentiment.shape[1])), np.cumsum(observed, axis=0)])
+    start = np.maximum(np.arange(1, len(sentiment) + 1) - window, 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return ((sums[1:] - sums[start]) / (counts[1:] - counts[start])).astype(np.float32)
+
+
+class _SignalTables(NamedTuple):
+    """Per-value filters shared across combinations: [value code, date, ticker] arrays, (long, short) pairs."""
+    sentiment: np.ndarray    # float32 rolling sentiment per window
+    rsi: tuple
+    macd: tuple
+    trend: tuple
+    tradable: np.ndarray     # Ticker has a bar and a next bar
+    forward_returns: np.ndarray  # NaN -> 0
+    n_listed: np.ndarray     # Tickers with a bar per date: the book is split equally among them
+    active: np.ndarray       # Dates with any forward return, over which metrics are taken
+
+
+def _signal_tables(data: BacktestData, values: dict) -> _SignalTables:
+    ind = data.indicators
+    with np.errstate(invalid='ignore'):
+        rsi = (np.stack([(ind['RSI'] < limit) | (limit >= 100) for limit in values['rsi_limit']]),
+               np.stack([(ind['RSI'] > 100 - limit) | (limit >= 100) for limit in values['rsi_limit']]))
+        above, below = ind['MACD'] > ind['MACD_signal'], ind['MACD'] < ind['MACD_signal']
+        crossed_up, crossed_down = above.copy(), below.copy()
+        crossed_up[1:] &= ~above[:-1]
+        crossed_down[1:] &= ~below[:-1]
+        by_filter = {'none': (np.ones_like(above), np.ones_like(below)), 'above': (above, below),
+                     'cross': (crossed_up, crossed_down)}
+        macd = tuple(np.stack([by_filter[name][side] for name in values['macd_filter']]) for side in (0, 1))
+        rising, falling = ind['SMA_fast'] > ind['SMA_slow'], ind['SMA_fast'] < ind['SMA_slow']
+        trend = (np.stack([rising if on else np.ones_like(rising) for on in values['trend_filter']]),
+                 np.stack([falling if on else np.ones_like(falling) for on in values['trend_filter']]))
+    tradable = ~np.isnan(data.forward_returns)
+    return _SignalTables(np.stack([_rolling_sentiment(data.sentiment, w) for w in values['sentiment_window']]),
+                         rsi, macd, trend, tradable, np.where(tradable, data.forward_returns, 0.0),
+                         np.maximum((~np.isnan(data.close)).sum(axis=1), 1), tradable.any(axis=1))
+
+
+def _held(entries: np.ndarray, holding_days: np.ndarray) -> np.ndarray:
+    """True where an entry happened within the last holding_days dates, per combination."""
+    counts = np.zeros((entries.shape[0], entries.shape[1] + 1, entries.shape[2]), dtype=np.int32)
+    np.cumsum(entries, axis=1, out=counts[:, 1:])
+    start = np.maximum(np.arange(1, entries.shape[1] + 1)[None, :] - holding_days[:, None], 0)
+    return counts[:, 1:] > np.take_along_axis(counts, start[:, :, None], axis=1)
+
+
+def _simulate_chunk(tables: _SignalTables, codes: np.ndarray, thresholds: np.ndarray, holding_days: np.ndarray,
+                    cost_rate: float, long_short: bool):
+    """Daily portfolio returns, turnover and exposure, (combinations, dates) each, for one chunk."""
+    window, rsi, macd, trend = codes.T
+    signal = tables.sentiment[window]
+    with np.errstate(invalid='ignore'):
+        longs = (signal >= thresholds[:, None, None]) & tables.rsi[0][rsi] & tables.macd[0][macd] & \
+            tables.trend[0][trend] & tables.tradable
+        position = _held(longs, holding_days).astype(np.int8)
+        if long_short:
+            shorts = (signal <= -thresholds[:, None, None]) & tables.rsi[1][rsi] & tables.macd[1][macd] & \
+                tables.trend[1][trend] & tables.tradable
+            position -= _held(shorts, holding_days).astype(np.int8)
+    del signal
+    change = np.abs(np.diff(position, axis=1, prepend=np.int8(0))).sum(axis=2, dtype=np.float64)
+    gross = np.einsum('ctn,tn->ct', position, tables.forward_returns)
+    exposure = np.abs(position).sum(axis=2, dtype=np.float64)
+    return (gross - cost_rate * change) / tables.n_listed, change / tables.n_listed, exposure / tables.n_listed, \
+        _count_entries(position)
+
+
+def _count_entries(position: np.ndarray) -> np.ndarray:
+    """Trades opened per combination: dates where a ticker's position becomes a different non-zero one."""
+    previous = np.concatenate([np.zeros_like(position[:, :1]), position[:, :-1]], axis=1)
+    return ((position != 0) & (position != previous)).sum(axis=(1, 2))
+
+
+def _metrics(daily_returns: np.ndarray, turnover: np.ndarray, exposure: np.ndarray, active: np.ndarray) -> dict:
+    """Per-combination summary statistics over the dates any ticker traded."""
+    returns = daily_returns[:, active]
+    mean = returns.mean(axis=1)
+    std = returns.std(axis=1, ddof=1) if returns.shape[1] > 1 else np.full(len(returns), np.nan)
+    equity = np.cumprod(1.0 + returns, axis=1)
+    drawdown = 1.0 - equity / np.maximum(np.maximum.accumulate(equity, axis=1), 1.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = np.where(std > 0, mean / std * np.sqrt(TRADING_DAYS_PER_YEAR), np.nan)
+    return {'sharpe': sharpe, 'annual_return': mean * TRADING_DAYS_PER_YEAR,
+            'annual_volatility': std * np.sqrt(TRADING_DAYS_PER_YEAR),
+            'max_drawdown': drawdown.max(axis=1, initial=0.0),
+            'turnover': turnover[:, active].mean(axis=1), 'exposure': exposure[:, active].mean(axis=1)}
+
+
+def _encode(combos: pd.DataFrame):
+    """Distinct values per table-backed parameter and each combination's codes into them."""
+    values, codes = {}, []
+    for name in ('sentiment_window', 'rsi_limit', 'macd_filter', 'trend_filter'):
+        column_codes, uniques = pd.factorize(combos[name], sort=True)
+        values[name] = list(uniques)
+        codes.append(column_codes)
+    return values, np.column_stack(codes)
+
+
+def _evaluate(tables, codes, thresholds, holding_days, cost_rate, long_short) -> dict:
+    daily, turnover, exposure, trades = _simulate_chunk(tables, codes, thresholds, holding_days, cost_rate, long_short)
+    metrics = _metrics(daily, turnover, exposure, tables.active)
+    metrics['n_trades'] = trades
+    return metrics
+
+
+_worker_tables = None
+
+
+def _init_backtest_worker(tables):
+    """Process-pool initializer: receives the shared signal tables once per worker."""
+    global _worker_tables
+    _worker_tables = tables
+
+
+def _evaluate_in_worker(args):
+    return _evaluate(_worker_tables, *args)
+
+
+@instrumented
+def run_parameter_sweep(data: BacktestData, grid: dict = None, cost_bps: float = DEFAULT_COST_BPS,
+                        long_short: bool = True, n_workers: int = 1,
+                        chunk_size: int = DEFAULT_CHUNK_SIZE) -> pd.DataFrame:
+    """
+    Backtests every combination of `grid` (default DEFAULT_PARAMETER_GRID) and returns
+    one row per combination: the parameters followed by METRIC_COLUMNS (annualized
+    Sharpe, return and volatility, max drawdown of the compounded equity curve, mean
+    daily turnover and exposure as fractions of the book, and trades opened).
+    n_workers > 1 spreads chunks of combinations over a process pool; None uses all cores.
+    """
+    combos = parameter_grid(grid)
+    values, codes = _encode(combos)
+    tables = _signal_tables(data, values)
+    thresholds = combos['sentiment_threshold'].to_numpy(dtype=np.float32)
+    holding_days = combos['holding_days'].to_numpy(dtype=np.int64)
+    cost_rate = cost_bps / 10_000
+    tasks = [(codes[start:start + chunk_size], thresholds[start:start + chunk_size],
+              holding_days[start:start + chunk_size], cost_rate, long_short)
+             for start in range(0, len(combos), chunk_size)]
+
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+    if n_workers <= 1 or len(tasks) <= 1:
+        chunks = []
+        for number, task in enumerate(tasks):
+            with stage('backtest_chunk', chunk=number, rows_in=len(task[0])):
+                chunks.append(_evaluate(tables, *task))
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_backtest_worker,
+                                 initargs=(tables,)) as executor:
+            chunks = list(executor.map(_evaluate_in_worker, tasks))
+
+    result = combos.copy()
+    for column in METRIC_COLUMNS:
+        result[column] = np.concatenate([chunk[column] for chunk in chunks]) if chunks else np.empty(0)
+    result['n_trades'] = result['n_trades'].astype('int64')
+    return result
+
+
+@instrumented
+def simulate(data: BacktestData, cost_bps: float = DEFAULT_COST_BPS, long_short: bool = True,
+             **params) -> pd.DataFrame:
+    """
+    Day-by-day results of one parameter combination (unspecified parameters take the
+    default grid's first value): portfolio return, equity, drawdown, turnover and exposure.
+    """
+    combos = parameter_grid({name: [value] for name, value in params.items()})
+    values, codes = _encode(combos)
+    daily, turnover, exposure, _ = _simulate_chunk(
+        _signal_tables(data, values), codes, combos['sentiment_threshold'].to_numpy(dtype=np.float32),
+        combos['holding_days'].to_numpy(dtype=np.int64), cost_bps / 10_000, long_short)
+    result = pd.DataFrame({'return': daily[0], 'turnover': turnover[0], 'exposure': exposure[0]},
+                          index=data.dates)
+    result['equity'] = (1.0 + result['return']).cumprod()
+    result['drawdown'] = 1.0 - result['equity'] / result['equity'].cummax().clip(lower=1.0)
+    return result
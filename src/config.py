@@ -12,6 +12,7 @@ NEWS_DATA_FILE_PATH = os.path.join(DATA_DIR, 'raw_analyst_ratings.csv') # Exampl
 NEWS_HEADLINE_COLUMN = 'headline'
 NEWS_DATE_COLUMN = 'date'
 NEWS_STOCK_COLUMN = 'stock'
+COMPACT_CATEGORICAL_COLUMNS = ['stock', 'publisher'] # Read as categoricals in memory_mode.compact_mode
 
 
 STOCK_CSV_DIR_PATH = os.path.join(RAW_DATA_DIR, 'stock_historical_data')
@@ -22,6 +23,11 @@ STOCK_REQUIRED_OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
 
 SENTIMENT_SCORE_COLUMN = 'sentiment_score' # Output of sentiment analysis
 
+MARKET_TIMEZONE = 'America/New_York' # Exchange timezone; naive news timestamps are read as local to it
+MARKET_CLOSE_TIME = '16:00' # News at or after the close counts towards the next session
+MARKET_EXTRA_CLOSURES = ['2012-10-29', '2012-10-30', '2018-12-05', '2025-01-09'] # Unscheduled closures on top of the holiday rules
+NEWS_SESSION_DATE_COLUMN = 'session_date' # Trading session a news item is attributed to
+
 
 AGG_SENTIMENT_DATE_COLUMN = 'date_sentiment' 
 AGG_SENTIMENT_STOCK_COLUMN = 'stock_symbol' 
@@ -35,7 +41,21 @@ MERGED_SENTIMENT_SCORE_COLUMN = AGG_SENTIMENT_AVG_SCORE_COLUMN
 MERGED_RETURN_COLUMN = STOCK_DAILY_RETURN_COLUMN
 MERGED_SENTIMENT_DATE_COLUMN = AGG_SENTIMENT_DATE_COLUMN
 MERGED_RETURN_DATE_COLUMN = 'date_return' # Date associated with the return
+MERGED_LAG_COLUMN = 'lag_days' # Lag applied to the return in multi-lag merges
 
 
 CORRELATION_LAGS_TO_TEST = [0, 1, -1] # 0:same-day, 1:news->ret_next_day, -1:news->ret_prev_day
-CORRELATION_MIN_OBSERVATIONS = 15
\ No newline at end of file
+CORRELATION_MIN_OBSERVATIONS = 15
+WINDOWED_CORRELATION_COLUMN = 'correlation'
+WINDOWED_CORRELATION_NOBS_COLUMN = 'n_obs'
+CORRELATION_N_PERMUTATIONS = 2000
+CORRELATION_N_BOOTSTRAP = 2000
+CORRELATION_CONFIDENCE_LEVEL = 0.95
+CORRELATION_MATRIX_BLOCK_SIZE = 512 # Tickers per block in correlation_matrix; bounds memory to ~dates x block
+
+PIPELINE_CACHE_DIR = os.path.join(PROCESSED_DATA_DIR, 'pipeline_cache') # Memoized stage outputs of src.pipeline
+METRICS_LOG_PATH = os.path.join(PROCESSED_DATA_DIR, 'metrics.jsonl') # JSON-lines sink of instrumentation.enable_metrics
+SENTIMENT_CACHE_PATH = os.path.join(PROCESSED_DATA_DIR, 'sentiment_cache.sqlite')
+SENTIMENT_CACHE_MAX_ENTRIES = 5_000_000
+
+IMPORT_TIME_BUDGET_SECONDS = 0.5 # Max time to import all src modules once pandas/numpy are loaded
@@ -1,9 +1,16 @@
 
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import numpy as np
-from scipy.stats import pearsonr
 from . import config 
+from .instrumentation import instrumented, report, stage
+from .memory_mode import compact_mode_enabled, upper_labels, working_copy
+from .resampling import bin_labels, resample_ohlcv, timeframe_key
+from .trading_calendar import to_market_time
 
+@instrumented
 def aggregate_daily_sentiment(
     news_df_with_sentiment,
     date_col=config.AGG_SENTIMENT_DATE_COLUMN,       
@@ -11,27 +18,26 @@ def aggregate_daily_sentiment(
     sentiment_col=config.SENTIMENT_SCORE_COLUMN,  
     output_stock_col=config.AGG_SENTIMENT_STOCK_COLUMN,
     output_avg_sentiment_col=config.AGG_SENTIMENT_AVG_SCORE_COLUMN,
-    output_num_articles_col=config.AGG_SENTIMENT_NUM_ARTICLES_COLUMN
+    output_num_articles_col=config.AGG_SENTIMENT_NUM_ARTICLES_COLUMN,
+    timeframe=None,
+    calendar=None
 ):
-    """Aggregates sentiment scores by stock and date (daily)."""
+    """
+    Aggregates sentiment scores by stock and date (daily), or by `timeframe` bar
+    (e.g. 'weekly', labelled like the resampled prices; integer bar counts need the
+    trading `calendar`), averaging over all the bar's articles.
+    """
     if news_df_with_sentiment.empty or not all(c in news_df_with_sentiment.columns for c in [date_col, stock_col, sentiment_col]):
       
         return pd.DataFrame()
 
-    df_agg = news_df_with_sentiment.copy()
-    df_agg[stock_col] = df_agg[stock_col].astype(str).str.upper()
-    
-    if not pd.api.types.is_datetime64_any_dtype(df_agg[date_col]):
-        df_agg[date_col] = pd.to_datetime(df_agg[date_col], errors='coerce')
-    df_agg.dropna(subset=[date_col], inplace=True)
-
+    df_agg = _prepare_sentiment_keys(news_df_with_sentiment, date_col, stock_col, sentiment_col, timeframe, calendar)
 
-    aggregated = df_agg.groupby([date_col, stock_col]).agg(
+    aggregated = df_agg.groupby([date_col, stock_col], observed=True).agg(
         avg_sentiment=(sentiment_col, 'mean'),
         num_articles=(sentiment_col, 'count') # Count non-NA sentiment scores
     ).reset_index()
 
-
     aggregated.rename(columns={
         date_col: config.AGG_SENTIMENT_DATE_COLUMN, 
         stock_col: output_stock_col,
@@ -39,20 +45,98 @@ def aggregate_daily_sentiment(
         'num_articles': output_num_articles_col
     }, inplace=True)
     
-    print(f"Daily sentiment aggregation complete. Result shape: {aggregated.shape}")
+    report(f"Daily sentiment aggregation complete. Result shape: {aggregated.shape}")
+    return aggregated
+
+def _prepare_sentiment_keys(news_df, date_col, stock_col, sentiment_col, timeframe=None, calendar=None):
+    """Selects the aggregation columns, upper-cases tickers, parses/drops dates and maps them to `timeframe` bars."""
+    df_agg = working_copy(news_df[[date_col, stock_col, sentiment_col]])
+    if compact_mode_enabled():
+        df_agg[stock_col] = upper_labels(df_agg[stock_col])  # Stays categorical
+    else:
+        df_agg[stock_col] = df_agg[stock_col].astype(str).str.upper()
+
+    if timeframe_key(timeframe) is not None:
+        # Bars are cut on exchange-local dates; this also parses mixed UTC offsets
+        df_agg[date_col] = bin_labels(to_market_time(df_agg[date_col]), timeframe, calendar)
+    elif not pd.api.types.is_datetime64_any_dtype(df_agg[date_col]):
+        df_agg[date_col] = pd.to_datetime(df_agg[date_col], errors='coerce')
+    df_agg.dropna(subset=[date_col], inplace=True)
+    return df_agg
+
+@instrumented
+def aggregate_daily_sentiment_chunked(
+    news_chunks,
+    date_col=config.AGG_SENTIMENT_DATE_COLUMN,
+    stock_col=config.NEWS_STOCK_COLUMN,
+    sentiment_col=config.SENTIMENT_SCORE_COLUMN,
+    output_stock_col=config.AGG_SENTIMENT_STOCK_COLUMN,
+    output_avg_sentiment_col=config.AGG_SENTIMENT_AVG_SCORE_COLUMN,
+    output_num_articles_col=config.AGG_SENTIMENT_NUM_ARTICLES_COLUMN,
+    compact_every: int = 32,
+    timeframe=None,
+    calendar=None
+):
+    """
+    Same output as aggregate_daily_sentiment, computed from an iterable of scored news
+    chunks (e.g. built on data_processing.iter_financial_news_chunks). Only per-chunk
+    (sum, count) partials are kept, folded together every `compact_every` chunks.
+    """
+    partials = []
+    totals = None
+    for chunk_number, chunk in enumerate(news_chunks):
+        if chunk is None or chunk.empty or not all(c in chunk.columns for c in [date_col, stock_col, sentiment_col]):
+            continue
+        with stage('aggregate_sentiment_chunk', chunk=chunk_number, rows_in=len(chunk)) as chunk_stage:
+            keys = _prepare_sentiment_keys(chunk, date_col, stock_col, sentiment_col, timeframe, calendar)
+            partials.append(keys.groupby([date_col, stock_col], observed=True)[sentiment_col].agg(['sum', 'count']))
+            chunk_stage.record(rows_out=len(partials[-1]))
+        if len(partials) >= compact_every:
+            totals = _fold_partials(partials if totals is None else [totals] + partials)
+            partials = []
+
+    if partials or totals is not None:
+        totals = _fold_partials(partials if totals is None else [totals] + partials)
+    if totals is None or totals.empty:
+        return pd.DataFrame()
+
+    aggregated = pd.DataFrame({
+        'avg_sentiment': totals['sum'] / totals['count'].where(totals['count'] > 0),
+        'num_articles': totals['count'].astype('int64')
+    }).reset_index()
+
+    aggregated.rename(columns={
+        date_col: config.AGG_SENTIMENT_DATE_COLUMN,
+        stock_col: output_stock_col,
+        'avg_sentiment': output_avg_sentiment_col,
+        'num_articles': output_num_articles_col
+    }, inplace=True)
+
+    report(f"Daily sentiment aggregation complete. Result shape: {aggregated.shape}")
     return aggregated
 
+def _fold_partials(partials):
+    """Combines (sum, count) partial aggregates that share the same group keys."""
+    return pd.concat(partials).groupby(level=[0, 1], observed=True).sum()
+
+@instrumented
 def calculate_daily_stock_returns(
     stock_df: pd.DataFrame,
     price_col=config.STOCK_PRICE_COLUMN_FOR_RETURNS,
-    output_col=config.STOCK_DAILY_RETURN_COLUMN
+    output_col=config.STOCK_DAILY_RETURN_COLUMN,
+    timeframe=None
 ) -> pd.DataFrame:
-    """Calculates daily percentage stock returns."""
+    """
+    Calculates daily percentage stock returns; with a timeframe (e.g. 'weekly') the
+    prices are resampled first, giving each bar's compounded return.
+    """
     if stock_df is None or stock_df.empty:
       
         return pd.DataFrame(columns=[output_col]) 
 
-    df = stock_df.copy()
+    if timeframe_key(timeframe) is not None and price_col in stock_df.columns:
+        stock_df = resample_ohlcv(stock_df, timeframe, price_col)
+    df = working_copy(stock_df)
     if price_col not in df.columns:
        
         df[output_col] = np.nan
@@ -68,75 +152,128 @@ def calculate_daily_stock_returns(
         df[output_col] = df[price_col].pct_change()
     return df
 
-def merge_sentiment_with_returns(
+def _stack_returns(stock_data_with_returns_dict: dict, stock_return_col):
+    """
+    Stacks every usable {TICKER: df} return series into flat arrays, one contiguous
+    block per ticker in dict order. Returns (tickers, block_starts, dates, returns).
+    """
+    tickers, dates, returns = [], [], []
+    for stock_symbol_key, stock_df in stock_data_with_returns_dict.items():
+        if stock_return_col not in stock_df.columns or not isinstance(stock_df.index, pd.DatetimeIndex):
+            continue
+        tickers.append(stock_symbol_key)
+        dates.append(stock_df.index)
+        returns.append(stock_df[stock_return_col].to_numpy(dtype=np.float64, na_value=np.nan))
+    lengths = np.array([len(r) for r in returns], dtype=np.int64)
+    block_starts = np.concatenate([[0], np.cumsum(lengths)])
+    stacked_dates = dates[0].append(dates[1:]) if dates else pd.DatetimeIndex([])
+    stacked_returns = np.concatenate(returns) if returns else np.empty(0)
+    return tickers, block_starts, stacked_dates, stacked_returns
+
+
+def _grouped_shift(values: np.ndarray, block_starts: np.ndarray, lag_days: int) -> np.ndarray:
+    """Per-block equivalent of Series.shift(-lag_days) on the stacked return array."""
+    positions = np.arange(len(values))
+    block = np.repeat(np.arange(len(block_starts) - 1), np.diff(block_starts))
+    source = positions + lag_days
+    inside = (source >= block_starts[block]) & (source < block_starts[block + 1])
+    shifted = np.full(len(values), np.nan)
+    shifted[inside] = values[source[inside]]
+    return shifted
+
+
+@instrumented
+def merge_sentiment_with_lagged_returns(
     aggregated_sentiment_df,
     stock_data_with_returns_dict: dict, # Dict of {TICKER: df_with_returns}
+    lags=None,
     sentiment_stock_col=config.AGG_SENTIMENT_STOCK_COLUMN,
     sentiment_date_col=config.AGG_SENTIMENT_DATE_COLUMN,
     sentiment_score_col=config.AGG_SENTIMENT_AVG_SCORE_COLUMN,
     stock_return_col=config.STOCK_DAILY_RETURN_COLUMN,
-    lag_days: int = 0,
     output_merged_stock_col=config.MERGED_STOCK_SYMBOL_COLUMN,
     output_merged_sentiment_date_col=config.MERGED_SENTIMENT_DATE_COLUMN,
-    output_merged_return_date_col=config.MERGED_RETURN_DATE_COLUMN
+    output_merged_return_date_col=config.MERGED_RETURN_DATE_COLUMN,
+    output_lag_col=config.MERGED_LAG_COLUMN
 ):
     """
-    Merges aggregated daily sentiment with daily stock returns, applying a lag to returns.
-    lag_days > 0: sentiment today vs future return (return shifted backwards)
-    lag_days < 0: sentiment today vs past return (return shifted forwards)
-    lag_days = 0: contemporary
+    Merges aggregated daily sentiment with returns for every lag in `lags`
+    (default config.CORRELATION_LAGS_TO_TEST) in one pass: all returns are stacked
+    into a long (ticker, date) array, matched to the sentiment rows with a single merge,
+    and each lag is a grouped shift gathered at the matched positions.
+    Returns one frame with an `output_lag_col` column; the rows for each lag are the
+    same, in the same order, as merge_sentiment_with_returns(..., lag_days=lag).
     """
+    if lags is None:
+        lags = config.CORRELATION_LAGS_TO_TEST
     if aggregated_sentiment_df.empty or not stock_data_with_returns_dict:
-     
         return pd.DataFrame()
 
-    all_merged_data = []
-
     if not pd.api.types.is_datetime64_any_dtype(aggregated_sentiment_df[sentiment_date_col]):
          aggregated_sentiment_df[sentiment_date_col] = pd.to_datetime(aggregated_sentiment_df[sentiment_date_col], errors='coerce')
 
-    for stock_symbol_key, stock_df in stock_data_with_returns_dict.items():
-    
-        sentiment_for_stock = aggregated_sentiment_df[
-            aggregated_sentiment_df[sentiment_stock_col] == stock_symbol_key
-        ].copy()
-
-        if sentiment_for_stock.empty or stock_return_col not in stock_df.columns:
-            continue
-        
-    
-        temp_stock_df = stock_df.copy()
-        if not isinstance(temp_stock_df.index, pd.DatetimeIndex):
-        
-            continue
-    
-        temp_stock_df['shifted_return'] = temp_stock_df[stock_return_col].shift(-lag_days)
-        temp_stock_df.rename(columns={sentiment_date_col: output_merged_return_date_col}, inplace=True, errors='ignore') # In case stock_df has a date column
-        temp_stock_df.index.name = output_merged_return_date_col 
-        sentiment_for_stock.rename(columns={sentiment_date_col: output_merged_sentiment_date_col}, inplace=True)
-
-        merged_stock = pd.merge(
-            sentiment_for_stock[[output_merged_sentiment_date_col, sentiment_score_col, config.AGG_SENTIMENT_NUM_ARTICLES_COLUMN]],
-            temp_stock_df[['shifted_return']].reset_index(), 
-            left_on=output_merged_sentiment_date_col,
-            right_on=output_merged_return_date_col,
-            how='inner'
-        )
-
-        if not merged_stock.empty:
-            merged_stock[output_merged_stock_col] = stock_symbol_key 
-            merged_stock.rename(columns={'shifted_return': stock_return_col}, inplace=True) 
-            all_merged_data.append(merged_stock)
-
-    if not all_merged_data:
-      
+    tickers, block_starts, stacked_dates, stacked_returns = _stack_returns(stock_data_with_returns_dict, stock_return_col)
+    ticker_codes = pd.Index(tickers, dtype=object).get_indexer(aggregated_sentiment_df[sentiment_stock_col])
+    left = pd.DataFrame({'ticker_code': ticker_codes, 'date': aggregated_sentiment_df[sentiment_date_col].to_numpy(),
+                         'left_row': np.arange(len(aggregated_sentiment_df))})
+    left = left[left['ticker_code'] >= 0]
+    right = pd.DataFrame({'ticker_code': np.repeat(np.arange(len(tickers)), np.diff(block_starts)),
+                          'date': stacked_dates, 'right_pos': np.arange(len(stacked_dates))})
+    matches = pd.merge(left, right, on=['ticker_code', 'date'], how='inner')
+    if matches.empty:
         return pd.DataFrame()
+    matches = matches.sort_values(['ticker_code', 'left_row', 'right_pos'], kind='stable')
+    left_rows = matches['left_row'].to_numpy()
+    right_pos = matches['right_pos'].to_numpy()
+
+    sentiment_part = aggregated_sentiment_df[[sentiment_date_col, sentiment_score_col, config.AGG_SENTIMENT_NUM_ARTICLES_COLUMN]]
+    sentiment_part = sentiment_part.iloc[left_rows].rename(columns={sentiment_date_col: output_merged_sentiment_date_col})
+    sentiment_part = sentiment_part.reset_index(drop=True)
+    stock_symbols = np.asarray(tickers, dtype=object)[matches['ticker_code'].to_numpy()]
+
+    merged_by_lag = []
+    for lag_days in lags:
+        merged = working_copy(sentiment_part)
+        merged[output_merged_return_date_col] = stacked_dates[right_pos]
+        merged[stock_return_col] = _grouped_shift(stacked_returns, block_starts, lag_days)[right_pos]
+        merged[output_merged_stock_col] = stock_symbols
+        merged.insert(0, output_lag_col, lag_days)
+        merged_by_lag.append(merged)
+    return pd.concat(merged_by_lag, ignore_index=True)
 
-    final_merged_df = pd.concat(all_merged_data, ignore_index=True)
 
-    return final_merged_df
+@instrumented
+def merge_sentiment_with_returns(
+    aggregated_sentiment_df,
+    stock_data_with_returns_dict: dict, # Dict of {TICKER: df_with_returns}
+    sentiment_stock_col=config.AGG_SENTIMENT_STOCK_COLUMN,
+    sentiment_date_col=config.AGG_SENTIMENT_DATE_COLUMN,
+    sentiment_score_col=config.AGG_SENTIMENT_AVG_SCORE_COLUMN,
+    stock_return_col=config.STOCK_DAILY_RETURN_COLUMN,
+    lag_days: int = 0,
+    output_merged_stock_col=config.MERGED_STOCK_SYMBOL_COLUMN,
+    output_merged_sentiment_date_col=config.MERGED_SENTIMENT_DATE_COLUMN,
+    output_merged_return_date_col=config.MERGED_RETURN_DATE_COLUMN
+):
+    """
+    Merges aggregated daily sentiment with daily stock returns, applying a lag to returns.
+    lag_days > 0: sentiment today vs future return (return shifted backwards)
+    lag_days < 0: sentiment today vs past return (return shifted forwards)
+    lag_days = 0: contemporary
+    To test several lags, merge_sentiment_with_lagged_returns does them all in one pass.
+    """
+    merged = merge_sentiment_with_lagged_returns(
+        aggregated_sentiment_df, stock_data_with_returns_dict, lags=[lag_days],
+        sentiment_stock_col=sentiment_stock_col, sentiment_date_col=sentiment_date_col,
+        sentiment_score_col=sentiment_score_col, stock_return_col=stock_return_col,
+        output_merged_stock_col=output_merged_stock_col,
+        output_merged_sentiment_date_col=output_merged_sentiment_date_col,
+        output_merged_return_date_col=output_merged_return_date_col
+    )
+    return merged.drop(columns=config.MERGED_LAG_COLUMN) if not merged.empty else merged
 
 
+@instrumented
 def calculate_pearson_correlation(
     df,
     col1,
@@ -157,4 +294,278 @@ def calculate_pearson_correlation(
         return np.nan, n_obs
 
     correlation = temp_df[col1].corr(temp_df[col2], method='pearson')
-    return correlation, n_obs
\ No newline at end of file
+    return correlation, n_obs
+
+def _window_starts(group_starts_per_row: np.ndarray, times: np.ndarray, window) -> np.ndarray:
+    """
+    First row of each row's window, never before its group's first row.
+    window=None is expanding, an int counts observations, anything else is a time span
+    (e.g. '90D'), covering (date - window, date] like DataFrame.rolling.
+    """
+    positions = np.arange(len(group_starts_per_row))
+    if window is None:
+        return group_starts_per_row.copy()
+    if isinstance(window, (int, np.integer)):
+        if window < 2:
+            raise ValueError("An observation window needs at least 2 rows.")
+        return np.maximum(positions - window + 1, group_starts_per_row)
+    # Time window: make the (group, time) order one increasing key, in seconds to stay in int64
+    span = pd.Timedelta(window)
+    seconds = times.astype('datetime64[s]').astype(np.int64)
+    window_seconds = int(np.ceil(span.total_seconds()))
+    is_group_start = positions == group_starts_per_row
+    group_offset = np.cumsum(np.where(is_group_start, 0, np.diff(seconds, prepend=seconds[:1])))
+    group_offset += np.cumsum(is_group_start) * (window_seconds + 1)
+    return np.maximum(np.searchsorted(group_offset, group_offset - window_seconds, side='right'),
+                      group_starts_per_row)
+
+
+def _run_starts(values: np.ndarray, group_starts_per_row: np.ndarray) -> np.ndarray:
+    """Start row of the run of equal consecutive values each row belongs to (within its group)."""
+    positions = np.arange(len(values))
+    new_run = positions == group_starts_per_row
+    new_run[1:] |= values[1:] != values[:-1]
+    return np.maximum.accumulate(np.where(new_run, positions, 0))
+
+
+def _windowed_sums(values: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """Sum of values[start..i] for every row i, from one cumulative sum."""
+    cumulative = np.concatenate([[0.0], np.cumsum(values)])
+    return cumulative[np.arange(1, len(values) + 1)] - cumulative[starts]
+
+
+def _pearson_from_sums(n, sx, sy, sxx, syy, sxy) -> np.ndarray:
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cov = n * sxy - sx * sy
+        var_x = n * sxx - sx * sx
+        var_y = n * syy - sy * sy
+        return np.clip(cov / np.sqrt(var_x * var_y), -1.0, 1.0)
+
+
+def _average_ranks(matrix: np.ndarray) -> np.ndarray:
+    """Row-wise average ranks (ties share their mean rank); NaN entries stay NaN."""
+    order = np.argsort(matrix, axis=1, kind='stable')  # NaN sorts last
+    ordered = np.take_along_axis(matrix, order, axis=1)
+    width = matrix.shape[1]
+    columns = np.arange(width)
+    run_begins = np.ones(ordered.shape, dtype=bool)
+    run_begins[:, 1:] = ordered[:, 1:] != ordered[:, :-1]
+    run_ends = np.ones(ordered.shape, dtype=bool)
+    run_ends[:, :-1] = run_begins[:, 1:]
+    first = np.maximum.accumulate(np.where(run_begins, columns, 0), axis=1)
+    last = np.minimum.accumulate(np.where(run_ends, columns, width - 1)[:, ::-1], axis=1)[:, ::-1]
+    ranks = np.empty(matrix.shape)
+    np.put_along_axis(ranks, order, (first + last) / 2.0 + 1.0, axis=1)
+    ranks[np.isnan(matrix)] = np.nan
+    return ranks
+
+
+def _windowed_spearman(x, y, starts, block_elements: int = 1_000_000) -> np.ndarray:
+    """
+    Spearman per window: gathers each window into a row, ranks it and correlates the ranks.
+    Rows are processed in blocks of about `block_elements` gathered values, so long
+    (e.g. expanding) windows get proportionally fewer rows per block.
+    """
+    lengths = np.arange(len(x)) - starts + 1
+    width = int(lengths.max()) if len(x) else 0
+    result = np.full(len(x), np.nan)
+    offsets = np.arange(width)
+    block_rows = max(1, block_elements // max(width, 1))
+    for begin in range(0, len(x), block_rows):
+        rows = slice(begin, begin + block_rows)
+        index = starts[rows, None] + offsets
+        inside = offsets < lengths[rows, None]
+        index = np.where(inside, index, 0)
+        rank_x = _average_ranks(np.where(inside, x[index], np.nan))
+        rank_y = _average_ranks(np.where(inside, y[index], np.nan))
+        n = inside.sum(axis=1)
+        rank_x, rank_y = np.nan_to_num(rank_x), np.nan_to_num(rank_y)
+        result[rows] = _pearson_from_sums(n, rank_x.sum(1), rank_y.sum(1), (rank_x ** 2).sum(1),
+                                          (rank_y ** 2).sum(1), (rank_x * rank_y).sum(1))
+    return result
+
+
+@instrumented
+def calculate_windowed_correlation(
+    merged_df,
+    col1=config.MERGED_SENTIMENT_SCORE_COLUMN,
+    col2=config.MERGED_RETURN_COLUMN,
+    window=None,
+    method: str = 'pearson',
+    group_cols=None,
+    date_col=config.MERGED_SENTIMENT_DATE_COLUMN,
+    min_observations=config.CORRELATION_MIN_OBSERVATIONS
+):
+    """
+    Rolling (window=int observations or a time span such as '90D') or expanding
+    (window=None) correlation of col1 vs col2, for every group in one vectorized call.
+    group_cols defaults to the stock column plus the lag column when present, so the
+    output of merge_sentiment_with_lagged_returns can be passed in directly.
+    Rows missing either value are dropped first, as in calculate_pearson_correlation;
+    windows with fewer than `min_observations` pairs or a constant series give NaN.
+    Pearson comes from windowed sums of centred values; Spearman ranks each window.
+    Returns group columns, date, correlation and n_obs, sorted by group and date.
+    """
+    if method not in ('pearson', 'spearman'):
+        raise ValueError(f"Unknown correlation method '{method}'. Use 'pearson' or 'spearman'.")
+    if group_cols is None:
+        group_cols = [c for c in [config.MERGED_STOCK_SYMBOL_COLUMN, config.MERGED_LAG_COLUMN] if c in merged_df.columns]
+    output_columns = list(group_cols) + [date_col, config.WINDOWED_CORRELATION_COLUMN, config.WINDOWED_CORRELATION_NOBS_COLUMN]
+    if merged_df.empty or not all(c in merged_df.columns for c in [col1, col2, date_col] + list(group_cols)):
+        return pd.DataFrame(columns=output_columns)
+
+    df = merged_df[list(group_cols) + [date_col, col1, col2]].dropna(subset=[date_col, col1, col2])
+    df[date_col] = pd.to_datetime(df[date_col])
+    group_codes = df.groupby(list(group_cols), sort=True).ngroup().to_numpy() if group_cols else np.zeros(len(df), dtype=np.int64)
+    order = np.lexsort((df[date_col].to_numpy(), group_codes))
+    df = df.iloc[order].reset_index(drop=True)
+    group_codes = group_codes[order]
+    x = df[col1].to_numpy(dtype=np.float64)
+    y = df[col2].to_numpy(dtype=np.float64)
+
+    positions = np.arange(len(df))
+    is_group_start = np.ones(len(df), dtype=bool)
+    is_group_start[1:] = group_codes[1:] != group_codes[:-1]
+    group_starts = np.maximum.accumulate(np.where(is_group_start, positions, 0))
+    starts = _window_starts(group_starts, df[date_col].to_numpy(), window)
+    n_obs = positions - starts + 1
+
+    if method == 'pearson':
+        # Centring per group keeps the cumulative sums small, so window differences stay accurate
+        counts = np.bincount(group_codes)
+        x_centred = x - (np.bincount(group_codes, x) / counts)[group_codes]
+        y_centred = y - (np.bincount(group_codes, y) / counts)[group_codes]
+        correlation = _pearson_from_sums(
+            n_obs, _windowed_sums(x_centred, starts), _windowed_sums(y_centred, starts),
+            _windowed_sums(x_centred ** 2, starts), _windowed_sums(y_centred ** 2, starts),
+            _windowed_sums(x_centred * y_centred, starts))
+    else:
+        correlation = _windowed_spearman(x, y, starts)
+
+    constant = (_run_starts(x, group_starts) <= starts) | (_run_starts(y, group_starts) <= starts)
+    correlation[constant | (n_obs < min_observations)] = np.nan
+
+    result = df[list(group_cols) + [date_col]].copy()
+    result[config.WINDOWED_CORRELATION_COLUMN] = correlation
+    result[config.WINDOWED_CORRELATION_NOBS_COLUMN] = n_obs
+    return result
+
+
+SIGNIFICANCE_COLUMNS = ['correlation', 'n_obs', 'p_value', 'ci_lower', 'ci_upper']
+
+
+def _rowwise_pearson(x_rows: np.ndarray, y_rows: np.ndarray) -> np.ndarray:
+    """Pearson correlation of each row pair; rows where either side is constant give NaN."""
+    x_rows = x_rows - x_rows.mean(axis=1, keepdims=True)
+    y_rows = y_rows - y_rows.mean(axis=1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r = (x_rows * y_rows).sum(axis=1) / np.sqrt((x_rows ** 2).sum(axis=1) * (y_rows ** 2).sum(axis=1))
+    return np.clip(r, -1.0, 1.0)
+
+
+def _block_bootstrap_indices(rng, n: int, n_resamples: int, block_length: int) -> np.ndarray:
+    """(n_resamples, n) moving-block bootstrap indices; block_length=1 is the plain bootstrap."""
+    n_blocks = -(-n // block_length)
+    starts = rng.integers(0, n - block_length + 1, size=(n_resamples, n_blocks))
+    return (starts[:, :, None] + np.arange(block_length)).reshape(n_resamples, -1)[:, :n]
+
+
+def _significance_for_pairs(x, y, seed, n_permutations, n_bootstrap, block_length,
+                            confidence, min_observations, batch_size):
+    """
+    (correlation, n_obs, p_value, ci_lower, ci_upper) for paired samples.
+    Resamples are drawn `batch_size` at a time as index matrices and correlated row-wise.
+    """
+    n = len(x)
+    if n < max(min_observations, 2) or np.all(x == x[0]) or np.all(y == y[0]):
+        return (np.nan, n, np.nan, np.nan, np.nan)
+    rng = np.random.default_rng(seed)
+    correlation = float(_rowwise_pearson(x[None, :], y[None, :])[0])
+
+    p_value = np.nan
+    if n_permutations:
+        # Shuffling y keeps its mean and spread, so each permuted r is one dot product
+        x_std = (x - x.mean()) / x.std()
+        y_std = (y - y.mean()) / y.std()
+        exceed = 0
+        for done in range(0, n_permutations, batch_size):
+            batch = min(batch_size, n_permutations - done)
+            permutations = rng.permuted(np.broadcast_to(np.arange(n), (batch, n)), axis=1)
+            permuted_r = y_std[permutations] @ x_std / n
+            exceed += int(np.count_nonzero(np.abs(permuted_r) >= abs(correlation) - 1e-12))
+        p_value = (exceed + 1) / (n_permutations + 1)
+
+    ci_lower = ci_upper = np.nan
+    if n_bootstrap:
+        if block_length is None:
+            block_length = max(1, int(round(n ** (1 / 3))))
+        block_length = min(block_length, n)
+        resampled_r = np.empty(n_bootstrap)
+        for done in range(0, n_bootstrap, batch_size):
+            batch = min(batch_size, n_bootstrap - done)
+            indices = _block_bootstrap_indices(rng, n, batch, block_length)
+            resampled_r[done:done + batch] = _rowwise_pearson(x[indices], y[indices])
+        if np.isfinite(resampled_r).any():
+            tail = (1.0 - confidence) / 2.0 * 100
+            ci_lower, ci_upper = np.nanpercentile(resampled_r, [tail, 100 - tail])
+    return (correlation, n, p_value, ci_lower, ci_upper)
+
+
+def _significance_task(args):
+    return _significance_for_pairs(*args)
+
+
+@instrumented
+def calculate_correlation_significance(
+    merged_df,
+    col1=config.MERGED_SENTIMENT_SCORE_COLUMN,
+    col2=config.MERGED_RETURN_COLUMN,
+    group_cols=None,
+    date_col=config.MERGED_SENTIMENT_DATE_COLUMN,
+    n_permutations: int = config.CORRELATION_N_PERMUTATIONS,
+    n_bootstrap: int = config.CORRELATION_N_BOOTSTRAP,
+    block_length: int = None,
+    confidence: float = config.CORRELATION_CONFIDENCE_LEVEL,
+    min_observations=config.CORRELATION_MIN_OBSERVATIONS,
+    seed=None,
+    n_workers: int = 1,
+    batch_size: int = 500
+):
+    """
+    Pearson correlation per group with a two-sided permutation p-value and a
+    moving-block bootstrap percentile confidence interval (block_length defaults to
+    n ** (1/3); 1 gives the ordinary bootstrap). group_cols defaults to the stock
+    column plus the lag column when present. Each group gets its own child of
+    SeedSequence(seed), so results are reproducible for any n_workers;
+    n_workers > 1 spreads groups over a process pool, None uses all cores.
+    Groups below `min_observations` or with a constant series get NaN statistics.
+    Returns group columns followed by SIGNIFICANCE_COLUMNS.
+    """
+    if group_cols is None:
+        group_cols = [c for c in [config.MERGED_STOCK_SYMBOL_COLUMN, config.MERGED_LAG_COLUMN] if c in merged_df.columns]
+    group_cols = list(group_cols)
+    if merged_df.empty or not all(c in merged_df.columns for c in [col1, col2] + group_cols):
+        return pd.DataFrame(columns=group_cols + SIGNIFICANCE_COLUMNS)
+
+    df = merged_df.dropna(subset=[col1, col2])
+    if date_col in df.columns:
+        df = df.sort_values(date_col, kind='stable')  # Blocks must follow time order
+    groups = list(df.groupby(group_cols, sort=True)) if group_cols else [((), df)]
+    seeds = np.random.SeedSequence(seed).spawn(len(groups))
+    tasks = [(group[col1].to_numpy(dtype=np.float64), group[col2].to_numpy(dtype=np.float64), child_seed,
+              n_permutations, n_bootstrap, block_length, confidence, min_observations, batch_size)
+             for (_, group), child_seed in zip(groups, seeds)]
+
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+    if n_workers <= 1 or len(tasks) <= 1:
+        stats = [_significance_task(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            stats = list(executor.map(_significance_task, tasks, chunksize=max(1, len(tasks) // (4 * n_workers))))
+
+    keys = [key if isinstance(key, tuple) else (key,) for key, _ in groups]
+    result = pd.DataFrame(keys, columns=group_cols) if group_cols else pd.DataFrame(index=range(len(stats)))
+    result[SIGNIFICANCE_COLUMNS] = pd.DataFrame(stats, columns=SIGNIFICANCE_COLUMNS)
+    result['n_obs'] = result['n_obs'].astype('int64')
+    return result
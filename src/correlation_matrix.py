@@ -0,0 +1,224 @@
+"""
+Correlation matrices on a dates x tickers panel: the return correlation of every
+ticker pair, and sentiment vs. lagged returns for every ticker and lag at once.
+Correlations are pairwise-complete (each pair uses the dates where both values
+exist) and come from masked matrix products, worked through `block_size` tickers
+at a time so memory stays around dates x block_size beyond the results.
+"""
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from . import config
+from .correlation_analysis import _grouped_shift, _stack_returns
+from .instrumentation import instrumented
+from .resampling import price_calendar, resample_returns, resample_sentiment, timeframe_key
+
+_CONSTANT_TOLERANCE = 1e-10  # Relative variance below which a series counts as constant
+
+
+class CorrelationMatrix(NamedTuple):
+    """correlation[i, j] over n_obs[i, j] common observations; valid = n_obs >= min_observations."""
+    correlation: pd.DataFrame
+    n_obs: pd.DataFrame
+    valid: pd.DataFrame
+
+
+def _centred(values: np.ndarray):
+    """(values minus each column's mean with 0 where missing, observation mask as float)."""
+    values = np.array(values, dtype=np.float64)
+    observed = ~np.isnan(values)
+    values -= np.nansum(values, axis=0) / np.maximum(observed.sum(axis=0), 1)
+    values[~observed] = 0.0
+    return values, observed.astype(np.float64)
+
+
+def _correlation_from_sums(n, sx, sy, sxx, syy, sxy, min_observations) -> np.ndarray:
+    """
+    Pearson correlation from pair sums; NaN below `min_observations` pairs (and below 2)
+    or where either side is constant over the pairs, as in calculate_pearson_correlation.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        var_x = n * sxx - sx * sx
+        var_y = n * syy - sy * sy
+        correlation = np.clip((n * sxy - sx * sy) / np.sqrt(var_x * var_y), -1.0, 1.0)
+    constant = (var_x <= _CONSTANT_TOLERANCE * n * sxx) | (var_y <= _CONSTANT_TOLERANCE * n * syy)
+    correlation[constant | (n < max(min_observations, 2))] = np.nan
+    return correlation
+
+
+def _cross_block(x, x_mask, y, y_mask, min_observations):
+    """Correlation and pair counts of every x column against every y column."""
+    n = x_mask.T @ y_mask
+    correlation = _correlation_from_sums(n, x.T @ y_mask, x_mask.T @ y, (x * x).T @ y_mask, x_mask.T @ (y * y),
+                                         x.T @ y, min_observations)
+    return correlation, np.rint(n).astype(np.int64)
+
+
+def _paired_columns(x: np.ndarray, y: np.ndarray, min_observations, block_size: int):
+    """Correlation and pair count of x[:, k] with y[:, k] for every column k."""
+    correlation = np.full(x.shape[1], np.nan)
+    n_obs = np.zeros(x.shape[1], dtype=np.int64)
+    for start in range(0, x.shape[1], block_size):
+        cols = slice(start, start + block_size)
+        both = ~np.isnan(x[:, cols]) & ~np.isnan(y[:, cols])
+        n = both.sum(axis=0)
+        with np.errstate(invalid='ignore'):
+            xb = np.where(both, x[:, cols], 0.0)
+            yb = np.where(both, y[:, cols], 0.0)
+            xb = np.where(both, xb - xb.sum(axis=0) / n, 0.0)  # Centred on the pair means
+            yb = np.where(both, yb - yb.sum(axis=0) / n, 0.0)
+        correlation[cols] = _correlation_from_sums(n, xb.sum(axis=0), yb.sum(axis=0), (xb * xb).sum(axis=0),
+                                                   (yb * yb).sum(axis=0), (xb * yb).sum(axis=0), min_observations)
+        n_obs[cols] = n
+    return correlation, n_obs
+
+
+def _matrix(correlation, n_obs, index, columns, min_observations) -> CorrelationMatrix:
+    def frame(values):
+        return pd.DataFrame(values, index=index, columns=columns)
+
+    return CorrelationMatrix(frame(correlation), frame(n_obs), frame(n_obs >= min_observations))
+
+
+@instrumented
+def pairwise_correlation(x: pd.DataFrame, y: pd.DataFrame = None,
+                         min_observations=config.CORRELATION_MIN_OBSERVATIONS,
+                         block_size: int = config.CORRELATION_MATRIX_BLOCK_SIZE) -> CorrelationMatrix:
+    """
+    Pearson correlation of every column of x with every column of y (default: x with
+    itself, like x.corr(min_periods=min_observations)), each pair over the rows where
+    both are present. x and y are aligned on their index first. With y=None only the
+    blocks on and above the diagonal are computed and mirrored.
+    """
+    symmetric = y is None
+    if not symmetric:
+        x, y = x.align(y, join='outer', axis=0)
+    x_values, x_mask = _centred(x.to_numpy(dtype=np.float64, na_value=np.nan))
+    y_values, y_mask = (x_values, x_mask) if symmetric else _centred(y.to_numpy(dtype=np.float64, na_value=np.nan))
+    columns = x.columns if symmetric else y.columns
+
+    correlation = np.full((x.shape[1], len(columns)), np.nan)
+    n_obs = np.zeros((x.shape[1], len(columns)), dtype=np.int64)
+    for i in range(0, x.shape[1], block_size):
+        rows = slice(i, i + block_size)
+        for j in range(i if symmetric else 0, len(columns), block_size):
+            cols = slice(j, j + block_size)
+            block, block_n = _cross_block(x_values[:, rows], x_mask[:, rows], y_values[:, cols], y_mask[:, cols],
+                                          min_observations)
+            correlation[rows, cols], n_obs[rows, cols] = block, block_n
+            if symmetric and j != i:
+                correlation[cols, rows], n_obs[cols, rows] = block.T, block_n.T
+    if symmetric:
+        diagonal = np.diagonal(correlation).copy()
+        np.fill_diagonal(correlation, np.where(np.isnan(diagonal), np.nan, 1.0))
+    return _matrix(correlation, n_obs, x.columns, columns, min_observations)
+
+
+def _stacked_panel(stacked_values, block_starts, row_codes, n_dates) -> np.ndarray:
+    """dates x tickers array from _stack_returns' per-ticker blocks; NaN where a ticker has no row."""
+    n_tickers = len(block_starts) - 1
+    panel = np.full((n_dates, n_tickers), np.nan)
+    panel[row_codes, np.repeat(np.arange(n_tickers), np.diff(block_starts))] = stacked_values
+    return panel
+
+
+def sentiment_panel(aggregated_sentiment_df, dates: pd.DatetimeIndex, tickers: list,
+                    sentiment_stock_col=config.AGG_SENTIMENT_STOCK_COLUMN,
+                    sentiment_date_col=config.AGG_SENTIMENT_DATE_COLUMN,
+                    sentiment_score_col=config.AGG_SENTIMENT_AVG_SCORE_COLUMN) -> np.ndarray:
+    """dates x tickers array of aggregated daily sentiment; NaN where a ticker has no news that day."""
+    sentiment = np.full((len(dates), len(tickers)), np.nan)
+    if aggregated_sentiment_df.empty:
+        return sentiment
+    sentiment_dates = pd.to_datetime(aggregated_sentiment_df[sentiment_date_col], errors='coerce')
+    date_codes = dates.get_indexer(pd.DatetimeIndex(sentiment_dates))
+    ticker_codes = pd.Index(tickers, dtype=object).get_indexer(aggregated_sentiment_df[sentiment_stock_col])
+    found = (date_codes >= 0) & (ticker_codes >= 0)
+    scores = pd.to_numeric(aggregated_sentiment_df[sentiment_score_col], errors='coerce').to_numpy(dtype=np.float64)
+    sentiment[date_codes[found], ticker_codes[found]] = scores[found]
+    return sentiment
+
+
+@instrumented
+def returns_panel(stock_data_with_returns_dict: dict, stock_return_col=config.STOCK_DAILY_RETURN_COLUMN,
+                  lag_days: int = 0) -> pd.DataFrame:
+    """
+    {TICKER: df_with_returns} as a dates x tickers frame on the union of their dates.
+    lag_days shifts each ticker's returns over its own rows first, as
+    merge_sentiment_with_returns does (1: the next trading day's return).
+    """
+    tickers, block_starts, stacked_dates, stacked_returns = _stack_returns(stock_data_with_returns_dict, stock_return_col)
+    dates = pd.DatetimeIndex(np.unique(stacked_dates.values), name=config.STOCK_DATE_COLUMN)
+    if lag_days:
+        stacked_returns = _grouped_shift(stacked_returns, block_starts, lag_days)
+    panel = _stacked_panel(stacked_returns, block_starts, dates.searchsorted(stacked_dates.values), len(dates))
+    return pd.DataFrame(panel, index=dates, columns=pd.Index(tickers, name=config.MERGED_STOCK_SYMBOL_COLUMN))
+
+
+@instrumented
+def return_correlation_matrix(stock_data_with_returns_dict: dict, stock_return_col=config.STOCK_DAILY_RETURN_COLUMN,
+                              min_observations=config.CORRELATION_MIN_OBSERVATIONS,
+                              block_size: int = config.CORRELATION_MATRIX_BLOCK_SIZE,
+                              timeframe=None, price_col=config.STOCK_PRICE_COLUMN_FOR_RETURNS) -> CorrelationMatrix:
+    """
+    Tickers x tickers correlation of daily returns, each pair over the dates both traded.
+    A timeframe (e.g. 'weekly') correlates compounded returns of resampled `price_col` bars.
+    """
+    stock_data_with_returns_dict = resample_returns(stock_data_with_returns_dict, timeframe, price_col, stock_return_col)
+    return pairwise_correlation(returns_panel(stock_data_with_returns_dict, stock_return_col),
+                                min_observations=min_observations, block_size=block_size)
+
+
+@instrumented
+def sentiment_return_correlations(
+    aggregated_sentiment_df,
+    stock_data_with_returns_dict: dict,
+    lags=None,
+    sentiment_stock_col=config.AGG_SENTIMENT_STOCK_COLUMN,
+    sentiment_date_col=config.AGG_SENTIMENT_DATE_COLUMN,
+    sentiment_score_col=config.AGG_SENTIMENT_AVG_SCORE_COLUMN,
+    stock_return_col=config.STOCK_DAILY_RETURN_COLUMN,
+    min_observations=config.CORRELATION_MIN_OBSERVATIONS,
+    block_size: int = config.CORRELATION_MATRIX_BLOCK_SIZE,
+    pooled_label: str = None,
+    timeframe=None,
+    price_col=config.STOCK_PRICE_COLUMN_FOR_RETURNS
+) -> CorrelationMatrix:
+    """
+    Tickers x lags correlation of daily sentiment with lagged returns (lags default to
+    config.CORRELATION_LAGS_TO_TEST), the same numbers calculate_pearson_correlation
+    gives per (ticker, lag) on merge_sentiment_with_lagged_returns' output.
+    pooled_label adds a row correlating all tickers' pairs together.
+    With a timeframe (e.g. 'weekly'), daily sentiment and prices are both resampled to
+    those bars (article-weighted sentiment, compounded returns) and lags count bars.
+    """
+    if lags is None:
+        lags = config.CORRELATION_LAGS_TO_TEST
+    if timeframe_key(timeframe) is not None:
+        aggregated_sentiment_df = resample_sentiment(
+            aggregated_sentiment_df, timeframe, price_calendar(stock_data_with_returns_dict),
+            date_col=sentiment_date_col, stock_col=sentiment_stock_col, avg_col=sentiment_score_col)
+        stock_data_with_returns_dict = resample_returns(stock_data_with_returns_dict, timeframe, price_col,
+                                                        stock_return_col)
+    tickers, block_starts, stacked_dates, stacked_returns = _stack_returns(stock_data_with_returns_dict, stock_return_col)
+    dates = pd.DatetimeIndex(np.unique(stacked_dates.values))
+    row_codes = dates.searchsorted(stacked_dates.values)
+
+    sentiment = sentiment_panel(aggregated_sentiment_df, dates, tickers, sentiment_stock_col, sentiment_date_col,
+                                sentiment_score_col)
+
+    index = pd.Index(list(tickers) + ([pooled_label] if pooled_label is not None else []),
+                     name=config.MERGED_STOCK_SYMBOL_COLUMN)
+    correlation = np.full((len(index), len(lags)), np.nan)
+    n_obs = np.zeros((len(index), len(lags)), dtype=np.int64)
+    for k, lag_days in enumerate(lags):
+        returns = _stacked_panel(_grouped_shift(stacked_returns, block_starts, lag_days), block_starts, row_codes,
+                                 len(dates))
+        correlation[:len(tickers), k], n_obs[:len(tickers), k] = _paired_columns(sentiment, returns, min_observations,
+                                                                                 block_size)
+        if pooled_label is not None:
+            pooled_r, pooled_n = _paired_columns(sentiment.reshape(-1, 1), returns.reshape(-1, 1), min_observations, 1)
+            correlation[-1, k], n_obs[-1, k] = pooled_r[0], pooled_n[0]
+    return _matrix(correlation, n_obs, index, pd.Index(list(lags), name=config.MERGED_LAG_COLUMN), min_observations)
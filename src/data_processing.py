@@ -1,26 +1,84 @@
-
 import pandas as pd
 import re
-import nltk
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
-try:
-    stopwords.words('english')
-    word_tokenize("test")
-except LookupError:
-    nltk.download('stopwords', quiet=True)
-    nltk.download('punkt', quiet=True)
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Iterator
+
+from .instrumentation import instrumented, report
+from .memory_mode import categorical_news_columns, working_copy
+
+# NLTK is imported and its resources are located on first use, not at import time,
+# so importing this module never touches the network.
+NLTK_RESOURCES = {
+    # resource name -> data paths, any of which satisfies it (newer NLTK uses punkt_tab)
+    'stopwords': ['corpora/stopwords'],
+    'punkt': ['tokenizers/punkt_tab', 'tokenizers/punkt'],
+}
+AUTO_DOWNLOAD_NLTK = True  # Set False on offline machines to never attempt a download
+
+
+def ensure_nltk_resources(download: bool = False, resources: list = None) -> list:
+    """
+    Checks that the NLTK resources used for text preprocessing are installed.
+    Returns the names still missing; only contacts the network when download=True.
+    """
+    import nltk
+
+    def installed(name):
+        for path in NLTK_RESOURCES[name]:
+            try:
+                nltk.data.find(path)
+                return True
+            except LookupError:
+                pass
+        return False
+
+    missing = []
+    for name in resources or NLTK_RESOURCES:
+        if installed(name):
+            continue
+        if download:
+            for path in NLTK_RESOURCES[name]:
+                nltk.download(path.split('/')[-1], quiet=True)
+        if not installed(name):
+            missing.append(name)
+    return missing
+
+
+@lru_cache(maxsize=None)
+def get_stop_words() -> frozenset:
+    """English NLTK stop words, loaded once per process."""
+    from nltk.corpus import stopwords
+    if AUTO_DOWNLOAD_NLTK:
+        ensure_nltk_resources(download=True, resources=['stopwords'])
+    return frozenset(stopwords.words('english'))
 
+
+def word_tokenize(text: str) -> list:
+    """nltk.word_tokenize, imported (and its Punkt models fetched if allowed) on first use."""
+    global _nltk_word_tokenize
+    if _nltk_word_tokenize is None:
+        from nltk.tokenize import word_tokenize as nltk_word_tokenize
+        if AUTO_DOWNLOAD_NLTK:
+            ensure_nltk_resources(download=True, resources=['punkt'])
+        _nltk_word_tokenize = nltk_word_tokenize
+    return _nltk_word_tokenize(text)
+
+
+_nltk_word_tokenize = None
+
+
+@instrumented
 def load_financial_news_data(file_path: str) -> pd.DataFrame:
-    """Loads the financial news dataset."""
+    """Loads the financial news dataset (stock/publisher as categoricals in compact mode)."""
     try:
-        df = pd.read_csv(file_path)
+        df = pd.read_csv(file_path, dtype=categorical_news_columns() or None)
       
         df['date'] = pd.to_datetime(df['date'], errors='coerce')
         df.dropna(subset=['date'], inplace=True) 
         return df
     except FileNotFoundError:
-        print(f"Error: Dataset file not found at {file_path}.")
+        report(f"Error: Dataset file not found at {file_path}.")
        
         dummy_data = {
             'headline': ["Stock Alpha Soars", "Beta Corp Earnings Miss", "Gamma Inc Price Target Up"],
@@ -36,9 +94,133 @@ def load_financial_news_data(file_path: str) -> pd.DataFrame:
         return df
 
 
-def preprocess_text_data(df: pd.DataFrame, text_col: str = 'headline') -> pd.DataFrame:
-    """Adds processed text columns for EDA and NLP."""
-    df_copy = df.copy()
+NEWS_STREAM_COLUMNS = ['headline', 'publisher', 'date', 'stock']
+NEWS_CATEGORICAL_COLUMNS = ['publisher', 'stock']
+
+
+def iter_financial_news_chunks(file_path: str,
+                               chunksize: int = 250_000,
+                               usecols: list = None,
+                               categorical_cols: list = None) -> Iterator[pd.DataFrame]:
+    """
+    Streams the financial news dataset as typed chunks of at most `chunksize` rows.
+    Only `usecols` are parsed (columns absent from the file are ignored), `categorical_cols`
+    are read as categoricals and dates are parsed to UTC (naive ones taken as UTC) and
+    dropped per chunk, so the full file is never held in memory.
+    """
+    if usecols is None:
+        usecols = NEWS_STREAM_COLUMNS
+    if categorical_cols is None:
+        categorical_cols = NEWS_CATEGORICAL_COLUMNS
+    wanted = set(usecols)
+
+    try:
+        reader = pd.read_csv(file_path,
+                             usecols=lambda col: col in wanted,
+                             dtype={col: 'category' for col in categorical_cols},
+                             chunksize=chunksize)
+    except FileNotFoundError:
+        yield load_financial_news_data(file_path)
+        return
+
+    with reader:
+        for chunk in reader:
+            if 'date' in chunk.columns:
+                # UTC with a fixed format, so every chunk gets the same dtype whatever offsets it holds
+                chunk['date'] = pd.to_datetime(chunk['date'], errors='coerce', utc=True, format='ISO8601')
+                chunk.dropna(subset=['date'], inplace=True)
+            if not chunk.empty:
+                yield chunk
+
+
+_NON_WORD_PATTERN = re.compile(r'\W+')
+# Once text is reduced to word characters and spaces, word_tokenize only splits on
+# whitespace plus these Treebank contractions (all other Treebank rules need punctuation).
+_TREEBANK_SPLITS = {
+    'cannot': ('can', 'not'),
+    'gimme': ('gim', 'me'),
+    'gonna': ('gon', 'na'),
+    'gotta': ('got', 'ta'),
+    'lemme': ('lem', 'me'),
+    'wanna': ('wan', 'na'),
+}
+_worker_stop_words = None
+
+
+def _clean_text_nltk(text, stop_words_set):
+    """Reference normalization: lower-case, strip non-word chars, NLTK tokenize, drop stop words."""
+    if not isinstance(text, str): return ""
+    text = text.lower()
+    text = re.sub(r'\W+', ' ', text)
+    tokens = word_tokenize(text)
+    tokens = [word for word in tokens if len(word) > 2 and word not in stop_words_set]
+    return " ".join(tokens)
+
+
+def _clean_texts_fast(texts, stop_words_set=None) -> list:
+    """Same output as _clean_text_nltk for each text, without calling the NLTK tokenizer."""
+    if stop_words_set is None:
+        stop_words_set = _worker_stop_words
+    kept_parts = {}  # token -> tokens kept after contraction split and stop-word filter
+    cleaned = []
+    for text in texts:
+        if not isinstance(text, str):
+            cleaned.append("")
+            continue
+        tokens = []
+        for token in _NON_WORD_PATTERN.sub(' ', text.lower()).split():
+            parts = kept_parts.get(token)
+            if parts is None:
+                parts = tuple(part for part in _TREEBANK_SPLITS.get(token, (token,))
+                              if len(part) > 2 and part not in stop_words_set)
+                kept_parts[token] = parts
+            tokens.extend(parts)
+        cleaned.append(" ".join(tokens))
+    return cleaned
+
+
+def _init_normalization_worker(stop_words_set):
+    global _worker_stop_words
+    _worker_stop_words = stop_words_set
+
+
+@instrumented
+def normalize_headlines(texts: pd.Series, stop_words_set: set = None,
+                        n_workers: int = 1, chunk_size: int = 50_000) -> pd.Series:
+    """
+    Fast equivalent of the processed_<text_col> normalization. Each distinct text is
+    normalized once and mapped back to all rows; n_workers > 1 spreads chunks of
+    distinct texts over a process pool.
+    """
+    if stop_words_set is None:
+        stop_words_set = get_stop_words()
+    codes, uniques = pd.factorize(texts, use_na_sentinel=True)
+    uniques = list(uniques)
+
+    serial = (n_workers is not None and n_workers <= 1) or len(uniques) <= chunk_size
+    if serial:
+        cleaned_uniques = _clean_texts_fast(uniques, stop_words_set)
+    else:
+        chunks = [uniques[start:start + chunk_size] for start in range(0, len(uniques), chunk_size)]
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_normalization_worker,
+                                 initargs=(stop_words_set,)) as executor:
+            cleaned_uniques = [text for chunk in executor.map(_clean_texts_fast, chunks) for text in chunk]
+
+    cleaned = pd.Series(cleaned_uniques + [""], dtype=object).to_numpy()[codes]  # code -1 -> ""
+    return pd.Series(cleaned, index=texts.index, name=texts.name)
+
+
+@instrumented
+def preprocess_text_data(df: pd.DataFrame, text_col: str = 'headline',
+                         method: str = 'fast', n_workers: int = 1) -> pd.DataFrame:
+    """
+    Adds processed text columns for EDA and NLP.
+    method='fast' (default) gives the same processed text as method='nltk' without
+    per-row NLTK tokenization; n_workers > 1 parallelizes it over processes.
+    """
+    if method not in ('fast', 'nltk'):
+        raise ValueError(f"Unknown text preprocessing method '{method}'; expected 'fast' or 'nltk'.")
+    df_copy = working_copy(df)
     if text_col not in df_copy.columns:
         
         return df_copy
@@ -46,24 +228,21 @@ def preprocess_text_data(df: pd.DataFrame, text_col: str = 'headline') -> pd.Dat
     df_copy['headline_length'] = df_copy[text_col].astype(str).str.len()
     
  
-    stop_words_set = set(stopwords.words('english'))
-    
-    def clean_text(text):
-        if not isinstance(text, str): return ""
-        text = text.lower()
-        text = re.sub(r'\W+', ' ', text)
-        tokens = word_tokenize(text)
-        tokens = [word for word in tokens if len(word) > 2 and word not in stop_words_set]
-        return " ".join(tokens)
-
-    df_copy[f'processed_{text_col}'] = df_copy[text_col].apply(clean_text)
+    stop_words_set = get_stop_words()
+
+    if method == 'nltk':
+        df_copy[f'processed_{text_col}'] = df_copy[text_col].apply(_clean_text_nltk, args=(stop_words_set,))
+    else:
+        df_copy[f'processed_{text_col}'] = normalize_headlines(df_copy[text_col], stop_words_set,
+                                                              n_workers=n_workers)
     return df_copy
 
+@instrumented
 def extract_date_features(df: pd.DataFrame, date_col: str = 'date') -> pd.DataFrame:
     """Extracts date-based features for time series analysis."""
-    df_copy = df.copy()
+    df_copy = working_copy(df)
     if date_col not in df_copy.columns or df_copy[date_col].isnull().all():
-        print(f"Warning: Date column '{date_col}' not found or is all NaT.")
+        report(f"Warning: Date column '{date_col}' not found or is all NaT.")
         return df_copy
     
     df_copy['publication_date_only'] = df_copy[date_col].dt.date
@@ -1,12 +1,20 @@
 
 import pandas as pd
-from collections import Counter
-from sklearn.feature_extraction.text import CountVectorizer
-import matplotlib.pyplot as plt
-import seaborn as sns
+
+from .ngram_counter import NGramCounter
+from .publication_cube import WEEKDAY_NAMES
+
+
+def _plotting():
+    """Imports matplotlib/seaborn on first use so non-plotting callers never pay for them."""
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    return plt, sns
+
 
 def get_descriptive_stats_text(df: pd.DataFrame, text_col_length: str = 'headline_length'):
     """Prints descriptive statistics for text lengths."""
+    plt, sns = _plotting()
     if text_col_length in df.columns:
         print(f"\n--- Descriptive Statistics for {text_col_length} ---")
         print(df[text_col_length].describe())
@@ -20,14 +28,25 @@ def get_descriptive_stats_text(df: pd.DataFrame, text_col_length: str = 'headlin
         print(f"Column '{text_col_length}' not found for descriptive stats.")
 
 
-def analyze_publishers(df: pd.DataFrame, publisher_col: str = 'publisher', top_n: int = 15):
-    """Analyzes and plots publisher activity."""
-    if publisher_col in df.columns:
+def publisher_counts(df: pd.DataFrame = None, publisher_col: str = 'publisher', top_n: int = 15,
+                     cube=None) -> pd.Series:
+    """Article counts of the `top_n` most active publishers, from `df` or a PublicationCube."""
+    if cube is not None:
+        return cube.counts('publisher').nlargest(top_n)
+    if df is None or publisher_col not in df.columns:
+        return None
+    return df[publisher_col].value_counts().nlargest(top_n)
+
+
+def analyze_publishers(df: pd.DataFrame, publisher_col: str = 'publisher', top_n: int = 15, cube=None):
+    """Analyzes and plots publisher activity. Pass a PublicationCube as `cube` to skip the frame scan."""
+    publisher_activity = publisher_counts(df, publisher_col, top_n, cube)
+    if publisher_activity is not None:
+        plt, sns = _plotting()
         print(f"\n--- Publisher Analysis (Top {top_n}) ---")
-        publisher_counts = df[publisher_col].value_counts().nlargest(top_n)
-        print(publisher_counts)
+        print(publisher_activity)
         plt.figure(figsize=(12, 6))
-        sns.barplot(x=publisher_counts.index, y=publisher_counts.values)
+        sns.barplot(x=publisher_activity.index, y=publisher_activity.values)
         plt.title(f'Top {top_n} Most Active Publishers')
         plt.xlabel('Publisher')
         plt.ylabel('Number of Articles')
@@ -38,12 +57,39 @@ def analyze_publishers(df: pd.DataFrame, publisher_col: str = 'publisher', top_n
         print(f"Column '{publisher_col}' not found for publisher analysis.")
 
 
+def publication_trend_counts(df: pd.DataFrame = None, date_only_col: str = 'publication_date_only',
+                             day_of_week_col: str = 'publication_day_of_week',
+                             hour_col: str = 'publication_hour', cube=None) -> dict:
+    """
+    Articles per day, per weekday (Monday..Sunday, zero-filled) and per hour, from the
+    extract_date_features columns of `df` or from a PublicationCube.
+    Returns {'per_day', 'by_day_of_week', 'by_hour'} with the series that could be computed.
+    """
+    if df is None and cube is None:
+        raise ValueError("publication_trend_counts needs a DataFrame or a PublicationCube.")
+    trends = {}
+    if cube is not None:
+        trends['per_day'] = cube.counts('date')
+        trends['by_day_of_week'] = cube.counts('weekday').reindex(WEEKDAY_NAMES).fillna(0)
+        trends['by_hour'] = cube.counts('hour')
+        return trends
+    if date_only_col in df.columns:
+        trends['per_day'] = df.groupby(date_only_col).size()
+    if day_of_week_col in df.columns:
+        trends['by_day_of_week'] = df[day_of_week_col].value_counts().reindex(WEEKDAY_NAMES).fillna(0)
+    if hour_col in df.columns:
+        trends['by_hour'] = df[hour_col].value_counts().sort_index()
+    return trends
+
+
 def analyze_publication_trends(df: pd.DataFrame, date_only_col: str = 'publication_date_only', 
                                day_of_week_col: str = 'publication_day_of_week', 
-                               hour_col: str = 'publication_hour'):
-    """Analyzes and plots publication trends over time."""
-    if date_only_col in df.columns:
-        articles_per_day = df.groupby(date_only_col).size()
+                               hour_col: str = 'publication_hour', cube=None):
+    """Analyzes and plots publication trends over time. Pass a PublicationCube as `cube` to skip the frame scans."""
+    trends = publication_trend_counts(df, date_only_col, day_of_week_col, hour_col, cube)
+    plt, sns = _plotting()
+    if 'per_day' in trends:
+        articles_per_day = trends['per_day']
         plt.figure(figsize=(14, 6))
         articles_per_day.plot(kind='line', marker='.')
         plt.title('Number of Articles Published Over Time')
@@ -52,9 +98,8 @@ def analyze_publication_trends(df: pd.DataFrame, date_only_col: str = 'publicati
         plt.grid(True)
         plt.show()
 
-    if day_of_week_col in df.columns:
-        day_order = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-        articles_by_dow = df[day_of_week_col].value_counts().reindex(day_order).fillna(0)
+    if 'by_day_of_week' in trends:
+        articles_by_dow = trends['by_day_of_week']
         plt.figure(figsize=(10, 5))
         sns.barplot(x=articles_by_dow.index, y=articles_by_dow.values)
         plt.title('Number of Articles by Day of the Week')
@@ -62,8 +107,8 @@ def analyze_publication_trends(df: pd.DataFrame, date_only_col: str = 'publicati
         plt.ylabel('Number of Articles')
         plt.show()
 
-    if hour_col in df.columns:
-        articles_by_hour = df[hour_col].value_counts().sort_index()
+    if 'by_hour' in trends:
+        articles_by_hour = trends['by_hour']
         plt.figure(figsize=(12, 5))
         sns.barplot(x=articles_by_hour.index, y=articles_by_hour.values, color='skyblue')
         plt.title('Number of Articles by Hour of Day (Publisher Timezone)')
@@ -73,16 +118,26 @@ def analyze_publication_trends(df: pd.DataFrame, date_only_col: str = 'publicati
         plt.show()
 
 
-def extract_common_keywords(df: pd.DataFrame, processed_text_col: str = 'processed_headline', top_n: int = 20):
-    """Extracts and plots common keywords (n-grams)."""
+def extract_common_keywords(df: pd.DataFrame, processed_text_col: str = 'processed_headline', top_n: int = 20,
+                            chunk_size: int = 100_000):
+    """
+    Extracts and plots common keywords (n-grams).
+    Counts are streamed over `chunk_size` rows at a time (see ngram_counter), so the
+    corpus is never joined into one string or vectorized as a whole.
+    """
+    plt, sns = _plotting()
     if processed_text_col not in df.columns or df[processed_text_col].isnull().all():
         print(f"Processed text column '{processed_text_col}' not found or empty.")
         return
 
+    unigrams, bigrams = NGramCounter(n=1, top_k=top_n), NGramCounter(n=2, top_k=top_n)
+    texts = df[processed_text_col].dropna().to_numpy(dtype=object)
+    for start in range(0, len(texts), chunk_size):
+        unigrams.update_texts(texts[start:start + chunk_size])
+        bigrams.update_texts(texts[start:start + chunk_size])
+
     # Unigrams
-    all_words = " ".join(df[processed_text_col].dropna()).split()
-    common_words = Counter(all_words).most_common(top_n)
-    df_common_words = pd.DataFrame(common_words, columns=['word', 'count'])
+    df_common_words = pd.DataFrame(unigrams.most_common(top_n), columns=['word', 'count'])
     
     plt.figure(figsize=(12, 6))
     sns.barplot(data=df_common_words, x='count', y='word', palette='viridis')
@@ -90,19 +145,14 @@ def extract_common_keywords(df: pd.DataFrame, processed_text_col: str = 'process
     plt.xlabel('Frequency')
     plt.ylabel('Word')
     plt.show()
-    try:
-        vectorizer = CountVectorizer(ngram_range=(2, 2), max_features=top_n)
-        bigram_matrix = vectorizer.fit_transform(df[processed_text_col].dropna())
-        bigram_counts = bigram_matrix.sum(axis=0)
-        bigrams_freq = [(word, bigram_counts[0, idx]) for word, idx in vectorizer.vocabulary_.items()]
-        bigrams_freq = sorted(bigrams_freq, key = lambda x: x[1], reverse=True)
-        df_bigrams = pd.DataFrame(bigrams_freq, columns=['bigram', 'count'])
 
-        plt.figure(figsize=(12, 6))
-        sns.barplot(data=df_bigrams, x='count', y='bigram', palette='mako')
-        plt.title(f'Top {top_n} Most Common Bigrams')
-        plt.xlabel('Frequency')
-        plt.ylabel('Bigram')
-        plt.show()
-    except ValueError as e:
-        print(f"Could not generate bigrams: {e}")
\ No newline at end of file
+    df_bigrams = pd.DataFrame(bigrams.most_common(top_n), columns=['bigram', 'count'])
+    if df_bigrams.empty:
+        print("Could not generate bigrams: no text has two or more tokens.")
+        return
+    plt.figure(figsize=(12, 6))
+    sns.barplot(data=df_bigrams, x='count', y='bigram', palette='mako')
+    plt.title(f'Top {top_n} Most Common Bigrams')
+    plt.xlabel('Frequency')
+    plt.ylabel('Bigram')
+    plt.show()
@@ -1,16 +1,123 @@
 
 import pandas as pd
+import numpy as np
 import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from typing import NamedTuple
 
-def calculate_daily_returns(stock_df: pd.DataFrame, column: str = 'Close') -> pd.DataFrame:
-    """Calculates daily percentage returns."""
+from .instrumentation import current_stage, instrumented, report, stage
+from .memory_mode import working_copy
+
+
+def _resampled(stock_df: pd.DataFrame, timeframe, price_col: str) -> pd.DataFrame:
+    """stock_df as `timeframe` bars; resampling builds on this module's price panels, so it is imported late."""
+    from .resampling import resample_ohlcv
+    return resample_ohlcv(stock_df, timeframe, price_col)
+
+
+@instrumented
+def calculate_daily_returns(stock_df: pd.DataFrame, column: str = 'Close', timeframe=None) -> pd.DataFrame:
+    """
+    Calculates daily percentage returns; with a timeframe (e.g. 'weekly', see
+    resampling.TIMEFRAMES) the frame is first resampled and the returns are per bar.
+    """
     if stock_df is None or stock_df.empty or column not in stock_df.columns:
      
         return stock_df if stock_df is not None else pd.DataFrame()
-    df = stock_df.copy()
+    if timeframe is not None:
+        stock_df = _resampled(stock_df, timeframe, column)
+    df = working_copy(stock_df)
     df['daily_return'] = df[column].pct_change()
     return df
 
+OHLCV_COLUMNS = ('Open', 'High', 'Low', 'Close', 'Volume')
+
+
+class PricePanel(NamedTuple):
+    """Date-aligned prices: values[field, date, ticker], NaN where a ticker has no bar."""
+    values: np.ndarray
+    dates: pd.DatetimeIndex
+    tickers: list
+    fields: list
+
+
+@lru_cache(maxsize=256)
+def _resolve_ohlcv_columns(header: tuple, required_ohlcv_cols: tuple):
+    """
+    Maps each required column to the CSV column that provides it (exact name,
+    case-insensitive name, or an adjusted close for 'Close'). Cached per header layout.
+    Returns None when an essential OHLCV column cannot be found.
+    """
+    columns = pd.Index(header)
+    lowered = columns.str.lower()
+    actual_ohlcv_cols_present = {}
+
+    for req_col in required_ohlcv_cols:
+        if req_col in columns:
+            actual_ohlcv_cols_present[req_col] = req_col
+        elif req_col.lower() in lowered.values: # Case-insensitive check
+            actual_ohlcv_cols_present[req_col] = columns[lowered == req_col.lower()][0]
+        elif req_col == 'Close' and 'Adj Close' in columns:
+            actual_ohlcv_cols_present['Close'] = 'Adj Close'
+        elif req_col == 'Close' and lowered.isin(['adj close', 'adjusted close']).any():
+            actual_ohlcv_cols_present['Close'] = columns[lowered.isin(['adj close', 'adjusted close'])][0]
+        elif req_col in OHLCV_COLUMNS:
+            return None
+    return actual_ohlcv_cols_present
+
+
+def _load_ticker_csv(file_path: str, date_col: str, required_ohlcv_cols: tuple):
+    """Reads one ticker's CSV, parsing only the date and mapped OHLCV columns."""
+    header = tuple(pd.read_csv(file_path, nrows=0).columns)
+    if date_col not in header:
+        return None
+    column_map = _resolve_ohlcv_columns(header, required_ohlcv_cols)
+    if column_map is None:
+        return None
+
+    numeric_cols = [col for col in OHLCV_COLUMNS if col in column_map]
+    source_cols = list(dict.fromkeys([date_col] + list(column_map.values())))
+    numeric_dtypes = {column_map[col]: 'float64' for col in numeric_cols}
+    try:
+        df = pd.read_csv(file_path, usecols=source_cols, dtype=numeric_dtypes)
+    except ValueError: # Non-numeric tokens in a price column: parse leniently
+        df = pd.read_csv(file_path, usecols=source_cols)
+        for source_col in numeric_dtypes:
+            df[source_col] = pd.to_numeric(df[source_col], errors='coerce').astype('float64')
+
+    df[date_col] = pd.to_datetime(df[date_col], errors='coerce')
+    df.dropna(subset=[date_col], inplace=True)
+    if df.empty:
+        return None
+
+    processed_df = pd.DataFrame({req_col: df[source_col].to_numpy() for req_col, source_col in column_map.items()},
+                                index=pd.DatetimeIndex(df[date_col], name=date_col))
+    processed_df.sort_index(inplace=True, kind='stable')
+    processed_df.dropna(subset=numeric_cols, inplace=True)
+    return processed_df if not processed_df.empty else None
+
+
+def _load_ticker_task(args):
+    ticker_input, file_path, date_col, required_ohlcv_cols = args
+    try:
+        return _load_ticker_csv(file_path, date_col, required_ohlcv_cols)
+    except Exception as e:
+        report(f"Error loading or processing {os.path.basename(file_path)} for ticker {ticker_input}: {e}")
+        return None
+
+
+def _ticker_file_tasks(tickers, csv_directory, filename_template, date_col, required_ohlcv_cols):
+    tasks = []
+    for ticker_input in tickers:
+        ticker_case_for_file = str(ticker_input).upper()
+        file_path = os.path.join(csv_directory, filename_template.format(ticker_case_for_file))
+        if os.path.exists(file_path):
+            tasks.append((ticker_case_for_file, (ticker_input, file_path, date_col, tuple(required_ohlcv_cols))))
+    return tasks
+
+
+@instrumented
 def load_stock_prices_from_csvs(tickers: list,
                                 csv_directory: str,
                                 filename_template: str = "{}_historical_data.csv",
@@ -19,95 +126,104 @@ def load_stock_prices_from_csvs(tickers: list,
     """
     Loads OHLCV data for given tickers from local CSV files.
     Tickers in the input list are uppercased to match common filename conventions.
+    OHLCV columns are parsed as float64.
     """
-    stock_data_dict = {}
     if required_ohlcv_cols is None:
-        required_ohlcv_cols = ['Open', 'High', 'Low', 'Close', 'Volume']
+        required_ohlcv_cols = list(OHLCV_COLUMNS)
 
-    for ticker_input in tickers:
-        ticker_case_for_file = str(ticker_input).upper() 
+    stock_data_dict = {}
+    for ticker, task in _ticker_file_tasks(tickers, csv_directory, filename_template, date_col, required_ohlcv_cols):
+        with stage('load_ticker_csv', ticker=ticker) as ticker_stage:
+            processed_df = _load_ticker_task(task)
+            ticker_stage.record(rows_out=0 if processed_df is None else len(processed_df))
+        if processed_df is not None:
+            stock_data_dict[ticker] = processed_df
 
-        file_name = filename_template.format(ticker_case_for_file)
-        file_path = os.path.join(csv_directory, file_name)
+    if not stock_data_dict:
+        report("No stock data successfully loaded from any CSV files.")
+    return stock_data_dict
 
-        if os.path.exists(file_path):
-            try:
-                df = pd.read_csv(file_path)
-                
-                if date_col not in df.columns:
-                    continue
-                
-                df[date_col] = pd.to_datetime(df[date_col], errors='coerce')
-                df.dropna(subset=[date_col], inplace=True)
-                if df.empty:
-                    continue
-                df.set_index(date_col, inplace=True)
-                df.sort_index(inplace=True)
-
-                actual_ohlcv_cols_present = {}
-                missing_essential_cols = False
-
-                for req_col in required_ohlcv_cols:
-                    if req_col in df.columns:
-                        actual_ohlcv_cols_present[req_col] = req_col
-                    elif req_col.lower() in df.columns.str.lower().values: # Case-insensitive check
-                        actual_col_name = df.columns[df.columns.str.lower() == req_col.lower()][0]
-                        actual_ohlcv_cols_present[req_col] = actual_col_name
-                    elif req_col == 'Close' and 'Adj Close' in df.columns:
-                        actual_ohlcv_cols_present['Close'] = 'Adj Close'
-                    elif req_col == 'Close' and df.columns.str.lower().isin(['adj close', 'adjusted close']).any():
-                        adj_close_col = df.columns[df.columns.str.lower().isin(['adj close', 'adjusted close'])][0]
-                        actual_ohlcv_cols_present['Close'] = adj_close_col
-                    elif req_col in ['Open', 'High', 'Low', 'Close', 'Volume']:
-                        missing_essential_cols = True
-                        break
-                
-                if missing_essential_cols:
-                    continue
-
-                processed_df_data = {}
-                for req_col in required_ohlcv_cols:
-                    if req_col in actual_ohlcv_cols_present:
-                         processed_df_data[req_col] = df[actual_ohlcv_cols_present[req_col]]
-                
-                    elif req_col not in ['Open', 'High', 'Low', 'Close', 'Volume']:
-                
-                        pass
-
-                processed_df = pd.DataFrame(processed_df_data, index=df.index)
-        
-                rename_map = {}
-                for req_col in required_ohlcv_cols:
-                    if req_col in actual_ohlcv_cols_present and actual_ohlcv_cols_present[req_col] != req_col:
-                        rename_map[actual_ohlcv_cols_present[req_col]] = req_col
-               
-                cols_to_numerify = [col for col in ['Open', 'High', 'Low', 'Close', 'Volume'] if col in processed_df.columns]
-                for col in cols_to_numerify:
-                    processed_df[col] = pd.to_numeric(processed_df[col], errors='coerce')
-                
-                processed_df.dropna(subset=cols_to_numerify, inplace=True)
-
-                if processed_df.empty:
-                   
-                    continue
-                    
-                stock_data_dict[ticker_case_for_file] = processed_df
-            except Exception as e:
-                print(f"Error loading or processing {file_name} for ticker {ticker_input}: {e}")
-        else:
-          
-            pass
 
+@instrumented
+def load_stock_prices_concurrently(tickers: list,
+                                   csv_directory: str,
+                                   filename_template: str = "{}_historical_data.csv",
+                                   date_col: str = 'Date',
+                                   required_ohlcv_cols: list = None,
+                                   max_workers: int = None,
+                                   use_processes: bool = False,
+                                   output: str = 'dict'):
+    """
+    Same loading rules as load_stock_prices_from_csvs, with files read in parallel on a
+    thread pool (or a process pool when use_processes=True).
+    output: 'dict' -> {TICKER: df} (as load_stock_prices_from_csvs)
+            'long' -> one frame indexed by (ticker, date)
+            'wide' -> one date-aligned frame with (field, ticker) columns
+            'panel' -> PricePanel with a (fields, dates, tickers) float array
+    For 'wide' and 'panel', a ticker's repeated dates keep the last bar.
+    """
+    if output not in ('dict', 'long', 'wide', 'panel'):
+        raise ValueError(f"Unknown output '{output}'; expected 'dict', 'long', 'wide' or 'panel'.")
+    if required_ohlcv_cols is None:
+        required_ohlcv_cols = list(OHLCV_COLUMNS)
+
+    tasks = _ticker_file_tasks(tickers, csv_directory, filename_template, date_col, required_ohlcv_cols)
+    executor_cls = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    with executor_cls(max_workers=max_workers) as executor:
+        frames = list(executor.map(_load_ticker_task, [task for _, task in tasks]))
+
+    stock_data_dict = {ticker: df for (ticker, _), df in zip(tasks, frames) if df is not None}
+    current_stage().record(ticker_rows={ticker: len(df) for ticker, df in stock_data_dict.items()})
     if not stock_data_dict:
-        print("No stock data successfully loaded from any CSV files.")
-    return stock_data_dict
+        report("No stock data successfully loaded from any CSV files.")
+
+    if output == 'dict':
+        return stock_data_dict
+    if output == 'long':
+        if not stock_data_dict:
+            return pd.DataFrame()
+        return pd.concat(stock_data_dict, names=['ticker', date_col])
+    panel = build_price_panel(stock_data_dict, fields=list(required_ohlcv_cols))
+    return panel if output == 'panel' else price_panel_to_wide(panel, date_col=date_col)
+
+
+@instrumented
+def build_price_panel(stock_data_dict: dict, fields: list = None) -> PricePanel:
+    """Aligns {TICKER: df} frames on the union of their dates into a PricePanel."""
+    if fields is None:
+        fields = list(OHLCV_COLUMNS)
+    tickers = list(stock_data_dict)
+    if not tickers:
+        return PricePanel(np.empty((len(fields), 0, 0)), pd.DatetimeIndex([]), [], list(fields))
+
+    dates = pd.DatetimeIndex(np.unique(np.concatenate([df.index.values for df in stock_data_dict.values()])))
+    values = np.full((len(fields), len(dates), len(tickers)), np.nan)
+    for j, ticker in enumerate(tickers):
+        df = stock_data_dict[ticker]
+        rows = dates.searchsorted(df.index.values)
+        for i, field in enumerate(fields):
+            if field in df.columns:
+                values[i, rows, j] = pd.to_numeric(df[field], errors='coerce').to_numpy(dtype=np.float64)
+    return PricePanel(values, dates, tickers, list(fields))
+
+
+def price_panel_to_wide(panel: PricePanel, date_col: str = 'Date') -> pd.DataFrame:
+    """Wide frame view of a PricePanel: index = dates, columns = (field, ticker)."""
+    n_fields, n_dates, n_tickers = panel.values.shape
+    columns = pd.MultiIndex.from_product([panel.fields, panel.tickers], names=['field', 'ticker'])
+    data = panel.values.transpose(1, 0, 2).reshape(n_dates, n_fields * n_tickers)
+    return pd.DataFrame(data, index=panel.dates.rename(date_col), columns=columns)
 
-def calculate_technical_indicators(stock_df: pd.DataFrame, price_col: str = 'Close') -> pd.DataFrame:
+@instrumented
+def calculate_technical_indicators(stock_df: pd.DataFrame, price_col: str = 'Close', timeframe=None) -> pd.DataFrame:
     """
     Calculates SMA, RSI, MACD for a stock DataFrame using pandas.
     Ensures columns are created even if results are all NaN.
+    With a timeframe (e.g. 'weekly') the periods count resampled bars instead of days.
     """
-    df = stock_df.copy()
+    if timeframe is not None and stock_df is not None and not stock_df.empty:
+        stock_df = _resampled(stock_df, timeframe, price_col)
+    df = working_copy(stock_df)
 
    
     ta_columns = ['SMA_20', 'SMA_50', 'RSI_14', 'MACD', 'MACD_signal', 'MACD_hist']
@@ -116,13 +232,13 @@ def calculate_technical_indicators(stock_df: pd.DataFrame, price_col: str = 'Clo
             df[col] = pd.NA 
 
     if price_col not in df.columns or df[price_col].isnull().all():
-        print(f"Price column '{price_col}' (for TA) not found or is all NaN. Skipping TA calculation, columns will remain NA.")
+        report(f"Price column '{price_col}' (for TA) not found or is all NaN. Skipping TA calculation, columns will remain NA.")
         return df
 
   
     prices = pd.to_numeric(df[price_col], errors='coerce')
     if prices.isnull().all():
-        print(f"Price column '{price_col}' became all NaN after numeric conversion. Skipping TA, columns will remain NA.")
+        report(f"Price column '{price_col}' became all NaN after numeric conversion. Skipping TA, columns will remain NA.")
         return df
     sma_20_period = 20
     sma_50_period = 50
@@ -0,0 +1,199 @@
+import json
+import math
+
+import numpy as np
+import pandas as pd
+
+STATE_FORMAT_VERSION = 1
+TA_COLUMNS = ['SMA_20', 'SMA_50', 'RSI_14', 'MACD', 'MACD_signal', 'MACD_hist']
+
+
+def _to_json_float(value):
+    return None if value is None or math.isnan(value) else float(value)
+
+
+def _from_json_float(value):
+    return math.nan if value is None else float(value)
+
+
+class _EwmState:
+    """
+    One step of pandas ewm(alpha=alpha, adjust=False, min_periods=min_periods).mean():
+    the running average, pandas' decaying weight for gaps, and the observation count.
+    """
+
+    def __init__(self, alpha: float, min_periods: int, weighted=math.nan, old_wt=1.0, nobs=0):
+        self.alpha = alpha
+        self.min_periods = max(min_periods, 1)
+        self.weighted = weighted
+        self.old_wt = old_wt
+        self.nobs = nobs
+
+    def update(self, value: float) -> float:
+        is_observation = not math.isnan(value)
+        if not math.isnan(self.weighted):
+            self.old_wt *= 1.0 - self.alpha
+            if is_observation:
+                if self.weighted != value:
+                    self.weighted = (self.old_wt * self.weighted + self.alpha * value) / (self.old_wt + self.alpha)
+                self.old_wt = 1.0
+        elif is_observation:
+            self.weighted = value
+        self.nobs += is_observation
+        return self.weighted if self.nobs >= self.min_periods else math.nan
+
+    def to_dict(self) -> dict:
+        return {'weighted': _to_json_float(self.weighted), 'old_wt': self.old_wt, 'nobs': self.nobs}
+
+    @classmethod
+    def from_dict(cls, alpha: float, min_periods: int, state: dict) -> '_EwmState':
+        return cls(alpha, min_periods, _from_json_float(state['weighted']), state['old_wt'], state['nobs'])
+
+
+class _RollingMeanState:
+    """Ring buffer of the last `window` prices; the mean needs a full window without NaN."""
+
+    def __init__(self, window: int, buffer=None, position: int = 0, filled: int = 0):
+        self.window = window
+        self.buffer = np.full(window, np.nan) if buffer is None else np.asarray(buffer, dtype=np.float64)
+        self.position = position
+        self.filled = filled
+
+    def update(self, value: float) -> float:
+        self.buffer[self.position] = value
+        self.position = (self.position + 1) % self.window
+        self.filled = min(self.filled + 1, self.window)
+        if self.filled < self.window:
+            return math.nan
+        return float(self.buffer.mean())  # NaN if any bar in the window is missing
+
+    def to_dict(self) -> dict:
+        return {'buffer': [_to_json_float(v) for v in self.buffer], 'position': self.position, 'filled': self.filled}
+
+    @classmethod
+    def from_dict(cls, window: int, state: dict) -> '_RollingMeanState':
+        return cls(window, [_from_json_float(v) for v in state['buffer']], state['position'], state['filled'])
+
+
+class IncrementalIndicatorState:
+    """
+    Streaming version of calculate_technical_indicators for one ticker.
+    Seed it once from history, then feed new bars: SMA_20/SMA_50 come from ring buffers
+    and RSI_14/MACD from carried EWM state, so each bar costs O(1) whatever the history
+    length. The values for a new bar equal the last row of a full recompute over the
+    bars seen so far (a full recompute later back-fills RSI_14 on the 14th bar once a
+    15th valid price exists; the streamed value for that one bar stays NaN).
+    """
+
+    RSI_PERIOD = 14
+    MACD_PERIODS = (12, 26, 9)  # fast, slow, signal
+
+    def __init__(self, price_col: str = 'Close'):
+        fast, slow, signal = self.MACD_PERIODS
+        self.price_col = price_col
+        self.last_date = None
+        self.last_price = math.nan
+        self.n_valid = 0
+        self.sma = {20: _RollingMeanState(20), 50: _RollingMeanState(50)}
+        self.avg_gain = _EwmState(1.0 / self.RSI_PERIOD, self.RSI_PERIOD)  # com = period - 1
+        self.avg_loss = _EwmState(1.0 / self.RSI_PERIOD, self.RSI_PERIOD)
+        self.ema_fast = _EwmState(2.0 / (fast + 1), fast)
+        self.ema_slow = _EwmState(2.0 / (slow + 1), slow)
+        self.macd_signal = _EwmState(2.0 / (signal + 1), signal)
+
+    @classmethod
+    def from_history(cls, stock_df: pd.DataFrame, price_col: str = 'Close') -> 'IncrementalIndicatorState':
+        """Builds the state by replaying a ticker's full history (date-indexed, as loaded)."""
+        state = cls(price_col)
+        state.update_frame(stock_df)
+        return state
+
+    def update(self, price, date=None) -> dict:
+        """Advances the state by one bar and returns that bar's indicator values."""
+        price = float(pd.to_numeric(price, errors='coerce'))
+        delta = price - self.last_price  # NaN after or at a missing bar, which counts as no change
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+        self.last_price = price
+        self.n_valid += not math.isnan(price)
+        if date is not None:
+            self.last_date = pd.Timestamp(date)
+
+        values = {f'SMA_{window}': state.update(price) for window, state in self.sma.items()}
+
+        avg_gain = self.avg_gain.update(gain)
+        avg_loss = self.avg_loss.update(loss)
+        if self.n_valid < self.RSI_PERIOD + 1:
+            rsi = math.nan
+        elif avg_loss == 0:
+            rsi = 100.0
+        else:
+            rsi = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+        values[f'RSI_{self.RSI_PERIOD}'] = rsi
+
+        macd = self.ema_fast.update(price) - self.ema_slow.update(price)
+        macd_signal = self.macd_signal.update(macd)
+        values['MACD'] = macd
+        values['MACD_signal'] = macd_signal
+        values['MACD_hist'] = macd - macd_signal
+        return values
+
+    def update_frame(self, new_bars: pd.DataFrame) -> pd.DataFrame:
+        """
+        Feeds the rows of a date-indexed frame in order and returns them with the TA
+        columns added. Rows dated on or before the last processed bar are skipped,
+        so re-running a daily job over overlapping data does not double-count bars.
+        """
+        df = new_bars.sort_index()
+        if self.last_date is not None and isinstance(df.index, pd.DatetimeIndex):
+            df = df[df.index > self.last_date]
+        df = df.copy()
+        prices = pd.to_numeric(df[self.price_col], errors='coerce') if self.price_col in df.columns \
+            else pd.Series(np.nan, index=df.index)
+
+        rows = [self.update(price) for price in prices.to_numpy(dtype=np.float64, na_value=np.nan)]
+        for col in TA_COLUMNS:
+            df[col] = [row[col] for row in rows]
+        if len(df) and isinstance(df.index, pd.DatetimeIndex):
+            self.last_date = df.index[-1]
+        return df
+
+    def to_dict(self) -> dict:
+        """JSON-serializable snapshot of the state (NaN stored as None)."""
+        return {
+            'format_version': STATE_FORMAT_VERSION,
+            'price_col': self.price_col,
+            'last_date': None if self.last_date is None else self.last_date.isoformat(),
+            'last_price': _to_json_float(self.last_price),
+            'n_valid': self.n_valid,
+            'sma': {str(window): state.to_dict() for window, state in self.sma.items()},
+            'avg_gain': self.avg_gain.to_dict(),
+            'avg_loss': self.avg_loss.to_dict(),
+            'ema_fast': self.ema_fast.to_dict(),
+            'ema_slow': self.ema_slow.to_dict(),
+            'macd_signal': self.macd_signal.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'IncrementalIndicatorState':
+        if data.get('format_version') != STATE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported indicator state format {data.get('format_version')}.")
+        state = cls(data['price_col'])
+        state.last_date = None if data['last_date'] is None else pd.Timestamp(data['last_date'])
+        state.last_price = _from_json_float(data['last_price'])
+        state.n_valid = data['n_valid']
+        state.sma = {int(window): _RollingMeanState.from_dict(int(window), sma_state)
+                     for window, sma_state in data['sma'].items()}
+        for name in ['avg_gain', 'avg_loss', 'ema_fast', 'ema_slow', 'macd_signal']:
+            current = getattr(state, name)
+            setattr(state, name, _EwmState.from_dict(current.alpha, current.min_periods, data[name]))
+        return state
+
+    def save(self, path: str):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path: str) -> 'IncrementalIndicatorState':
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
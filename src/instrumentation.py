@@ -0,0 +1,216 @@
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+try:
+    import resource  # Unix only; peak RSS is left out elsewhere
+except ImportError:
+    resource = None
+
+from . import config
+
+_sink = None  # The active _MetricsSink; None means instrumentation is off
+_local = threading.local()  # Per-thread stack of open stages
+
+
+class _MetricsSink:
+    """Appends one JSON object per finished stage (or reported message) to a file."""
+
+    def __init__(self, path: str, trace_memory: bool):
+        self.path = path
+        self.trace_memory = trace_memory
+        self.run_id = uuid.uuid4().hex[:12]
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def write(self, record: dict):
+        record = {'run_id': self.run_id, 'pid': os.getpid(),
+                  'time': datetime.now(timezone.utc).isoformat(timespec='milliseconds'), **record}
+        line = json.dumps(record, default=_json_default)
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+
+def enable_metrics(path: str = config.METRICS_LOG_PATH, trace_memory: bool = False) -> str:
+    """
+    Starts writing stage metrics to the JSON-lines file at `path` (appended to).
+    trace_memory=True also records each stage's tracemalloc peak above its starting
+    allocation, which slows allocation-heavy code noticeably. Returns the run id.
+    """
+    global _sink
+    disable_metrics()
+    _sink = _MetricsSink(path, trace_memory)
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    return _sink.run_id
+
+
+def disable_metrics():
+    """Stops recording and closes the metrics file."""
+    global _sink
+    sink, _sink = _sink, None
+    if sink is not None:
+        sink.close()
+        if sink.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+def metrics_enabled() -> bool:
+    return _sink is not None
+
+
+def count_rows(value):
+    """Rows in a frame/series/array, summed over a {ticker: frame} dict; None if not countable."""
+    if isinstance(value, (pd.DataFrame, pd.Series, np.ndarray, list)):
+        return len(value)
+    if isinstance(value, dict) and all(isinstance(v, (pd.DataFrame, pd.Series)) for v in value.values()):
+        return sum(len(v) for v in value.values())
+    return None
+
+
+def _max_rss_mb():
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # kB on Linux
+
+
+class _Stage:
+    """Times one stage; extra fields (rows_out, ticker, ...) are attached with record()."""
+
+    def __init__(self, name: str, fields: dict):
+        self.name = name
+        self.fields = fields
+        self._traced_peak = 0
+
+    def record(self, **fields):
+        self.fields.update(fields)
+
+    def __enter__(self):
+        stack = _local.__dict__.setdefault('stack', [])
+        self.parent = stack[-1] if stack else None
+        stack.append(self)
+        if _sink.trace_memory and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            if self.parent is not None:
+                self.parent._traced_peak = max(self.parent._traced_peak, peak)
+            tracemalloc.reset_peak()
+            self._traced_start = self._traced_peak = current
+        self._rss_start = _max_rss_mb()
+        self._cpu_start = time.process_time()
+        self._wall_start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall = time.perf_counter() - self._wall_start
+        cpu = time.process_time() - self._cpu_start
+        _local.stack.pop()
+        sink = _sink
+        if sink is None:  # Disabled while the stage was running
+            return False
+        record = {'stage': self.name, 'parent': self.parent.name if self.parent else None,
+                  'wall_s': round(wall, 6), 'cpu_s': round(cpu, 6)}
+        rss = _max_rss_mb()
+        if rss is not None:
+            record['max_rss_mb'] = round(rss, 1)
+            record['max_rss_growth_mb'] = round(rss - self._rss_start, 1)
+        if sink.trace_memory and tracemalloc.is_tracing() and hasattr(self, '_traced_start'):
+            self._traced_peak = max(self._traced_peak, tracemalloc.get_traced_memory()[1])
+            record['traced_peak_mb'] = round((self._traced_peak - self._traced_start) / 2 ** 20, 3)
+            if self.parent is not None:
+                self.parent._traced_peak = max(self.parent._traced_peak, self._traced_peak)
+        if exc_type is not None:
+            record['error'] = exc_type.__name__
+        record.update(self.fields)
+        sink.write(record)
+        return False
+
+
+class _NullStage:
+    """What stage() hands out while metrics are off: every operation is a no-op."""
+
+    def record(self, **fields):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+def stage(name: str, **fields):
+    """
+    Context manager timing a block as a named stage, e.g. one ticker or chunk:
+        with stage('load_ticker_csv', ticker=ticker) as s:
+            ...
+            s.record(rows_out=len(df))
+    Nearly free while metrics are disabled.
+    """
+    return _NULL_STAGE if _sink is None else _Stage(name, fields)
+
+
+def current_stage():
+    """The innermost open stage of this thread (a no-op stand-in when there is none)."""
+    stack = getattr(_local, 'stack', None)
+    return stack[-1] if _sink is not None and stack else _NULL_STAGE
+
+
+def instrumented(func=None, *, name: str = None):
+    """
+    Decorator recording a function call as a stage, with rows_in (first argument)
+    and rows_out (return value) where those are frames, arrays or {ticker: frame} dicts.
+    """
+    if func is None:
+        return functools.partial(instrumented, name=name)
+    stage_name = name or func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if _sink is None:
+            return func(*args, **kwargs)
+        with _Stage(stage_name, {'rows_in': count_rows(args[0]) if args else None}) as current:
+            result = func(*args, **kwargs)
+            current.record(rows_out=count_rows(result))
+        return result
+    return wrapper
+
+
+def report(message: str, **fields):
+    """Prints a progress or warning message and, while metrics are on, logs it under the current stage."""
+    print(message)
+    if _sink is not None:
+        _sink.write({'stage': getattr(current_stage(), 'name', None), 'message': message, **fields})
+
+
+def read_metrics(path: str = config.METRICS_LOG_PATH, run_id: str = None) -> pd.DataFrame:
+    """Loads a metrics file as a frame, optionally for one run."""
+    if not os.path.exists(path):
+        return pd.DataFrame()
+    metrics = pd.read_json(path, lines=True)
+    if run_id is not None and not metrics.empty:
+        metrics = metrics[metrics['run_id'] == run_id].reset_index(drop=True)
+    return metrics
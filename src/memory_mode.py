@@ -0,0 +1,92 @@
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from . import config
+
+_compact = False
+_saved_copy_on_write = None  # The pandas option value from before compact mode was switched on
+
+
+def compact_mode_enabled() -> bool:
+    return _compact
+
+
+def set_compact_mode(enabled: bool = True) -> bool:
+    """
+    Switches the memory-lean mode on or off for the whole process and returns the
+    previous setting. While on, pandas copy-on-write is enabled, so the src functions
+    hand out shallow copies instead of duplicating their input frames; news loads with
+    categorical stock/publisher columns and sentiment scores are float32. Switching
+    off restores the copy-on-write setting from before it was switched on.
+    """
+    global _compact, _saved_copy_on_write
+    previous = _compact
+    enabled = bool(enabled)
+    if enabled and not _compact:
+        _saved_copy_on_write = pd.get_option('mode.copy_on_write')
+        pd.set_option('mode.copy_on_write', True)
+    elif not enabled and _compact:
+        pd.set_option('mode.copy_on_write', _saved_copy_on_write)
+    _compact = enabled
+    return previous
+
+
+@contextmanager
+def compact_mode(enabled: bool = True):
+    """set_compact_mode for the duration of a with-block; the previous setting is restored after it."""
+    previous = set_compact_mode(enabled)
+    try:
+        yield
+    finally:
+        set_compact_mode(previous)
+
+
+def working_copy(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    The frame a function may add or replace columns on without touching the caller's:
+    a shallow copy under copy-on-write (columns are only copied if modified in place),
+    otherwise a full copy as before.
+    """
+    return df.copy(deep=False) if pd.get_option('mode.copy_on_write') is True else df.copy()
+
+
+def score_dtype():
+    return np.float32 if _compact else np.float64
+
+
+def categorical_news_columns() -> dict:
+    """read_csv dtypes reading the compact-mode categorical columns as categories (absent ones are ignored)."""
+    if not _compact:
+        return {}
+    return {col: 'category' for col in config.COMPACT_CATEGORICAL_COLUMNS}
+
+
+def upper_labels(values: pd.Series) -> pd.Series:
+    """
+    values.astype(str).str.upper(), keeping categoricals categorical: only the categories
+    are upper-cased (merging any that collide), so no per-row strings are built.
+    Missing values become 'NAN', as astype(str) gives.
+    """
+    if not isinstance(values.dtype, pd.CategoricalDtype):
+        return values.astype(str).str.upper()
+    labels = values.cat.categories.astype(str).str.upper().to_numpy(dtype=object)
+    codes = values.cat.codes.to_numpy()
+    if (codes < 0).any():
+        labels = np.append(labels, 'NAN')
+        codes = np.where(codes < 0, len(labels) - 1, codes)
+    categories, label_codes = np.unique(labels.astype(str), return_inverse=True)
+    return pd.Series(pd.Categorical.from_codes(label_codes[codes], categories=categories),
+                     index=values.index, name=values.name)
+
+
+def frame_memory_mb(value) -> float:
+    """Deep memory of a frame/series, or of all frames in a {ticker: frame} dict, in MB."""
+    if isinstance(value, dict):
+        return sum(frame_memory_mb(v) for v in value.values())
+    if isinstance(value, pd.DataFrame):
+        return value.memory_usage(deep=True, index=True).sum() / 2 ** 20
+    if isinstance(value, pd.Series):
+        return value.memory_usage(deep=True, index=True) / 2 ** 20
+    return 0.0
@@ -0,0 +1,162 @@
+import hashlib
+import heapq
+from collections import Counter
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_SKETCH_WIDTH = 1 << 18
+DEFAULT_SKETCH_DEPTH = 4
+_ALL = ('', '')  # Group key for counts over the whole corpus
+_SEPARATOR = '\x1f'
+
+
+def iter_ngrams(tokens: list, n: int):
+    """Space-joined n-grams of a token list (the tokens themselves for n=1)."""
+    if n == 1:
+        return iter(tokens)
+    return (' '.join(gram) for gram in zip(*(tokens[i:] for i in range(n))))
+
+
+class NGramCounter:
+    """
+    Streaming top-k n-gram counts over chunks of text, overall and per value of
+    `group_cols` (e.g. ('stock', 'publisher')), so per-ticker and per-publisher results
+    come from the same single pass.
+    mode='exact' keeps a hash counter per group (memory grows with the vocabulary).
+    mode='approximate' keeps one fixed-size Count-Min sketch shared by all groups and a
+    top-k heap per group; counts are over-estimates bounded by the sketch width.
+    """
+
+    def __init__(self, n: int = 1, top_k: int = 20, mode: str = 'exact', group_cols=(),
+                 tokenizer=str.split, sketch_width: int = DEFAULT_SKETCH_WIDTH,
+                 sketch_depth: int = DEFAULT_SKETCH_DEPTH):
+        if mode not in ('exact', 'approximate'):
+            raise ValueError(f"Unknown counting mode '{mode}'. Use 'exact' or 'approximate'.")
+        if n < 1:
+            raise ValueError("n must be at least 1.")
+        self.n = n
+        self.top_k = top_k
+        self.mode = mode
+        self.group_cols = tuple(group_cols)
+        self.tokenizer = tokenizer
+        self.counts = {}  # exact: {(group_col, value): Counter}
+        self.top = {}  # approximate: {(group_col, value): {ngram: estimate}}
+        if mode == 'approximate':
+            self.sketch = np.zeros((sketch_depth, sketch_width), dtype=np.int64)
+
+    def update(self, chunk: pd.DataFrame, text_col: str = 'processed_headline'):
+        """Counts the n-grams of one chunk of a news frame."""
+        groups = [chunk[col].to_numpy(dtype=object) for col in self.group_cols]
+        self.update_texts(chunk[text_col].to_numpy(dtype=object), groups)
+        return self
+
+    def update_texts(self, texts, groups=None):
+        """Counts texts; `groups` holds one value array per entry of group_cols."""
+        groups = groups or []
+        gram_lists = [list(iter_ngrams(self.tokenizer(text), self.n)) if isinstance(text, str) else []
+                      for text in texts]
+        chunk_counts = {_ALL: Counter(chain.from_iterable(gram_lists))}
+        for col, values in zip(self.group_cols, groups):
+            codes, uniques = pd.factorize(pd.Series(values, dtype=object), use_na_sentinel=False)
+            rows_by_code = np.split(np.argsort(codes, kind='stable'), np.cumsum(np.bincount(codes))[:-1])
+            for value, rows in zip(uniques, rows_by_code):
+                counter = Counter(chain.from_iterable(gram_lists[row] for row in rows))
+                if counter:
+                    chunk_counts[(col, value)] = counter
+        if not chunk_counts[_ALL]:
+            return self
+
+        if self.mode == 'exact':
+            for key, counter in chunk_counts.items():
+                self.counts.setdefault(key, Counter()).update(counter)
+        else:
+            self._update_sketch(chunk_counts)
+        return self
+
+    # --- approximate mode --------------------------------------------------
+
+    def _sketch_columns(self, keys: list, grams: list) -> np.ndarray:
+        """(depth, len) sketch columns from one 128-bit hash per item (double hashing)."""
+        digests = b''.join(hashlib.blake2b(f'{col}{_SEPARATOR}{value}{_SEPARATOR}{gram}'.encode('utf-8'),
+                                           digest_size=16).digest()
+                           for (col, value), gram in zip(keys, grams))
+        halves = np.frombuffer(digests, dtype=np.uint64).reshape(-1, 2)
+        depth, width = self.sketch.shape
+        steps = np.arange(depth, dtype=np.uint64)[:, None]
+        return ((halves[:, 0] + steps * (halves[:, 1] | np.uint64(1))) % np.uint64(width)).astype(np.int64)
+
+    def _estimate(self, columns: np.ndarray) -> np.ndarray:
+        return self.sketch[np.arange(self.sketch.shape[0])[:, None], columns].min(axis=0)
+
+    def _update_sketch(self, chunk_counts: dict):
+        keys, grams, counts = [], [], []
+        for key, counter in chunk_counts.items():
+            keys.extend([key] * len(counter))
+            grams.extend(counter.keys())
+            counts.extend(counter.values())
+        if not grams:
+            return
+        columns = self._sketch_columns(keys, grams)
+        rows = np.broadcast_to(np.arange(self.sketch.shape[0])[:, None], columns.shape)
+        np.add.at(self.sketch, (rows, columns), np.asarray(counts, dtype=np.int64))
+        self._refresh_top(chunk_counts)
+
+    def _refresh_top(self, touched: dict):
+        """Re-estimates each touched group's heap candidates and keeps its top_k."""
+        keys, grams = [], []
+        for key, counter in touched.items():
+            candidates = set(counter) | set(self.top.get(key, ()))
+            keys.extend([key] * len(candidates))
+            grams.extend(candidates)
+        if not grams:
+            return
+        estimates = self._estimate(self._sketch_columns(keys, grams)).tolist()
+        by_group = {}
+        for key, gram, estimate in zip(keys, grams, estimates):
+            by_group.setdefault(key, []).append((estimate, gram))
+        for key, candidates in by_group.items():
+            self.top[key] = {gram: estimate for estimate, gram in heapq.nlargest(self.top_k, candidates)}
+
+    # --- results -----------------------------------------------------------
+
+    def merge(self, other: 'NGramCounter') -> 'NGramCounter':
+        """Adds another counter's counts (same n, mode and sketch shape), e.g. from a worker."""
+        if (other.n, other.mode) != (self.n, self.mode):
+            raise ValueError("Only counters with the same n and mode can be merged.")
+        if self.mode == 'exact':
+            for key, counter in other.counts.items():
+                self.counts.setdefault(key, Counter()).update(counter)
+        else:
+            if other.sketch.shape != self.sketch.shape:
+                raise ValueError("Sketch shapes differ; counters cannot be merged.")
+            self.sketch += other.sketch
+            self._refresh_top({key: dict.fromkeys(top) for key, top in other.top.items()})
+        return self
+
+    def most_common(self, top_n: int = None, by: str = None, value=None) -> list:
+        """[(ngram, count)] for the whole corpus, or for rows where `by` == `value`."""
+        key = _ALL if by is None else (by, value)
+        top_n = top_n or self.top_k
+        if self.mode == 'exact':
+            return self.counts.get(key, Counter()).most_common(top_n)
+        return sorted(self.top.get(key, {}).items(), key=lambda item: -item[1])[:top_n]
+
+    def to_frame(self, by: str = None, top_n: int = None) -> pd.DataFrame:
+        """Top n-grams as a frame: ngram/count, plus a `by` column with one block per group value."""
+        if by is None:
+            return pd.DataFrame(self.most_common(top_n), columns=['ngram', 'count'])
+        store = self.counts if self.mode == 'exact' else self.top
+        rows = [(value, gram, count) for col, value in store if col == by
+                for gram, count in self.most_common(top_n, by, value)]
+        return pd.DataFrame(rows, columns=[by, 'ngram', 'count'])
+
+
+def count_ngrams(chunks, text_col: str = 'processed_headline', n: int = 1, **counter_kwargs) -> NGramCounter:
+    """Builds an NGramCounter over an iterable of news frames (e.g. iter_financial_news_chunks)."""
+    counter = NGramCounter(n=n, **counter_kwargs)
+    for chunk in chunks:
+        if chunk is not None and text_col in chunk.columns:
+            counter.update(chunk, text_col)
+    return counter
@@ -0,0 +1,246 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .financial_analysis import build_price_panel
+from .resampling import resample_stock_data
+
+DEFAULT_SMA_PERIODS = (20, 50)
+DEFAULT_RSI_PERIOD = 14
+DEFAULT_MACD_PERIODS = (12, 26, 9) # fast, slow, signal
+
+
+def _contiguous_runs(is_observation: np.ndarray):
+    """
+    (first, last, count) of each column's observations if every column's observations
+    form one unbroken run (missing values only before/after it), else None.
+    """
+    count = is_observation.sum(axis=0)
+    first = is_observation.argmax(axis=0)
+    last = len(is_observation) - 1 - is_observation[::-1].argmax(axis=0)
+    if np.any((count > 0) & (last - first + 1 != count)):
+        return None
+    return first, last, count
+
+
+def _pack_columns(values: np.ndarray, valid: np.ndarray):
+    """
+    Moves each column's valid observations to the top, in time order, so every
+    column is a gap-free series followed by NaN padding. Returns (packed, order).
+    """
+    order = np.argsort(~valid, axis=0, kind='stable')
+    return np.take_along_axis(values, order, axis=0), order
+
+
+def _unpack_columns(packed: np.ndarray, order: np.ndarray, valid: np.ndarray) -> np.ndarray:
+    if order is None:
+        out = packed.copy()
+    else:
+        out = np.empty_like(packed)
+        np.put_along_axis(out, order, packed, axis=0)
+    out[~valid] = np.nan
+    return out
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """Column-wise rolling mean with min_periods=window (NaN until the window is full)."""
+    out = np.full(values.shape, np.nan)
+    if len(values) >= window:
+        out[window - 1:] = sliding_window_view(values, window, axis=0).mean(axis=-1)
+    return out
+
+
+def rolling_std(values: np.ndarray, window: int) -> np.ndarray:
+    """Column-wise rolling sample standard deviation (ddof=1) with min_periods=window."""
+    out = np.full(values.shape, np.nan)
+    if len(values) >= window:
+        out[window - 1:] = sliding_window_view(values, window, axis=0).std(axis=-1, ddof=1)
+    return out
+
+
+def ewm_mean(values: np.ndarray, alpha: float, min_periods: int) -> np.ndarray:
+    """
+    Column-wise pandas ewm(alpha=alpha, adjust=False, min_periods=min_periods).mean(),
+    reproducing pandas' recursion (including its handling of missing values) step by step.
+    """
+    n_rows = len(values)
+    out = np.full(values.shape, np.nan)
+    if n_rows == 0:
+        return out
+    min_periods = max(min_periods, 1)
+    old_wt_factor = 1.0 - alpha
+    is_observation = ~np.isnan(values)
+    runs = _contiguous_runs(is_observation)
+    if runs is not None:
+        return _ewm_mean_runs(values, alpha, min_periods, runs)
+
+    weighted = values[0].copy()
+    old_wt = np.ones(values.shape[1:])
+    out[0] = weighted
+    for i in range(1, n_rows):
+        cur = values[i]
+        has_weighted = ~np.isnan(weighted)
+        old_wt = np.where(has_weighted, old_wt * old_wt_factor, old_wt)
+        update = has_weighted & is_observation[i] & (weighted != cur)
+        with np.errstate(invalid='ignore'):
+            blended = (old_wt * weighted + alpha * cur) / (old_wt + alpha)
+        weighted = np.where(update, blended, weighted)
+        old_wt = np.where(has_weighted & is_observation[i], 1.0, old_wt)
+        weighted = np.where(~has_weighted & is_observation[i], cur, weighted)
+        out[i] = weighted
+
+    out[np.cumsum(is_observation, axis=0) < min_periods] = np.nan
+    return out
+
+
+def _ewm_mean_runs(values: np.ndarray, alpha: float, min_periods: int, runs) -> np.ndarray:
+    """
+    ewm_mean for columns whose observations are unbroken runs. Within a run pandas'
+    old weight is reset to 1 after every observation, so each step is the same blend.
+    """
+    first, last, count = runs
+    blend_weight = 1.0 * (1.0 - alpha)
+    denominator = blend_weight + alpha
+    weighted_new = alpha * values
+    out = np.empty(values.shape)
+    weighted = out[0] = values[0]
+    for i in range(1, len(values)):
+        cur = values[i]
+        blended = (blend_weight * weighted + weighted_new[i]) / denominator
+        weighted = np.where(weighted != cur, blended, weighted) # pandas skips equal values
+        np.copyto(weighted, cur, where=np.isnan(weighted)) # First observation starts the average
+        out[i] = weighted
+
+    rows = np.arange(len(values))[:, None]
+    after_run = (rows > last) & (count > 0)
+    if after_run.any(): # pandas carries the last average forward over trailing gaps
+        out[after_run] = np.broadcast_to(out[last, np.arange(values.shape[1])], values.shape)[after_run]
+    nobs = np.clip(rows - first + 1, 0, count)
+    out[nobs < min_periods] = np.nan
+    return out
+
+
+def _rsi(prices: np.ndarray, n_valid: np.ndarray, period: int) -> np.ndarray:
+    delta = np.diff(prices, axis=0, prepend=np.nan)
+    missing = np.isnan(prices)
+    gain = np.where(delta > 0, delta, 0.0)
+    loss = -np.where(delta < 0, delta, 0.0)
+    gain[missing] = np.nan # A ticker's first bar counts (zero change); bars it lacks do not
+    loss[missing] = np.nan
+    avg_gain = ewm_mean(gain, 1.0 / period, period) # com = period - 1
+    avg_loss = ewm_mean(loss, 1.0 / period, period)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = 100.0 - (100.0 / (1.0 + avg_gain / avg_loss))
+    rsi[avg_loss == 0] = 100.0
+    rsi[:, n_valid < period + 1] = np.nan
+    return rsi
+
+
+def _true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    prev_close = np.vstack([np.full((1,) + close.shape[1:], np.nan), close[:-1]])
+    with np.errstate(invalid='ignore'):
+        return np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+
+
+def calculate_panel_indicators(close, high=None, low=None,
+                               sma_periods=DEFAULT_SMA_PERIODS,
+                               rsi_period: int = DEFAULT_RSI_PERIOD,
+                               macd_periods=DEFAULT_MACD_PERIODS,
+                               ema_periods=(),
+                               bollinger=None,
+                               atr_period: int = None) -> dict:
+    """
+    Computes indicators for every ticker at once on a dates x tickers close panel
+    (DataFrame or 2-D array; high/low aligned the same way for ATR).
+    Uses the same formulas as calculate_technical_indicators: SMA_<p>, RSI_<p>,
+    MACD/MACD_signal/MACD_hist, plus optional EMA_<p>, Bollinger bands
+    (bollinger=(period, num_std) -> BB_middle/upper/lower_<p>) and Wilder ATR_<p>.
+    NaN closes are treated as missing bars: each column is computed over its own
+    observations only, as if that ticker's frame were processed alone.
+    Returns {name: panel}, DataFrames when `close` is a DataFrame.
+    """
+    index = columns = None
+    if isinstance(close, pd.DataFrame):
+        index, columns = close.index, close.columns
+    close_values = np.asarray(close, dtype=np.float64)
+    if close_values.ndim == 1:
+        close_values = close_values[:, None]
+    valid = ~np.isnan(close_values)
+    n_valid = valid.sum(axis=0)
+    if _contiguous_runs(valid) is not None:
+        packed, order = close_values, None # Leading/trailing gaps only: no repacking needed
+    else:
+        packed, order = _pack_columns(close_values, valid)
+
+    results = {}
+    for period in sma_periods:
+        results[f'SMA_{period}'] = rolling_mean(packed, period)
+
+    if rsi_period:
+        results[f'RSI_{rsi_period}'] = _rsi(packed, n_valid, rsi_period)
+
+    if macd_periods:
+        fast, slow, signal = macd_periods
+        macd = ewm_mean(packed, 2.0 / (fast + 1), fast) - ewm_mean(packed, 2.0 / (slow + 1), slow)
+        macd[:, n_valid < slow] = np.nan
+        macd_signal = ewm_mean(macd, 2.0 / (signal + 1), signal)
+        results['MACD'] = macd
+        results['MACD_signal'] = macd_signal
+        results['MACD_hist'] = macd - macd_signal
+
+    for period in ema_periods:
+        results[f'EMA_{period}'] = ewm_mean(packed, 2.0 / (period + 1), period)
+
+    if bollinger:
+        period, num_std = bollinger
+        middle = rolling_mean(packed, period)
+        band = num_std * rolling_std(packed, period)
+        results[f'BB_middle_{period}'] = middle
+        results[f'BB_upper_{period}'] = middle + band
+        results[f'BB_lower_{period}'] = middle - band
+
+    if atr_period:
+        if high is None or low is None:
+            raise ValueError("ATR needs high and low panels aligned with close.")
+        high_values = np.asarray(high, dtype=np.float64).reshape(close_values.shape)
+        low_values = np.asarray(low, dtype=np.float64).reshape(close_values.shape)
+        if order is not None:
+            high_values = np.take_along_axis(high_values, order, 0)
+            low_values = np.take_along_axis(low_values, order, 0)
+        true_range = _true_range(high_values, low_values, packed)
+        results[f'ATR_{atr_period}'] = ewm_mean(true_range, 1.0 / atr_period, atr_period)
+
+    for name, packed_result in results.items():
+        unpacked = _unpack_columns(packed_result, order, valid)
+        results[name] = unpacked if index is None else pd.DataFrame(unpacked, index=index, columns=columns)
+    return results
+
+
+def calculate_technical_indicators_panel(stock_data_dict: dict, price_col: str = 'Close', timeframe=None,
+                                         **indicator_kwargs) -> dict:
+    """
+    Batched replacement for looping calculate_technical_indicators over {TICKER: df}:
+    aligns all tickers into one panel, computes every indicator in a single pass and
+    returns {TICKER: df with indicator columns}. A timeframe (e.g. 'weekly') resamples
+    every ticker to those bars first.
+    """
+    stock_data_dict = resample_stock_data(stock_data_dict, timeframe, price_col)
+    fields = [price_col] + ([c for c in ('High', 'Low') if c != price_col]
+                            if indicator_kwargs.get('atr_period') else [])
+    panel = build_price_panel(stock_data_dict, fields=fields)
+    if not panel.tickers:
+        return {}
+    close = panel.values[0]
+    if indicator_kwargs.get('atr_period'):
+        indicator_kwargs['high'] = panel.values[fields.index('High')]
+        indicator_kwargs['low'] = panel.values[fields.index('Low')]
+    indicators = calculate_panel_indicators(close, **indicator_kwargs)
+
+    result = {}
+    for j, ticker in enumerate(panel.tickers):
+        df = stock_data_dict[ticker].copy()
+        rows = panel.dates.searchsorted(df.index.values)
+        for name, values in indicators.items():
+            df[name] = values[rows, j]
+        result[ticker] = df
+    return result
@@ -0,0 +1,155 @@
+import json
+import os
+import shutil
+import uuid
+
+import numpy as np
+import pandas as pd
+from . import config
+from .financial_analysis import OHLCV_COLUMNS, PricePanel
+
+PANEL_FORMAT_VERSION = 1
+
+
+def write_panel_store(path: str, prices, fields: list = None) -> str:
+    """
+    Writes prices to an on-disk panel: one contiguous float64 file per field shaped
+    (tickers, dates), a shared dates.npy axis and meta.json with the ticker -> row index.
+    `prices` is a PricePanel or a {TICKER: df} dict as returned by load_stock_prices_from_csvs.
+    Rows are filled one ticker at a time, so a dict input is never stacked in memory.
+    """
+    if isinstance(prices, PricePanel):
+        fields = list(fields or prices.fields)
+        tickers, dates = list(prices.tickers), prices.dates
+    else:
+        fields = list(fields or OHLCV_COLUMNS)
+        tickers = list(prices)
+        all_dates = [df.index.values for df in prices.values()]
+        dates = pd.DatetimeIndex(np.unique(np.concatenate(all_dates)) if all_dates else [])
+
+    tmp_path = f'{path.rstrip(os.sep)}.tmp-{uuid.uuid4().hex}'
+    os.makedirs(tmp_path)
+    np.save(os.path.join(tmp_path, 'dates.npy'), dates.values.astype('datetime64[ns]'))
+
+    arrays = {field: np.lib.format.open_memmap(os.path.join(tmp_path, f'{field}.npy'), mode='w+',
+                                               dtype=np.float64, shape=(len(tickers), len(dates)))
+              for field in fields}
+    valid_ranges = {}
+    for row, ticker in enumerate(tickers):
+        if isinstance(prices, PricePanel):
+            for field in fields:
+                arrays[field][row] = prices.values[prices.fields.index(field), :, row]
+        else:
+            df = prices[ticker]
+            positions = dates.searchsorted(df.index.values)
+            for field in fields:
+                arrays[field][row] = np.nan
+                if field in df.columns:
+                    arrays[field][row, positions] = pd.to_numeric(df[field], errors='coerce').to_numpy(np.float64)
+        present = np.flatnonzero(~np.isnan(np.column_stack([arrays[f][row] for f in fields])).all(axis=1))
+        valid_ranges[ticker] = [int(present[0]), int(present[-1]) + 1] if len(present) else [0, 0]
+    for array in arrays.values():
+        array.flush()
+    del arrays
+
+    meta = {
+        'format_version': PANEL_FORMAT_VERSION,
+        'fields': fields,
+        'tickers': tickers,
+        'n_dates': len(dates),
+        'valid_ranges': valid_ranges,
+    }
+    with open(os.path.join(tmp_path, 'meta.json'), 'w') as f:
+        json.dump(meta, f)
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    os.replace(tmp_path, path)
+    return path
+
+
+class PanelStore:
+    """
+    Read-only, memory-mapped view of a panel written by write_panel_store.
+    Ticker and date-range slices are views into the mapped files, so worker processes
+    opening the same store share one copy of the data through the OS page cache.
+    """
+
+    def __init__(self, path: str = os.path.join(config.PROCESSED_DATA_DIR, 'price_panel')):
+        self.path = path
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        if meta['format_version'] != PANEL_FORMAT_VERSION:
+            raise ValueError(f"Unsupported panel format {meta['format_version']} in {path}.")
+        self.fields = meta['fields']
+        self.tickers = meta['tickers']
+        self._rows = {ticker: row for row, ticker in enumerate(self.tickers)}
+        self._valid_ranges = meta['valid_ranges']
+        self.dates = pd.DatetimeIndex(np.load(os.path.join(path, 'dates.npy'), mmap_mode='r'))
+        self._arrays = {field: np.load(os.path.join(path, f'{field}.npy'), mmap_mode='r')
+                        for field in self.fields}
+
+    def __getstate__(self):
+        # Re-map in the receiving process instead of pickling the array contents
+        return {'path': self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state['path'])
+
+    def __contains__(self, ticker):
+        return str(ticker).upper() in self._rows
+
+    def _date_slice(self, start=None, end=None) -> slice:
+        lo = 0 if start is None else self.dates.searchsorted(pd.Timestamp(start), side='left')
+        hi = len(self.dates) if end is None else self.dates.searchsorted(pd.Timestamp(end), side='right')
+        return slice(lo, hi)
+
+    def _ticker_slice(self, ticker: str, start=None, end=None, trim: bool = True) -> slice:
+        window = self._date_slice(start, end)
+        if not trim:
+            return window
+        first, last = self._valid_ranges[ticker]
+        return slice(max(window.start, first), max(min(window.stop, last), max(window.start, first)))
+
+    def ticker_arrays(self, ticker: str, start=None, end=None, fields: list = None, trim: bool = True) -> dict:
+        """
+        Zero-copy {field: 1-D view} for one ticker. trim=True limits the slice to the
+        ticker's first..last bar; dates it has no bar for inside that span are NaN.
+        """
+        ticker = str(ticker).upper()
+        row = self._rows[ticker]
+        window = self._ticker_slice(ticker, start, end, trim)
+        return {field: self._arrays[field][row, window] for field in (fields or self.fields)}
+
+    def ticker_frame(self, ticker: str, start=None, end=None, fields: list = None,
+                     trim: bool = True, dropna: bool = False) -> pd.DataFrame:
+        """
+        DataFrame wrapper over ticker_arrays (no copy). dropna=True removes the NaN gap
+        rows to reproduce the loader's frame, at the cost of a copy.
+        """
+        ticker = str(ticker).upper()
+        window = self._ticker_slice(ticker, start, end, trim)
+        df = pd.DataFrame(self.ticker_arrays(ticker, start, end, fields, trim),
+                          index=self.dates[window].rename(config.STOCK_DATE_COLUMN), copy=False)
+        return df.dropna(how='all') if dropna else df
+
+    def field_matrix(self, field: str, tickers: list = None, start=None, end=None) -> pd.DataFrame:
+        """
+        Dates x tickers frame for one field. A view when `tickers` is None; selecting
+        tickers gathers their rows into a new array.
+        """
+        window = self._date_slice(start, end)
+        array = self._arrays[field]
+        if tickers is None:
+            tickers = self.tickers
+            values = array[:, window]
+        else:
+            tickers = [str(t).upper() for t in tickers]
+            values = array[[self._rows[t] for t in tickers], window]
+        return pd.DataFrame(values.T, index=self.dates[window].rename(config.STOCK_DATE_COLUMN),
+                            columns=pd.Index(tickers, name='ticker'), copy=False)
+
+    def to_stock_data_dict(self, tickers: list = None, start=None, end=None) -> dict:
+        """{TICKER: df} in the load_stock_prices_from_csvs layout (copies, gaps dropped)."""
+        tickers = self.tickers if tickers is None else [str(t).upper() for t in tickers]
+        return {ticker: self.ticker_frame(ticker, start, end, dropna=True)
+                for ticker in tickers if ticker in self._rows}
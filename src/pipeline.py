@@ -0,0 +1,280 @@
+"""
+News sentiment vs. stock returns, end to end, as a DAG of memoized stages:
+
+    news -> text -> sentiment -> daily_sentiment --+
+                                                   +--> correlation
+    prices/returns (one branch per ticker) --------+
+
+Each stage's output is stored under the cache directory, keyed by its parameters,
+the keys of its inputs and the source of the code that computes it, so a re-run
+only recomputes stages downstream of what changed (e.g. new --lags re-runs just
+the correlation stage, as does a new --timeframe). Per-ticker price branches run on a process pool.
+
+    python -m src.pipeline --tickers AAPL MSFT NVDA --lags 0 1 -1 --workers 4
+"""
+import argparse
+import glob
+import os
+import re
+import sys
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from . import (config, correlation_analysis, correlation_matrix, data_processing, financial_analysis, resampling,
+               sentiment_tool)
+from .instrumentation import enable_metrics, disable_metrics, report, stage
+from .processed_store import code_fingerprint, params_key, source_fingerprint
+
+PIPELINE_FORMAT_VERSION = 1
+POOLED_TICKER = 'ALL'  # stock_symbol of the correlation over all tickers together
+STAGES = ('news', 'text', 'sentiment', 'daily_sentiment', 'returns', 'correlation')
+
+
+class StageCache:
+    """Stage outputs pickled under <root>/<stage>/<key>.pkl; writes are atomic."""
+
+    def __init__(self, root: str = config.PIPELINE_CACHE_DIR):
+        self.root = root
+
+    def _path(self, stage_name: str, key: str) -> str:
+        return os.path.join(self.root, stage_name, f'{key}.pkl')
+
+    def get(self, stage_name: str, key: str):
+        path = self._path(stage_name, key)
+        return pd.read_pickle(path) if os.path.exists(path) else None
+
+    def put(self, stage_name: str, key: str, value):
+        path = self._path(stage_name, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.tmp-{uuid.uuid4().hex}'
+        pd.to_pickle(value, tmp_path)
+        os.replace(tmp_path, path)
+
+
+class Pipeline:
+    """
+    Named stages with their dependencies, run on demand. A stage is
+    (func, deps, params, modules, key, options): func receives the dependency outputs
+    positionally and `params` and `options` as keywords. The cache key hashes the
+    params, the dependency keys and the source of `modules`, plus `key` for outside
+    inputs such as source-file fingerprints; `options` (worker counts and the like)
+    do not change results and are left out of it.
+    """
+
+    def __init__(self, cache: StageCache = None, refresh=()):
+        self.cache = cache
+        self.refresh = set(refresh)
+        self.stages = {}
+        self.keys = {}
+        self.executed = []  # Stages computed (not read from the cache) by the last run()
+
+    def add(self, name: str, func, deps=(), params: dict = None, modules=(), key=None, options: dict = None):
+        self.stages[name] = (func, tuple(deps), params or {}, tuple(modules), key, options or {})
+        return self
+
+    def stage_key(self, name: str) -> str:
+        if name not in self.keys:
+            _, deps, params, modules, extra_key, _ = self.stages[name]
+            code_version = code_fingerprint(*modules) if modules else None
+            self.keys[name] = params_key(PIPELINE_FORMAT_VERSION, name, code_version, params, extra_key,
+                                         [self.stage_key(dep) for dep in deps])
+        return self.keys[name]
+
+    def run(self, target: str):
+        """Output of `target`, computing it and any stale upstream stages."""
+        self.executed = []
+        return self._resolve(target, {})
+
+    def _resolve(self, name: str, results: dict):
+        if name in results:
+            return results[name]
+        func, deps, params, _, _, options = self.stages[name]
+        key = self.stage_key(name)
+        value = None if self.cache is None or name in self.refresh else self.cache.get(name, key)
+        if value is None:
+            inputs = [self._resolve(dep, results) for dep in deps]
+            with stage(f'pipeline.{name}', key=key):
+                value = func(*inputs, **params, **options)
+            if self.cache is not None:
+                self.cache.put(name, key, value)
+            self.executed.append(name)
+        results[name] = value
+        return value
+
+
+def discover_tickers(csv_directory: str, filename_template: str = config.STOCK_FILENAME_TEMPLATE) -> list:
+    """Tickers that have a price CSV in `csv_directory`."""
+    prefix, suffix = filename_template.split('{}')
+    pattern = re.compile(re.escape(prefix) + r'(.+)' + re.escape(suffix) + '$')
+    names = [os.path.basename(path) for path in glob.glob(os.path.join(csv_directory, prefix + '*' + suffix))]
+    return sorted(match.group(1) for match in map(pattern.match, names) if match)
+
+
+def _local_calendar_days(dates: pd.Series, timezone: str = config.MARKET_TIMEZONE) -> pd.Series:
+    """Calendar day of each timestamp in the exchange timezone (naive timestamps are taken as local)."""
+    if not pd.api.types.is_datetime64_any_dtype(dates):  # Mixed UTC offsets load as objects
+        dates = pd.to_datetime(dates, errors='coerce', utc=True)
+    if getattr(dates.dt, 'tz', None) is not None:
+        dates = dates.dt.tz_convert(timezone).dt.tz_localize(None)
+    return dates.dt.normalize()
+
+
+def daily_sentiment(news_df: pd.DataFrame, tickers: list = None, sentiment_col: str = 'sentiment_compound',
+                    date_col: str = config.NEWS_DATE_COLUMN) -> pd.DataFrame:
+    """Average sentiment per (exchange-local day, stock), optionally for some tickers only."""
+    df = news_df[[date_col, config.NEWS_STOCK_COLUMN, sentiment_col]]
+    if tickers is not None:
+        df = df[df[config.NEWS_STOCK_COLUMN].astype(str).str.upper().isin([str(t).upper() for t in tickers])]
+    df = df.assign(**{config.AGG_SENTIMENT_DATE_COLUMN: _local_calendar_days(df[date_col])})
+    return correlation_analysis.aggregate_daily_sentiment(df, sentiment_col=sentiment_col)
+
+
+def _ticker_returns_task(args):
+    """One per-ticker branch: load the CSV and add daily returns (None if it does not load)."""
+    ticker, csv_directory, filename_template = args
+    loaded = financial_analysis.load_stock_prices_from_csvs([ticker], csv_directory, filename_template)
+    return correlation_analysis.calculate_daily_stock_returns(loaded[ticker]) if ticker in loaded else None
+
+
+def ticker_returns(tickers: list, csv_directory: str, filename_template: str, cache: StageCache = None,
+                   fingerprints: dict = None, n_workers: int = 1, refresh: bool = False) -> dict:
+    """
+    {TICKER: prices with daily returns}. Each ticker is memoized on its own CSV
+    fingerprint (`refresh` recomputes and rewrites them all), and the tickers that
+    need computing are spread over `n_workers` processes.
+    """
+    code_version = code_fingerprint(financial_analysis, correlation_analysis, sys.modules[__name__])
+    keys = {t: params_key(PIPELINE_FORMAT_VERSION, 'ticker_returns', code_version, (fingerprints or {}).get(t))
+            for t in tickers}
+    use_cache = cache is not None and bool(fingerprints)
+    results, missing = {}, []
+    for ticker in tickers:
+        cached = cache.get('ticker_returns', keys[ticker]) if use_cache and not refresh else None
+        if cached is None:
+            missing.append(ticker)
+        else:
+            results[ticker] = cached
+
+    tasks = [(ticker, csv_directory, filename_template) for ticker in missing]
+    if n_workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            computed = list(executor.map(_ticker_returns_task, tasks))
+    else:
+        computed = [_ticker_returns_task(task) for task in tasks]
+    for ticker, df in zip(missing, computed):
+        if df is None:
+            continue
+        results[ticker] = df
+        if use_cache:
+            cache.put('ticker_returns', keys[ticker], df)
+    return {ticker: results[ticker] for ticker in tickers if ticker in results}
+
+
+def lagged_correlations(daily_sentiment_df: pd.DataFrame, returns_dict: dict, lags: list,
+                        min_observations: int = config.CORRELATION_MIN_OBSERVATIONS, timeframe=None) -> pd.DataFrame:
+    """
+    Pearson correlation of sentiment and lagged returns per (ticker, lag), plus all tickers
+    pooled; a timeframe resamples the cached daily stages to those bars first.
+    """
+    columns = [config.MERGED_STOCK_SYMBOL_COLUMN, config.MERGED_LAG_COLUMN, 'correlation', 'n_obs']
+    matrix = correlation_matrix.sentiment_return_correlations(daily_sentiment_df, returns_dict, lags=lags,
+                                                              min_observations=min_observations,
+                                                              pooled_label=POOLED_TICKER, timeframe=timeframe)
+    result = pd.DataFrame({
+        config.MERGED_STOCK_SYMBOL_COLUMN: np.repeat(matrix.n_obs.index.to_numpy(dtype=object), len(lags)),
+        config.MERGED_LAG_COLUMN: np.tile(np.asarray(lags, dtype=np.int64), len(matrix.n_obs)),
+        'correlation': matrix.correlation.to_numpy().ravel(),
+        'n_obs': matrix.n_obs.to_numpy().ravel(),
+    })
+    result = result[result['n_obs'] > 0]  # Tickers without sentiment on any of their trading days
+    if result.empty:
+        return pd.DataFrame(columns=columns)
+    pooled = result[config.MERGED_STOCK_SYMBOL_COLUMN] == POOLED_TICKER
+    return pd.concat([result[~pooled].sort_values([config.MERGED_STOCK_SYMBOL_COLUMN, config.MERGED_LAG_COLUMN]),
+                      result[pooled].sort_values(config.MERGED_LAG_COLUMN)], ignore_index=True)
+
+
+def build_pipeline(news_path: str = config.NEWS_DATA_FILE_PATH, csv_directory: str = config.STOCK_CSV_DIR_PATH,
+                   tickers: list = None, lags: list = None, text_col: str = config.NEWS_HEADLINE_COLUMN,
+                   filename_template: str = config.STOCK_FILENAME_TEMPLATE,
+                   min_observations: int = config.CORRELATION_MIN_OBSERVATIONS, n_workers: int = 1,
+                   cache: StageCache = None, refresh=(), timeframe=None) -> Pipeline:
+    """
+    The news/returns correlation DAG; run(target) with any name in STAGES.
+    The sentiment and returns stages stay daily, so a new `timeframe` (e.g. 'weekly')
+    only recomputes the correlation stage.
+    """
+    tickers = [str(t).upper() for t in (tickers or discover_tickers(csv_directory, filename_template))]
+    lags = list(config.CORRELATION_LAGS_TO_TEST if lags is None else lags)
+    fingerprints = {}
+    for ticker in tickers:
+        path = os.path.join(csv_directory, filename_template.format(ticker))
+        if os.path.exists(path):
+            fingerprints[ticker] = source_fingerprint(path, with_hash=False)
+    news_fingerprint = source_fingerprint(news_path, with_hash=False) if os.path.exists(news_path) else news_path
+
+    this_module = sys.modules[__name__]  # daily_sentiment, ticker_returns and lagged_correlations live here
+    pipeline = Pipeline(cache, refresh)
+    pipeline.add('news', data_processing.load_financial_news_data, params={'file_path': news_path},
+                 modules=[data_processing], key=news_fingerprint)
+    pipeline.add('text', data_processing.preprocess_text_data, deps=['news'], params={'text_col': text_col},
+                 modules=[data_processing], options={'n_workers': n_workers})
+    pipeline.add('sentiment', sentiment_tool.add_sentiment_to_df, deps=['text'],
+                 params={'text_column': f'processed_{text_col}'}, modules=[sentiment_tool],
+                 options={'n_workers': n_workers})
+    pipeline.add('daily_sentiment', daily_sentiment, deps=['sentiment'], params={'tickers': tickers},
+                 modules=[correlation_analysis, this_module])
+    pipeline.add('returns', ticker_returns,
+                 params={'tickers': tickers, 'csv_directory': os.path.abspath(csv_directory),
+                         'filename_template': filename_template, 'fingerprints': fingerprints},
+                 modules=[financial_analysis, correlation_analysis, this_module],
+                 options={'cache': cache, 'n_workers': n_workers, 'refresh': 'returns' in set(refresh)})
+    pipeline.add('correlation', lagged_correlations, deps=['daily_sentiment', 'returns'],
+                 params={'lags': lags, 'min_observations': min_observations,
+                         'timeframe': resampling.timeframe_key(timeframe)},
+                 modules=[correlation_analysis, correlation_matrix, resampling, this_module])
+    return pipeline
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Sentiment vs. lagged returns correlation pipeline.')
+    parser.add_argument('--news', default=config.NEWS_DATA_FILE_PATH, help='News CSV (analyst ratings layout).')
+    parser.add_argument('--prices-dir', default=config.STOCK_CSV_DIR_PATH, help='Directory of per-ticker CSVs.')
+    parser.add_argument('--tickers', nargs='+', default=None, help='Default: every ticker with a CSV.')
+    parser.add_argument('--lags', nargs='+', type=int, default=None)
+    parser.add_argument('--min-observations', type=int, default=config.CORRELATION_MIN_OBSERVATIONS)
+    parser.add_argument('--timeframe', default=None,
+                        help="Bars to correlate on: daily (default), weekly, monthly, an offset alias or a bar count.")
+    parser.add_argument('--workers', type=int, default=1, help='Processes for per-ticker and sentiment work.')
+    parser.add_argument('--cache-dir', default=config.PIPELINE_CACHE_DIR)
+    parser.add_argument('--no-cache', action='store_true')
+    parser.add_argument('--refresh', nargs='+', default=(), choices=STAGES, help='Recompute these stages.')
+    parser.add_argument('--output', help='Write the correlation table to this CSV.')
+    parser.add_argument('--metrics', help='Record stage metrics to this JSON-lines file.')
+    args = parser.parse_args(argv)
+
+    if args.metrics:
+        enable_metrics(args.metrics)
+    try:
+        pipeline = build_pipeline(args.news, args.prices_dir, args.tickers, args.lags,
+                                  min_observations=args.min_observations, n_workers=args.workers,
+                                  cache=None if args.no_cache else StageCache(args.cache_dir), refresh=args.refresh,
+                                  timeframe=int(args.timeframe) if str(args.timeframe).isdigit() else args.timeframe)
+        correlations = pipeline.run('correlation')
+    finally:
+        if args.metrics:
+            disable_metrics()
+
+    report(f"Stages computed: {', '.join(pipeline.executed) or 'none (all cached)'}")
+    print(correlations.to_string(index=False))
+    if args.output:
+        correlations.to_csv(args.output, index=False)
+        report(f"Correlations written to {args.output}")
+    return correlations
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,230 @@
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import uuid
+
+import pandas as pd
+from . import config, data_processing, financial_analysis
+
+STORE_FORMAT_VERSION = 1
+_ROW_ID_COLUMN = '__row_id'
+
+
+def code_fingerprint(*modules) -> str:
+    """Hash of the source of the modules whose output is cached; any code change invalidates."""
+    digest = hashlib.sha256(str(STORE_FORMAT_VERSION).encode())
+    for module in modules:
+        digest.update(inspect.getsource(module).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+def _file_hash(path: str, block_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def source_fingerprint(path: str, with_hash: bool = True) -> dict:
+    """Path, mtime and size of a source file, plus its SHA-256 when `with_hash`."""
+    stat = os.stat(path)
+    fingerprint = {'path': os.path.abspath(path), 'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+    if with_hash:
+        fingerprint['sha256'] = _file_hash(path)
+    return fingerprint
+
+
+def params_key(*parts) -> str:
+    """Short stable hash of JSON-serializable parts (others by str())."""
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode('utf-8')).hexdigest()[:16]
+
+
+class ProcessedDataStore:
+    """
+    Parquet cache under PROCESSED_DATA_DIR for processed news
+    (load_financial_news_data + preprocess_text_data + extract_date_features) and for
+    per-ticker price frames (load_stock_prices_from_csvs).
+    News is partitioned by ticker and publication year, prices by ticker and year.
+    An entry is rebuilt when its source file's mtime/size and content hash change,
+    or when the processing code changes.
+    """
+
+    def __init__(self, root: str = None, verify_hash: bool = False):
+        self.root = root or os.path.join(config.PROCESSED_DATA_DIR, 'store')
+        self.verify_hash = verify_hash  # Re-hash sources even when mtime and size match
+        os.makedirs(self.root, exist_ok=True)
+
+    # --- entry bookkeeping -------------------------------------------------
+
+    def _read_manifest(self, entry_dir: str):
+        try:
+            with open(os.path.join(entry_dir, 'manifest.json')) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _is_fresh(self, entry_dir: str, source_path: str, code_version: str) -> bool:
+        manifest = self._read_manifest(entry_dir)
+        if manifest is None or manifest.get('code_version') != code_version:
+            return False
+        stored = manifest['source']
+        current = source_fingerprint(source_path, with_hash=False)
+        unchanged_stat = current['mtime_ns'] == stored['mtime_ns'] and current['size'] == stored['size']
+        if unchanged_stat and not self.verify_hash:
+            return True
+        if current['size'] != stored['size'] or _file_hash(source_path) != stored['sha256']:
+            return False
+        if not unchanged_stat:
+            # Touched but identical content: refresh the stat part of the manifest
+            manifest['source'].update(current)
+            self._write_manifest(entry_dir, manifest)
+        return True
+
+    def _write_manifest(self, entry_dir: str, manifest: dict):
+        tmp_path = os.path.join(entry_dir, f'manifest.json.{uuid.uuid4().hex}')
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2, default=str)
+        os.replace(tmp_path, os.path.join(entry_dir, 'manifest.json'))
+
+    def _write_entry(self, entry_dir: str, df: pd.DataFrame, partition_cols: list, manifest: dict):
+        """Writes `df` as a partitioned dataset into a fresh directory, then swaps it in."""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        tmp_dir = f'{entry_dir}.tmp-{uuid.uuid4().hex}'
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        pq.write_to_dataset(table, os.path.join(tmp_dir, 'data'), partition_cols=partition_cols)
+        self._write_manifest(tmp_dir, manifest)
+        if os.path.exists(entry_dir):
+            shutil.rmtree(entry_dir)
+        os.replace(tmp_dir, entry_dir)
+
+    def _read_entry(self, entry_dir: str, columns: list = None, filters: list = None) -> pd.DataFrame:
+        import pyarrow.parquet as pq
+        manifest = self._read_manifest(entry_dir)
+        stored_columns = manifest['columns']
+        wanted = stored_columns if columns is None else [c for c in stored_columns if c in columns]
+        read_columns = wanted + ([_ROW_ID_COLUMN] if _ROW_ID_COLUMN in manifest['dtypes'] else [])
+        df = pq.read_table(os.path.join(entry_dir, 'data'), columns=read_columns,
+                           filters=filters or None).to_pandas()
+
+        if _ROW_ID_COLUMN in df.columns:
+            df = df.sort_values(_ROW_ID_COLUMN, kind='stable').drop(columns=_ROW_ID_COLUMN)
+        for col in manifest['partition_cols']:
+            if col in df.columns:
+                df[col] = df[col].astype(manifest['dtypes'][col])
+        return df[wanted].reset_index(drop=True)
+
+    # --- news --------------------------------------------------------------
+
+    def load_processed_news(self, file_path: str = config.NEWS_DATA_FILE_PATH,
+                            text_col: str = config.NEWS_HEADLINE_COLUMN,
+                            date_col: str = config.NEWS_DATE_COLUMN,
+                            columns: list = None, tickers: list = None, years: list = None,
+                            refresh: bool = False) -> pd.DataFrame:
+        """
+        Returns the processed news frame, building the cache entry on first use.
+        `columns`, `tickers` and `years` restrict what is read back from Parquet.
+        """
+        if not os.path.exists(file_path):
+            return self._process_news(file_path, text_col, date_col)
+
+        code_version = code_fingerprint(data_processing)
+        entry_dir = os.path.join(self.root, 'news', params_key(os.path.abspath(file_path), text_col, date_col))
+        if refresh or not self._is_fresh(entry_dir, file_path, code_version):
+            from pyarrow import ArrowException
+            df = self._process_news(file_path, text_col, date_col)
+            try:
+                self._write_news_entry(entry_dir, df, file_path, code_version)
+            except (ArrowException, TypeError, ValueError) as e:
+                print(f"Warning: could not cache processed news for {file_path}: {e}")
+                return df
+
+        filters = []
+        if tickers is not None:
+            filters.append((config.NEWS_STOCK_COLUMN, 'in', list(tickers)))
+        if years is not None:
+            filters.append(('publication_year', 'in', [int(y) for y in years]))
+        return self._read_entry(entry_dir, columns=columns, filters=filters)
+
+    def _process_news(self, file_path, text_col, date_col) -> pd.DataFrame:
+        df = data_processing.load_financial_news_data(file_path)
+        df = data_processing.preprocess_text_data(df, text_col=text_col)
+        return data_processing.extract_date_features(df, date_col=date_col)
+
+    def _write_news_entry(self, entry_dir, df, file_path, code_version):
+        partition_cols = [c for c in [config.NEWS_STOCK_COLUMN, 'publication_year'] if c in df.columns]
+        stored = df.reset_index(drop=True)
+        stored[_ROW_ID_COLUMN] = range(len(stored))
+        manifest = {
+            'source': source_fingerprint(file_path),
+            'code_version': code_version,
+            'columns': list(df.columns),
+            'partition_cols': partition_cols,
+            'dtypes': {col: str(dtype) for col, dtype in stored.dtypes.items()},
+        }
+        self._write_entry(entry_dir, stored, partition_cols, manifest)
+
+    # --- prices ------------------------------------------------------------
+
+    def load_stock_prices(self, tickers: list,
+                          csv_directory: str = config.STOCK_CSV_DIR_PATH,
+                          filename_template: str = config.STOCK_FILENAME_TEMPLATE,
+                          date_col: str = config.STOCK_DATE_COLUMN,
+                          required_ohlcv_cols: list = None,
+                          columns: list = None, start=None, end=None,
+                          refresh: bool = False) -> dict:
+        """
+        Cached equivalent of financial_analysis.load_stock_prices_from_csvs.
+        Each ticker is its own entry, so only tickers whose CSV changed are re-parsed.
+        `columns`, `start` and `end` restrict what is read back from Parquet.
+        """
+        if required_ohlcv_cols is None:
+            required_ohlcv_cols = list(config.STOCK_REQUIRED_OHLCV_COLUMNS)
+        code_version = code_fingerprint(financial_analysis)
+        params = params_key(os.path.abspath(csv_directory), filename_template, date_col, required_ohlcv_cols)
+
+        stock_data_dict = {}
+        for ticker_input in tickers:
+            ticker = str(ticker_input).upper()
+            file_path = os.path.join(csv_directory, filename_template.format(ticker))
+            if not os.path.exists(file_path):
+                continue
+
+            entry_dir = os.path.join(self.root, 'prices', params, f'ticker={ticker}')
+            if refresh or not self._is_fresh(entry_dir, file_path, code_version):
+                loaded = financial_analysis.load_stock_prices_from_csvs(
+                    [ticker], csv_directory, filename_template, date_col, required_ohlcv_cols)
+                if ticker not in loaded:
+                    continue
+                self._write_price_entry(entry_dir, loaded[ticker], file_path, code_version, date_col)
+
+            df = self._read_entry(entry_dir, columns=None if columns is None else [date_col] + list(columns),
+                                  filters=self._date_filters(date_col, start, end))
+            stock_data_dict[ticker] = df.set_index(date_col).sort_index()
+        return stock_data_dict
+
+    def _write_price_entry(self, entry_dir, df, file_path, code_version, date_col):
+        stored = df.reset_index()
+        stored['year'] = stored[date_col].dt.year
+        manifest = {
+            'source': source_fingerprint(file_path),
+            'code_version': code_version,
+            'columns': [c for c in stored.columns if c != 'year'],
+            'partition_cols': ['year'],
+            'dtypes': {col: str(dtype) for col, dtype in stored.dtypes.items()},
+        }
+        self._write_entry(entry_dir, stored, ['year'], manifest)
+
+    @staticmethod
+    def _date_filters(date_col, start, end) -> list:
+        filters = []
+        if start is not None:
+            start = pd.Timestamp(start)
+            filters += [('year', '>=', start.year), (date_col, '>=', start)]
+        if end is not None:
+            end = pd.Timestamp(end)
+            filters += [('year', '<=', end.year), (date_col, '<=', end)]
+        return filters
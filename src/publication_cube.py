@@ -0,0 +1,153 @@
+import numpy as np
+import pandas as pd
+
+from . import config
+
+WEEKDAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+DIMENSIONS = ('date', 'hour', 'weekday', 'year', 'month', 'publisher', 'stock')
+
+
+class PublicationCube:
+    """
+    Article counts per (day, hour, publisher, stock) cell, built in one pass from
+    integer-coded timestamps and factorized publisher/stock columns. Weekday, year and
+    month are derived from the day, so any rollup is a bincount or a groupby over the
+    cells rather than over the articles.
+    """
+
+    def __init__(self, cells: pd.DataFrame, publishers: pd.Index, stocks: pd.Index):
+        self.cells = cells  # int columns: day (days since epoch), hour, publisher, stock, count
+        self.publishers = publishers
+        self.stocks = stocks
+
+    def __len__(self):
+        return int(self.cells['count'].sum())
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, date_col: str = config.NEWS_DATE_COLUMN,
+                   publisher_col: str = 'publisher', stock_col: str = config.NEWS_STOCK_COLUMN) -> 'PublicationCube':
+        """Builds the cube from a news frame; hours and days are in the timestamps' own timezone."""
+        dates = pd.DatetimeIndex(pd.to_datetime(df[date_col], errors='coerce'))
+        if dates.tz is not None:
+            dates = dates.tz_localize(None)
+        valid = ~dates.isna()
+        local = dates.values[valid]
+        days = local.astype('datetime64[D]')
+        hours = ((local - days) // np.timedelta64(1, 'h')).astype(np.int64)
+
+        def codes_for(col):
+            if col not in df.columns:
+                return np.zeros(int(valid.sum()), dtype=np.int64), pd.Index([np.nan], dtype=object)
+            codes, uniques = pd.factorize(df[col].to_numpy(dtype=object)[valid], use_na_sentinel=False)
+            return codes.astype(np.int64), pd.Index(uniques, dtype=object)
+
+        publisher_codes, publishers = codes_for(publisher_col)
+        stock_codes, stocks = codes_for(stock_col)
+        return cls(cls._count_cells(days.astype(np.int64), hours, publisher_codes, stock_codes,
+                                    np.ones(len(hours), dtype=np.int64)), publishers, stocks)
+
+    @classmethod
+    def from_chunks(cls, chunks, **kwargs) -> 'PublicationCube':
+        """Builds the cube from an iterable of news frames (e.g. iter_financial_news_chunks)."""
+        cube = None
+        for chunk in chunks:
+            chunk_cube = cls.from_frame(chunk, **kwargs)
+            cube = chunk_cube if cube is None else cube.merge(chunk_cube)
+        return cube if cube is not None else cls.from_frame(pd.DataFrame({config.NEWS_DATE_COLUMN: []}))
+
+    @staticmethod
+    def _count_cells(days, hours, publishers, stocks, counts) -> pd.DataFrame:
+        n_publishers = int(publishers.max()) + 1 if len(publishers) else 1
+        n_stocks = int(stocks.max()) + 1 if len(stocks) else 1
+        first_day = int(days.min()) if len(days) else 0
+        packed = (((days - first_day) * 24 + hours) * n_publishers + publishers) * n_stocks + stocks
+        keys, inverse = np.unique(packed, return_inverse=True)
+        stock_codes = keys % n_stocks
+        rest = keys // n_stocks
+        publisher_codes = rest % n_publishers
+        rest //= n_publishers
+        return pd.DataFrame({
+            'day': (rest // 24 + first_day).astype(np.int32),
+            'hour': (rest % 24).astype(np.int8),
+            'publisher': publisher_codes.astype(np.int32),
+            'stock': stock_codes.astype(np.int32),
+            'count': np.bincount(inverse, counts, len(keys)).astype(np.int64),
+        })
+
+    def merge(self, other: 'PublicationCube') -> 'PublicationCube':
+        """Combined cube; categories are unioned and the other cube's codes remapped."""
+        publishers = self.publishers.append(other.publishers[~other.publishers.isin(self.publishers)])
+        stocks = self.stocks.append(other.stocks[~other.stocks.isin(self.stocks)])
+        other_publishers = publishers.get_indexer(other.publishers)[other.cells['publisher'].to_numpy()]
+        other_stocks = stocks.get_indexer(other.stocks)[other.cells['stock'].to_numpy()]
+
+        def column(name):
+            return np.concatenate([self.cells[name].to_numpy(np.int64), other.cells[name].to_numpy(np.int64)])
+
+        cells = self._count_cells(column('day'), column('hour'),
+                                  np.concatenate([self.cells['publisher'].to_numpy(np.int64), other_publishers]),
+                                  np.concatenate([self.cells['stock'].to_numpy(np.int64), other_stocks]),
+                                  column('count'))
+        return PublicationCube(cells, publishers, stocks)
+
+    def _dimension(self, name: str, cells: pd.DataFrame):
+        """(codes, labels) of a dimension for the given cells."""
+        days = cells['day'].to_numpy(np.int64)
+        if name == 'date':
+            first = int(days.min()) if len(days) else 0
+            labels = pd.DatetimeIndex((np.arange(int(days.max()) - first + 1 if len(days) else 0) + first)
+                                      .astype('datetime64[D]').astype('datetime64[ns]'))
+            return days - first, labels
+        if name == 'hour':
+            return cells['hour'].to_numpy(np.int64), pd.RangeIndex(24)
+        if name == 'weekday':
+            return (days + 3) % 7, pd.Index(WEEKDAY_NAMES)  # 1970-01-01 was a Thursday
+        if name in ('year', 'month'):
+            periods = days.astype('datetime64[D]').astype('datetime64[Y]' if name == 'year' else 'datetime64[M]')
+            codes = periods.astype(np.int64)
+            first = int(codes.min()) if len(codes) else 0
+            labels = (np.arange(int(codes.max()) - first + 1 if len(codes) else 0) + first)
+            if name == 'year':
+                return codes - first, pd.Index(labels + 1970)
+            return codes - first, pd.PeriodIndex(labels.astype('datetime64[M]'), freq='M')
+        if name in ('publisher', 'stock'):
+            return cells[name].to_numpy(np.int64), self.publishers if name == 'publisher' else self.stocks
+        raise ValueError(f"Unknown cube dimension '{name}'. Use one of {DIMENSIONS}.")
+
+    def _filtered_cells(self, publishers=None, stocks=None, start=None, end=None) -> pd.DataFrame:
+        mask = np.ones(len(self.cells), dtype=bool)
+        if publishers is not None:
+            mask &= np.isin(self.cells['publisher'], self.publishers.get_indexer(list(publishers)))
+        if stocks is not None:
+            mask &= np.isin(self.cells['stock'], self.stocks.get_indexer(list(stocks)))
+        if start is not None:
+            mask &= self.cells['day'].to_numpy() >= pd.Timestamp(start).to_datetime64().astype('datetime64[D]').astype(np.int64)
+        if end is not None:
+            mask &= self.cells['day'].to_numpy() <= pd.Timestamp(end).to_datetime64().astype('datetime64[D]').astype(np.int64)
+        return self.cells[mask]
+
+    def counts(self, by='date', publishers=None, stocks=None, start=None, end=None,
+               dropna: bool = True) -> pd.Series:
+        """
+        Article counts rolled up by one dimension or a list of them (see DIMENSIONS),
+        optionally restricted to some publishers/stocks and a [start, end] date range.
+        Only values with articles are returned; for one dimension they come in label order.
+        dropna=False keeps counts for missing publisher/stock values.
+        """
+        cells = self._filtered_cells(publishers, stocks, start, end)
+        dims = [by] if isinstance(by, str) else list(by)
+        coded = [self._dimension(dim, cells) for dim in dims]
+        weights = cells['count'].to_numpy()
+        if len(dims) == 1:
+            codes, labels = coded[0]
+            totals = np.bincount(codes, weights, len(labels)).astype(np.int64)
+            result = pd.Series(totals, index=labels.rename(dims[0]), name='count')
+            result = result[result > 0]
+        else:
+            frame = pd.DataFrame({dim: labels[codes] for dim, (codes, labels) in zip(dims, coded)})
+            frame['count'] = weights
+            result = frame.groupby(dims, sort=True, dropna=False)['count'].sum()
+        if dropna and any(dim in ('publisher', 'stock') for dim in dims):
+            index = result.index.to_frame(index=False)
+            result = result[~index[[d for d in dims if d in ('publisher', 'stock')]].isna().any(axis=1).to_numpy()]
+        return result
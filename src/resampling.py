@@ -0,0 +1,277 @@
+"""
+Resamples daily bars to weekly, monthly or custom timeframes for all tickers in one
+pass over a price panel: OHLCV bars, compounded close-to-close returns and
+article-weighted sentiment. A timeframe is a name in TIMEFRAMES, a single-period
+pandas offset alias ('W-WED', 'QE', 'BME', ...) or an integer number of trading
+bars. Bars are labelled like DataFrame.resample(closed='right', label='right'):
+by the period end date ('weekly' bars end on Fridays), or by the last date of an
+integer-bar bin.
+MultiTimeframePanel keeps the daily data and caches every timeframe derived from it.
+"""
+import numpy as np
+import pandas as pd
+
+from . import config
+from .financial_analysis import OHLCV_COLUMNS, PricePanel, build_price_panel
+from .instrumentation import instrumented
+
+TIMEFRAMES = {'daily': None, 'weekly': 'W-FRI', 'monthly': 'ME', 'quarterly': 'QE', 'yearly': 'YE'}
+FIELD_AGGREGATIONS = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}  # Others: last
+
+
+def timeframe_key(timeframe):
+    """
+    Canonical form of a timeframe: None for daily bars, an int for a bar count, else
+    the offset's alias ('weekly' and 'W-FRI' give the same key).
+    """
+    if timeframe is None:
+        return None
+    if isinstance(timeframe, (int, np.integer)) and not isinstance(timeframe, bool):
+        if timeframe < 1:
+            raise ValueError("An integer timeframe is a number of bars and must be at least 1.")
+        return None if timeframe == 1 else int(timeframe)
+    alias = TIMEFRAMES.get(str(timeframe).lower(), timeframe)
+    if alias is None:
+        return None
+    try:
+        offset = pd.tseries.frequencies.to_offset(alias)
+    except ValueError:
+        raise ValueError(f"Unknown timeframe '{timeframe}'. Use one of {list(TIMEFRAMES)}, "
+                         "a pandas offset alias or a number of bars.") from None
+    if offset.n != 1:
+        raise ValueError(f"Timeframe '{timeframe}' spans {offset.n} periods; use a single-period alias "
+                         "or an integer number of bars.")
+    return None if offset == pd.offsets.Day() else offset.freqstr
+
+
+def bin_labels(dates, timeframe, calendar: pd.DatetimeIndex = None) -> pd.DatetimeIndex:
+    """
+    The bar each date falls in, as its tz-naive label date (tz-aware dates are binned
+    on their config.MARKET_TIMEZONE day). Integer timeframes count
+    bars of `calendar` (sorted trading dates, required then) and put a non-trading
+    date in the bar of the next trading date; dates after the calendar get NaT.
+    """
+    key = timeframe_key(timeframe)
+    dates = pd.DatetimeIndex(dates)
+    if dates.tz is not None:
+        dates = dates.tz_convert(config.MARKET_TIMEZONE).tz_localize(None)
+    days = dates.normalize()
+    if key is None:
+        return days
+    unique_days, inverse = np.unique(days.values, return_inverse=True)
+    unique_days = pd.DatetimeIndex(unique_days)
+    if isinstance(key, int):
+        if calendar is None:
+            raise ValueError("Integer timeframes need the trading calendar the bars are counted on.")
+        positions = calendar.searchsorted(unique_days)
+        last = np.minimum((positions // key + 1) * key - 1, len(calendar) - 1)
+        labels = np.where(positions < len(calendar), calendar.values[last], np.datetime64('NaT'))
+        return pd.DatetimeIndex(labels[inverse])
+    # An anchored offset added to the day before lands on the first period end on or after the date
+    labels = (unique_days - pd.Timedelta(days=1)) + pd.tseries.frequencies.to_offset(key)
+    return pd.DatetimeIndex(labels.values[inverse])
+
+
+def _bins(dates: pd.DatetimeIndex, timeframe):
+    """(label per bar, first row of each bar) for sorted dates."""
+    labels = bin_labels(dates, timeframe, calendar=dates)
+    if len(labels) == 0:
+        return labels, np.empty(0, dtype=np.int64)
+    starts = np.flatnonzero(np.concatenate([[True], labels.values[1:] != labels.values[:-1]]))
+    return labels[starts], starts
+
+
+def _reduce_bins(values: np.ndarray, starts: np.ndarray, how: str) -> np.ndarray:
+    """Aggregates dates x tickers `values` over the row bins beginning at `starts`, ignoring NaN."""
+    valid = ~np.isnan(values)
+    if how == 'max':
+        return np.fmax.reduceat(values, starts, axis=0)
+    if how == 'min':
+        return np.fmin.reduceat(values, starts, axis=0)
+    if how == 'sum':
+        totals = np.add.reduceat(np.where(valid, values, 0.0), starts, axis=0)
+        return np.where(np.logical_or.reduceat(valid, starts, axis=0), totals, np.nan)
+    rows = np.arange(len(values))[:, None]
+    ends = np.append(starts[1:], len(values))[:, None]
+    if how == 'first':
+        picked = np.minimum.reduceat(np.where(valid, rows, len(values)), starts, axis=0)
+        found = picked < ends
+    else:
+        picked = np.maximum.reduceat(np.where(valid, rows, -1), starts, axis=0)
+        found = picked >= starts[:, None]
+    out = np.take_along_axis(values, np.clip(picked, 0, len(values) - 1), axis=0)
+    out[~found] = np.nan
+    return out
+
+
+@instrumented
+def resample_panel(panel: PricePanel, timeframe) -> PricePanel:
+    """PricePanel of `timeframe` bars; a ticker's bar is NaN where it has no daily bar in the period."""
+    if timeframe_key(timeframe) is None or len(panel.dates) == 0:
+        return panel
+    labels, starts = _bins(panel.dates, timeframe)
+    values = np.stack([_reduce_bins(panel.values[i], starts, FIELD_AGGREGATIONS.get(field, 'last'))
+                       for i, field in enumerate(panel.fields)]) if panel.fields else \
+        np.empty((0, len(labels), len(panel.tickers)))
+    return PricePanel(values, labels.rename(panel.dates.name), panel.tickers, panel.fields)
+
+
+def compounded_returns(close: np.ndarray) -> np.ndarray:
+    """Each bar's close over the same ticker's previous bar close, minus 1 (pct_change per ticker)."""
+    valid = ~np.isnan(close)
+    rows = np.arange(len(close))[:, None]
+    previous = np.maximum.accumulate(np.where(valid, rows, -1), axis=0)  # Last bar at or before each row
+    previous = np.vstack([np.full((1, close.shape[1]), -1), previous[:-1]]) if len(close) else previous
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = close / np.take_along_axis(close, np.maximum(previous, 0), axis=0) - 1.0
+    returns[(previous < 0) | ~valid] = np.nan
+    return returns
+
+
+def _numeric_fields(stock_data_dict: dict) -> list:
+    fields = [c for c in OHLCV_COLUMNS if any(c in df.columns for df in stock_data_dict.values())]
+    extra = {c: None for df in stock_data_dict.values() for c in df.columns
+             if c not in fields and pd.api.types.is_numeric_dtype(df[c])}
+    return fields + list(extra)
+
+
+def panel_to_frames(panel: PricePanel, price_col: str = 'Close') -> dict:
+    """{TICKER: df} with one column per field, keeping the dates where the ticker has a `price_col` value."""
+    has_bar = ~np.isnan(panel.values[panel.fields.index(price_col)]) if price_col in panel.fields else \
+        ~np.isnan(panel.values).all(axis=0)
+    frames = {}
+    for j, ticker in enumerate(panel.tickers):
+        rows = has_bar[:, j]
+        frames[ticker] = pd.DataFrame(panel.values[:, rows, j].T, index=panel.dates[rows], columns=panel.fields)
+    return frames
+
+
+def _daily_panel(stock_data_dict: dict) -> PricePanel:
+    panel = build_price_panel(stock_data_dict, fields=_numeric_fields(stock_data_dict))
+    return panel._replace(dates=panel.dates.rename(next(iter(stock_data_dict.values())).index.name))
+
+
+def _frames_with_returns(panel: PricePanel, returns: np.ndarray, price_col: str, return_col: str) -> dict:
+    frames = panel_to_frames(panel, price_col)
+    for j, ticker in enumerate(panel.tickers):
+        frames[ticker][return_col] = returns[panel.dates.get_indexer(frames[ticker].index), j]
+    return frames
+
+
+@instrumented
+def resample_stock_data(stock_data_dict: dict, timeframe, price_col: str = 'Close') -> dict:
+    """
+    {TICKER: daily df} -> {TICKER: `timeframe` bars} in one vectorized pass. OHLCV
+    columns follow FIELD_AGGREGATIONS and other numeric columns take the bar's last value
+    (recompute returns and indicators on the resampled closes).
+    """
+    if timeframe_key(timeframe) is None or not stock_data_dict:
+        return stock_data_dict
+    return panel_to_frames(resample_panel(_daily_panel(stock_data_dict), timeframe), price_col)
+
+
+def price_calendar(stock_data_dict: dict) -> pd.DatetimeIndex:
+    """Sorted union of the tickers' dates: the bars integer timeframes are counted on."""
+    if not stock_data_dict:
+        return pd.DatetimeIndex([])
+    return pd.DatetimeIndex(np.unique(np.concatenate([df.index.values for df in stock_data_dict.values()])))
+
+
+@instrumented
+def resample_returns(stock_data_dict: dict, timeframe, price_col: str = 'Close',
+                     return_col: str = config.STOCK_DAILY_RETURN_COLUMN) -> dict:
+    """resample_stock_data with `return_col` recomputed as each bar's compounded return."""
+    if timeframe_key(timeframe) is None or not stock_data_dict:
+        return stock_data_dict
+    panel = resample_panel(_daily_panel(stock_data_dict), timeframe)
+    if price_col not in panel.fields:
+        return panel_to_frames(panel, price_col)
+    returns = compounded_returns(panel.values[panel.fields.index(price_col)])
+    return _frames_with_returns(panel, returns, price_col, return_col)
+
+
+def resample_ohlcv(stock_df: pd.DataFrame, timeframe, price_col: str = 'Close') -> pd.DataFrame:
+    """One ticker's frame as `timeframe` bars (see resample_stock_data)."""
+    if timeframe_key(timeframe) is None or stock_df is None or stock_df.empty:
+        return stock_df
+    if not isinstance(stock_df.index, pd.DatetimeIndex):
+        raise ValueError("Resampling needs a DatetimeIndex on the price frame.")
+    return resample_stock_data({None: stock_df}, timeframe, price_col)[None]
+
+
+@instrumented
+def resample_sentiment(aggregated_sentiment_df: pd.DataFrame, timeframe, calendar: pd.DatetimeIndex = None,
+                       date_col=config.AGG_SENTIMENT_DATE_COLUMN, stock_col=config.AGG_SENTIMENT_STOCK_COLUMN,
+                       avg_col=config.AGG_SENTIMENT_AVG_SCORE_COLUMN,
+                       count_col=config.AGG_SENTIMENT_NUM_ARTICLES_COLUMN) -> pd.DataFrame:
+    """
+    Daily aggregate_daily_sentiment output -> `timeframe` bars: each bar's score is the
+    article-weighted mean of its days (the mean over all its articles) and the article
+    counts are summed. Integer timeframes count bars of `calendar`.
+    """
+    if timeframe_key(timeframe) is None or aggregated_sentiment_df.empty:
+        return aggregated_sentiment_df
+    counts = aggregated_sentiment_df[count_col].to_numpy(dtype=np.float64)
+    weighted = pd.DataFrame({
+        date_col: bin_labels(pd.to_datetime(aggregated_sentiment_df[date_col]), timeframe, calendar),
+        stock_col: aggregated_sentiment_df[stock_col].to_numpy(),
+        'score_sum': aggregated_sentiment_df[avg_col].to_numpy(dtype=np.float64) * counts,
+        count_col: counts,
+    }).dropna(subset=[date_col])
+    totals = weighted.groupby([date_col, stock_col], observed=True, sort=True)[['score_sum', count_col]].sum()
+    result = totals.reset_index()
+    result[avg_col] = result['score_sum'] / result[count_col].where(result[count_col] > 0)
+    result[count_col] = result[count_col].astype('int64')
+    return result[[date_col, stock_col, avg_col, count_col]]
+
+
+class MultiTimeframePanel:
+    """
+    Daily prices (and optionally aggregated daily sentiment) aligned once, with each
+    timeframe derived from them on first use and cached, so switching between daily,
+    weekly and monthly analysis never goes back to the source files.
+    """
+
+    def __init__(self, stock_data_dict: dict, aggregated_sentiment_df: pd.DataFrame = None,
+                 price_col: str = 'Close', return_col: str = config.STOCK_DAILY_RETURN_COLUMN):
+        self.price_col = price_col
+        self.return_col = return_col
+        daily = build_price_panel(stock_data_dict, fields=[c for c in OHLCV_COLUMNS
+                                                           if any(c in df.columns for df in stock_data_dict.values())])
+        self._daily_sentiment = aggregated_sentiment_df
+        self._prices = {None: daily}
+        self._returns = {}
+        self._sentiment = {}
+
+    @property
+    def tickers(self) -> list:
+        return self._prices[None].tickers
+
+    def prices(self, timeframe='daily') -> PricePanel:
+        key = timeframe_key(timeframe)
+        if key not in self._prices:
+            self._prices[key] = resample_panel(self._prices[None], key)
+        return self._prices[key]
+
+    def returns(self, timeframe='daily') -> pd.DataFrame:
+        """dates x tickers compounded returns of `timeframe` bars."""
+        key = timeframe_key(timeframe)
+        if key not in self._returns:
+            panel = self.prices(key)
+            close = panel.values[panel.fields.index(self.price_col)]
+            self._returns[key] = pd.DataFrame(compounded_returns(close), index=panel.dates, columns=panel.tickers)
+        return self._returns[key]
+
+    def stock_data(self, timeframe='daily') -> dict:
+        """{TICKER: `timeframe` OHLCV bars with a return column}, as merge_sentiment_with_returns takes."""
+        return _frames_with_returns(self.prices(timeframe), self.returns(timeframe).to_numpy(), self.price_col,
+                                    self.return_col)
+
+    def sentiment(self, timeframe='daily') -> pd.DataFrame:
+        """The aggregated daily sentiment as `timeframe` bars, labelled like the price bars."""
+        if self._daily_sentiment is None:
+            raise ValueError("This panel was built without aggregated sentiment.")
+        key = timeframe_key(timeframe)
+        if key not in self._sentiment:
+            self._sentiment[key] = resample_sentiment(self._daily_sentiment, key, calendar=self._prices[None].dates)
+        return self._sentiment[key]
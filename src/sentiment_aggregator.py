@@ -0,0 +1,173 @@
+import json
+
+import numpy as np
+import pandas as pd
+from . import config
+
+AGGREGATOR_FORMAT_VERSION = 1
+_CODE_BITS = 24  # Low bits of a key hold the ticker code, the rest the day number
+_CODE_MASK = (1 << _CODE_BITS) - 1
+_MAX_PENDING_RUNS = 8
+
+
+def _sum_by_key(keys: np.ndarray, sums: np.ndarray, counts: np.ndarray):
+    """Collapses (key, sum, count) rows to one row per key, sorted by key."""
+    unique_keys, inverse = np.unique(keys, return_inverse=True)
+    return (unique_keys, np.bincount(inverse, sums, len(unique_keys)),
+            np.bincount(inverse, counts, len(unique_keys)).astype(np.int64))
+
+
+class DailySentimentAggregator:
+    """
+    Running per-(day, stock) sentiment sums and counts, for archives that grow by a
+    batch of scored articles at a time. Each (day, ticker) pair is packed into one int64
+    key; totals live in sorted arrays, and new batches are kept as small sorted runs that
+    are folded in once they grow, so an update costs O(batch) amortized.
+    to_frame() gives the same output as correlation_analysis.aggregate_daily_sentiment
+    for day-level dates (timestamps are bucketed by their calendar day).
+    Aggregators built on separate workers combine with merge().
+    """
+
+    def __init__(self,
+                 date_col=config.AGG_SENTIMENT_DATE_COLUMN,
+                 stock_col=config.NEWS_STOCK_COLUMN,
+                 sentiment_col=config.SENTIMENT_SCORE_COLUMN,
+                 output_stock_col=config.AGG_SENTIMENT_STOCK_COLUMN,
+                 output_avg_sentiment_col=config.AGG_SENTIMENT_AVG_SCORE_COLUMN,
+                 output_num_articles_col=config.AGG_SENTIMENT_NUM_ARTICLES_COLUMN):
+        self.date_col = date_col
+        self.stock_col = stock_col
+        self.sentiment_col = sentiment_col
+        self.output_stock_col = output_stock_col
+        self.output_avg_sentiment_col = output_avg_sentiment_col
+        self.output_num_articles_col = output_num_articles_col
+        self.tickers = []
+        self._ticker_codes = {}
+        self._keys = np.empty(0, dtype=np.int64)
+        self._sums = np.empty(0, dtype=np.float64)
+        self._counts = np.empty(0, dtype=np.int64)
+        self._pending = []  # Sorted (keys, sums, counts) runs not yet folded into the totals
+
+    def __len__(self):
+        self._compact()
+        return len(self._keys)
+
+    def _ticker_code(self, ticker: str) -> int:
+        code = self._ticker_codes.get(ticker)
+        if code is None:
+            code = self._ticker_codes[ticker] = len(self.tickers)
+            self.tickers.append(ticker)
+            if code > _CODE_MASK:
+                raise ValueError("Too many distinct tickers for the aggregator key layout.")
+        return code
+
+    def _batch_keys(self, news_batch: pd.DataFrame):
+        dates = pd.DatetimeIndex(pd.to_datetime(news_batch[self.date_col], errors='coerce'))
+        if dates.tz is not None:
+            dates = dates.tz_localize(None)  # Calendar day as seen in the timestamps' own timezone
+        valid = ~dates.isna()
+        days = dates.values[valid].astype('datetime64[D]').astype(np.int64)
+
+        # Upper-case each distinct ticker once instead of every row
+        stock_codes, stock_uniques = pd.factorize(news_batch[self.stock_col].to_numpy(dtype=object)[valid],
+                                                  use_na_sentinel=False)
+        code_map = np.array([self._ticker_code(str(ticker).upper()) for ticker in stock_uniques], dtype=np.int64)
+        keys = (days << _CODE_BITS) | code_map[stock_codes]
+
+        scores = pd.to_numeric(news_batch[self.sentiment_col], errors='coerce').to_numpy(dtype=np.float64)[valid]
+        has_score = ~np.isnan(scores)
+        return _sum_by_key(keys, np.where(has_score, scores, 0.0), has_score.astype(np.int64))
+
+    def update(self, news_batch: pd.DataFrame, return_updates: bool = False):
+        """
+        Adds a batch of scored articles. With return_updates=True, returns the current
+        aggregate rows for just the (date, stock) keys the batch touched.
+        """
+        if news_batch is None or news_batch.empty or \
+                not all(c in news_batch.columns for c in [self.date_col, self.stock_col, self.sentiment_col]):
+            keys = np.empty(0, dtype=np.int64)
+        else:
+            run = self._batch_keys(news_batch)
+            self._add_run(run)
+            keys = run[0]
+        return self._frame(keys, *self._lookup(keys)) if return_updates else None
+
+    def _add_run(self, run):
+        if len(run[0]):
+            self._pending.append(run)
+        pending_rows = sum(len(r[0]) for r in self._pending)
+        if pending_rows > max(len(self._keys) // 4, 1 << 16):
+            self._compact()
+        elif len(self._pending) > _MAX_PENDING_RUNS:
+            self._pending = [_sum_by_key(*(np.concatenate(parts) for parts in zip(*self._pending)))]
+
+    def _compact(self):
+        if self._pending:
+            runs = [(self._keys, self._sums, self._counts)] + self._pending
+            self._keys, self._sums, self._counts = _sum_by_key(*(np.concatenate(parts) for parts in zip(*runs)))
+            self._pending = []
+
+    def _lookup(self, keys: np.ndarray):
+        """Current totals for sorted unique `keys`, summed over the totals and pending runs."""
+        sums = np.zeros(len(keys))
+        counts = np.zeros(len(keys), dtype=np.int64)
+        for run_keys, run_sums, run_counts in [(self._keys, self._sums, self._counts)] + self._pending:
+            if not len(run_keys):
+                continue
+            position = np.minimum(np.searchsorted(run_keys, keys), len(run_keys) - 1)
+            found = run_keys[position] == keys
+            sums[found] += run_sums[position[found]]
+            counts[found] += run_counts[position[found]]
+        return sums, counts
+
+    def merge(self, other: 'DailySentimentAggregator') -> 'DailySentimentAggregator':
+        """Folds another aggregator's totals (e.g. from a parallel worker) into this one."""
+        other._compact()
+        remap = np.array([self._ticker_code(ticker) for ticker in other.tickers], dtype=np.int64)
+        if len(other._keys):
+            keys = ((other._keys >> _CODE_BITS) << _CODE_BITS) | remap[other._keys & _CODE_MASK]
+            order = np.argsort(keys, kind='stable')
+            self._add_run((keys[order], other._sums[order], other._counts[order]))
+        return self
+
+    def _frame(self, keys, sums, counts) -> pd.DataFrame:
+        codes = keys & _CODE_MASK
+        # Same ordering as groupby([date, stock]): by day, then ticker name
+        ticker_rank = np.argsort(np.argsort(np.array(self.tickers, dtype=object))) if self.tickers else np.empty(0, int)
+        order = np.lexsort((ticker_rank[codes], keys >> _CODE_BITS))
+        keys, sums, counts, codes = keys[order], sums[order], counts[order], codes[order]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            averages = np.where(counts > 0, sums / counts, np.nan)
+        return pd.DataFrame({
+            config.AGG_SENTIMENT_DATE_COLUMN: (keys >> _CODE_BITS).astype('datetime64[D]').astype('datetime64[ns]'),
+            self.output_stock_col: np.array(self.tickers, dtype=object)[codes] if len(codes) else np.empty(0, dtype=object),
+            self.output_avg_sentiment_col: averages,
+            self.output_num_articles_col: counts,
+        })
+
+    def to_frame(self) -> pd.DataFrame:
+        """All aggregates, in the aggregate_daily_sentiment layout."""
+        self._compact()
+        return self._frame(self._keys, self._sums, self._counts)
+
+    def save(self, path: str):
+        """Writes the totals and ticker table to a single .npz file."""
+        self._compact()
+        meta = {'format_version': AGGREGATOR_FORMAT_VERSION,
+                'columns': [self.date_col, self.stock_col, self.sentiment_col, self.output_stock_col,
+                            self.output_avg_sentiment_col, self.output_num_articles_col]}
+        with open(path, 'wb') as f:
+            np.savez(f, keys=self._keys, sums=self._sums, counts=self._counts,
+                     tickers=np.array(self.tickers, dtype=str), meta=np.array(json.dumps(meta)))
+
+    @classmethod
+    def load(cls, path: str) -> 'DailySentimentAggregator':
+        with np.load(path) as data:
+            meta = json.loads(str(data['meta']))
+            if meta['format_version'] != AGGREGATOR_FORMAT_VERSION:
+                raise ValueError(f"Unsupported aggregator format {meta['format_version']} in {path}.")
+            aggregator = cls(*meta['columns'])
+            for ticker in data['tickers'].tolist():
+                aggregator._ticker_code(ticker)
+            aggregator._keys, aggregator._sums, aggregator._counts = data['keys'], data['sums'], data['counts']
+        return aggregator
@@ -0,0 +1,125 @@
+import hashlib
+import os
+import sqlite3
+import time
+from importlib import metadata
+
+import numpy as np
+from . import config
+
+
+def get_analyzer_version() -> str:
+    """Version tag of the installed VADER package, used as part of every cache key."""
+    try:
+        return f"vaderSentiment-{metadata.version('vaderSentiment')}"
+    except metadata.PackageNotFoundError:
+        return "vaderSentiment-unknown"
+
+
+def normalize_text(text: str) -> str:
+    """Collapses whitespace; VADER tokenizes on whitespace so scores are unchanged."""
+    return " ".join(text.split())
+
+
+class SentimentCache:
+    """
+    Persistent, content-addressed store of VADER scores (neg, neu, pos, compound).
+    Entries are keyed by a hash of the normalized text and the analyzer version,
+    kept in SQLite and evicted least-recently-used once `max_entries` is exceeded.
+    """
+
+    _BATCH = 500  # Keys per SQL statement (stays under SQLite's parameter limit)
+
+    def __init__(self, path: str = config.SENTIMENT_CACHE_PATH,
+                 max_entries: int = config.SENTIMENT_CACHE_MAX_ENTRIES,
+                 analyzer_version: str = None):
+        self.path = path
+        self.max_entries = max_entries
+        self.analyzer_version = analyzer_version or get_analyzer_version()
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sentiment ("
+            "key BLOB PRIMARY KEY, neg REAL, neu REAL, pos REAL, compound REAL, "
+            "last_used INTEGER NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS sentiment_last_used ON sentiment(last_used)")
+        self._conn.commit()
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM sentiment").fetchone()[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._conn.close()
+
+    def clear(self):
+        self._conn.execute("DELETE FROM sentiment")
+        self._conn.commit()
+
+    def make_keys(self, texts) -> list:
+        prefix = self.analyzer_version.encode('utf-8') + b'\x00'
+        return [hashlib.blake2b(prefix + normalize_text(text).encode('utf-8'), digest_size=16).digest()
+                for text in texts]
+
+    def get_many(self, texts):
+        """
+        Looks up scores for `texts`.
+        Returns (scores, found): an (n, 4) float array and a boolean hit mask.
+        Hits are marked as recently used.
+        """
+        keys = self.make_keys(texts)
+        # Repeated texts (or ones that normalize alike) share a key; look each key up once
+        unique_keys, inverse = np.unique(np.array(keys, dtype=object), return_inverse=True)
+        unique_keys = unique_keys.tolist()
+        unique_scores = np.full((len(unique_keys), 4), np.nan, dtype=np.float64)
+        unique_found = np.zeros(len(unique_keys), dtype=bool)
+        positions = {key: i for i, key in enumerate(unique_keys)}
+        hit_keys = []
+
+        for start in range(0, len(unique_keys), self._BATCH):
+            batch = unique_keys[start:start + self._BATCH]
+            rows = self._conn.execute(
+                f"SELECT key, neg, neu, pos, compound FROM sentiment WHERE key IN ({','.join('?' * len(batch))})",
+                batch
+            ).fetchall()
+            for key, *values in rows:
+                unique_scores[positions[key]] = values
+                unique_found[positions[key]] = True
+                hit_keys.append(key)
+        scores, found = unique_scores[inverse], unique_found[inverse]
+
+        if hit_keys:
+            now = time.time_ns()
+            self._conn.executemany("UPDATE sentiment SET last_used = ? WHERE key = ?",
+                                   ((now, key) for key in hit_keys))
+            self._conn.commit()
+        return scores, found
+
+    def put_many(self, texts, scores):
+        """Stores an (n, 4) score array for `texts`, then enforces the size cap."""
+        if len(texts) == 0:
+            return
+        now = time.time_ns()
+        rows = ((key, *map(float, row), now) for key, row in zip(self.make_keys(texts), np.asarray(scores)))
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO sentiment (key, neg, neu, pos, compound, last_used) VALUES (?, ?, ?, ?, ?, ?)",
+            rows
+        )
+        self._evict()
+        self._conn.commit()
+
+    def _evict(self):
+        excess = len(self) - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM sentiment WHERE key IN "
+                "(SELECT key FROM sentiment ORDER BY last_used ASC LIMIT ?)",
+                (excess,)
+            )
@@ -1,38 +1,161 @@
 # src/sentiment_tool.py
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 import pandas as pd
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 
-analyzer = SentimentIntensityAnalyzer()
+from .instrumentation import instrumented, report
+from .memory_mode import compact_mode_enabled, score_dtype, working_copy
+
+SENTIMENT_FIELDS = ['neg', 'neu', 'pos', 'compound']
+DEFAULT_CHUNK_SIZE = 10_000
+POSITIVE_THRESHOLD = 0.05
+NEGATIVE_THRESHOLD = -0.05
+NEUTRAL_SCORES = (0.0, 1.0, 0.0, 0.0)  # neg, neu, pos, compound
+
+_analyzer = None
+
+
+def get_analyzer():
+    """The process-wide VADER analyzer, imported and built on first use."""
+    global _analyzer
+    if _analyzer is None:
+        from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+        _analyzer = SentimentIntensityAnalyzer()
+    return _analyzer
+
+
+def __getattr__(name):
+    # Keeps the old module-level `analyzer` attribute working without building it at import
+    if name == 'analyzer':
+        return get_analyzer()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 def get_sentiment_scores_vader(text):
     if not isinstance(text, str):
         return {'neg': 0.0, 'neu': 1.0, 'pos': 0.0, 'compound': 0.0}
-    vs = analyzer.polarity_scores(text)
+    vs = get_analyzer().polarity_scores(text)
     return vs
 
-def add_sentiment_to_df(df: pd.DataFrame, text_column: str) -> pd.DataFrame:
+
+def _init_sentiment_worker():
+    """Process-pool initializer: builds one analyzer per worker process."""
+    get_analyzer()
+
+
+def _score_chunk(texts) -> np.ndarray:
+    """Scores a chunk of texts into an (n, 4) float array ordered as SENTIMENT_FIELDS."""
+    chunk_analyzer = get_analyzer()
+    scores = np.empty((len(texts), len(SENTIMENT_FIELDS)), dtype=np.float64)
+    scores[:] = NEUTRAL_SCORES  # Non-string input is scored as fully neutral
+    for i, text in enumerate(texts):
+        if isinstance(text, str):
+            vs = chunk_analyzer.polarity_scores(text)
+            scores[i] = (vs['neg'], vs['neu'], vs['pos'], vs['compound'])
+    return scores
+
+
+@instrumented
+def score_sentiment_batch(texts, n_workers: int = 1, chunk_size: int = DEFAULT_CHUNK_SIZE) -> np.ndarray:
+    """
+    Scores a sequence of texts with VADER and returns an (n, 4) float64 array
+    with columns ordered as SENTIMENT_FIELDS.
+    n_workers > 1 spreads chunks of `chunk_size` texts over a process pool;
+    n_workers=None uses all available cores.
+    """
+    texts = list(texts)
+    n_texts = len(texts)
+    if chunk_size is None or chunk_size < 1:
+        chunk_size = DEFAULT_CHUNK_SIZE
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+
+    scores = np.empty((n_texts, len(SENTIMENT_FIELDS)), dtype=np.float64)
+    starts = range(0, n_texts, chunk_size)
+
+    if n_workers <= 1 or n_texts <= chunk_size:
+        for start in starts:
+            scores[start:start + chunk_size] = _score_chunk(texts[start:start + chunk_size])
+        return scores
+
+    with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_sentiment_worker) as executor:
+        chunks = (texts[start:start + chunk_size] for start in starts)
+        for start, chunk_scores in zip(starts, executor.map(_score_chunk, chunks)):
+            scores[start:start + len(chunk_scores)] = chunk_scores
+    return scores
+
+
+def label_sentiment(compound_scores) -> np.ndarray:
+    """Vectorized positive/negative/neutral labelling of compound scores."""
+    compound_scores = np.asarray(compound_scores, dtype=np.float64)
+    return np.select(
+        [compound_scores >= POSITIVE_THRESHOLD, compound_scores <= NEGATIVE_THRESHOLD],
+        ['positive', 'negative'],
+        default='neutral'
+    ).astype(object)
+
+
+@instrumented
+def score_unique_texts(texts, n_workers: int = 1, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                       cache=None) -> np.ndarray:
+    """
+    Scores texts after in-batch deduplication: each distinct string is scored once
+    (or read from `cache`, a SentimentCache) and the scores are mapped back to all rows.
+    """
+    codes, uniques = pd.factorize(pd.Series(texts, dtype=object), use_na_sentinel=True)
+    uniques = np.asarray(uniques, dtype=object)
+    unique_scores = np.empty((len(uniques), len(SENTIMENT_FIELDS)), dtype=np.float64)
+
+    if cache is not None:
+        is_text = np.array([isinstance(text, str) for text in uniques], dtype=bool)
+        cached_scores, found = cache.get_many(uniques[is_text])
+        found_mask = np.zeros(len(uniques), dtype=bool)
+        found_mask[is_text] = found
+        unique_scores[found_mask] = cached_scores[found]
+        to_score = ~found_mask
+        unique_scores[to_score] = score_sentiment_batch(uniques[to_score], n_workers=n_workers,
+                                                        chunk_size=chunk_size)
+        new_text = to_score & is_text
+        cache.put_many(uniques[new_text], unique_scores[new_text])
+    else:
+        unique_scores[:] = score_sentiment_batch(uniques, n_workers=n_workers, chunk_size=chunk_size)
+
+    scores = np.empty((len(codes), len(SENTIMENT_FIELDS)), dtype=np.float64)
+    scores[:] = NEUTRAL_SCORES  # Missing text gets the neutral default
+    valid = codes >= 0
+    scores[valid] = unique_scores[codes[valid]]
+    return scores
+
+
+@instrumented
+def add_sentiment_to_df(df: pd.DataFrame, text_column: str,
+                        n_workers: int = 1, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                        cache=None) -> pd.DataFrame:
+    """
+    Adds sentiment_neg/neu/pos/compound and sentiment_label columns.
+    Only distinct texts are scored (see score_unique_texts); pass a SentimentCache
+    as `cache` to reuse scores across runs.
+    """
     if df is None or text_column not in df.columns:
-        print(f"Error: DataFrame is None or text column '{text_column}' not found.")
+        report(f"Error: DataFrame is None or text column '{text_column}' not found.")
         return df if df is not None else pd.DataFrame()
 
-    df_copy = df.copy()
-    sentiment_scores_list = df_copy[text_column].apply(get_sentiment_scores_vader)
-    sentiment_df = pd.json_normalize(sentiment_scores_list)
-    sentiment_df.columns = [f'sentiment_{col}' for col in sentiment_df.columns]
-    
-    df_with_sentiment = pd.concat([df_copy, sentiment_df.set_index(df_copy.index)], axis=1)
-    
-    def sentiment_label(compound_score):
-        if compound_score >= 0.05: return 'positive'
-        elif compound_score <= -0.05: return 'negative'
-        else: return 'neutral'
-            
-    df_with_sentiment['sentiment_label'] = df_with_sentiment['sentiment_compound'].apply(sentiment_label)
-    print(f"Sentiment scores added to DataFrame using column '{text_column}'.")
+    df_with_sentiment = working_copy(df)
+    scores = score_unique_texts(df_with_sentiment[text_column].to_numpy(dtype=object),
+                                n_workers=n_workers, chunk_size=chunk_size, cache=cache)
+
+    for i, field in enumerate(SENTIMENT_FIELDS):
+        df_with_sentiment[f'sentiment_{field}'] = scores[:, i].astype(score_dtype(), copy=False)
+    labels = label_sentiment(scores[:, 3])
+    df_with_sentiment['sentiment_label'] = pd.Categorical(labels) if compact_mode_enabled() else labels
+    report(f"Sentiment scores added to DataFrame using column '{text_column}'.")
     return df_with_sentiment
 
+
 if __name__ == '__main__':
     sample_data = {'processed_headline': ['good news today', 'bad news yesterday', 'neutral statement']}
     sample_df = pd.DataFrame(sample_data)
     result_df = add_sentiment_to_df(sample_df, 'processed_headline')
-    print(result_df)
\ No newline at end of file
+    print(result_df)
@@ -0,0 +1,150 @@
+import numpy as np
+import pandas as pd
+from pandas.tseries.holiday import (AbstractHolidayCalendar, GoodFriday, Holiday, USLaborDay,
+                                    USMartinLutherKingJr, USMemorialDay, USPresidentsDay,
+                                    USThanksgivingDay, nearest_workday)
+from . import config
+
+_UTC_OFFSET_PATTERN = r'(?:Z|[+-]\d{2}:?\d{2})$'
+
+
+class NYSEHolidayCalendar(AbstractHolidayCalendar):
+    """Full-day NYSE holidays (early closes are not modelled)."""
+    rules = [
+        Holiday('New Years Day', month=1, day=1, observance=nearest_workday),
+        USMartinLutherKingJr,
+        USPresidentsDay,
+        GoodFriday,
+        USMemorialDay,
+        Holiday('Juneteenth', month=6, day=19, start_date='2022-01-01', observance=nearest_workday),
+        Holiday('Independence Day', month=7, day=4, observance=nearest_workday),
+        USLaborDay,
+        USThanksgivingDay,
+        Holiday('Christmas', month=12, day=25, observance=nearest_workday),
+    ]
+
+
+def market_holidays(start, end, extra_closures=None) -> pd.DatetimeIndex:
+    """NYSE holidays plus `extra_closures` (default config.MARKET_EXTRA_CLOSURES) in [start, end]."""
+    if extra_closures is None:
+        extra_closures = config.MARKET_EXTRA_CLOSURES
+    holidays = NYSEHolidayCalendar().holidays(start=start, end=end)
+    extra = pd.DatetimeIndex(pd.to_datetime(list(extra_closures)))
+    extra = extra[(extra >= pd.Timestamp(start)) & (extra <= pd.Timestamp(end))]
+    # A Saturday New Year's Day is observed on Friday Dec 31 by the rule but the NYSE stays open
+    holidays = holidays[~((holidays.month == 12) & (holidays.day == 31))]
+    return holidays.union(extra)
+
+
+def trading_sessions(start, end, holidays=None) -> pd.DatetimeIndex:
+    """Weekday session dates in [start, end], skipping `holidays` (default: market_holidays)."""
+    start, end = pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize()
+    if holidays is None:
+        holidays = market_holidays(start, end)
+    return pd.bdate_range(start, end, freq='C', holidays=list(holidays))
+
+
+def to_market_time(timestamps, timezone: str = config.MARKET_TIMEZONE) -> pd.DatetimeIndex:
+    """
+    Converts timestamps to naive exchange-local time. Tz-aware values (including
+    strings with mixed UTC offsets) are converted; naive values are taken as local already.
+    """
+    timestamps = pd.Series(timestamps)
+    if pd.api.types.is_datetime64_any_dtype(timestamps):
+        local = pd.DatetimeIndex(timestamps)
+        if local.tz is not None:
+            local = local.tz_convert(timezone).tz_localize(None)
+        return local.as_unit('ns')
+
+    # Strings or datetime objects: only the ones carrying an offset are converted
+    text = timestamps.astype(str).str.strip()
+    aware = text.str.contains(_UTC_OFFSET_PATTERN, regex=True).to_numpy()
+    local = np.full(len(text), np.datetime64('NaT'), dtype='datetime64[ns]')
+    if aware.any():
+        converted = pd.DatetimeIndex(pd.to_datetime(text[aware], errors='coerce', utc=True, format='ISO8601'))
+        local[aware] = converted.tz_convert(timezone).tz_localize(None).as_unit('ns').to_numpy()
+    if not aware.all():
+        naive = pd.DatetimeIndex(pd.to_datetime(text[~aware], errors='coerce', format='ISO8601'))
+        local[~aware] = naive.as_unit('ns').to_numpy()
+    return pd.DatetimeIndex(local)
+
+
+def _close_offset(market_close: str) -> pd.Timedelta:
+    return pd.Timedelta(f'{market_close}:00' if market_close.count(':') == 1 else market_close)
+
+
+def align_to_sessions(timestamps, sessions=None,
+                      market_close: str = config.MARKET_CLOSE_TIME,
+                      timezone: str = config.MARKET_TIMEZONE,
+                      holidays=None) -> pd.DatetimeIndex:
+    """
+    Maps each timestamp to its effective trading session: the same day when it falls
+    before that day's close, otherwise the next session (weekends and holidays roll
+    forward). `sessions` defaults to the calendar covering the timestamps; pass the
+    dates actually present in the price data to align to those instead.
+    Timestamps after the last session map to NaT.
+    """
+    local = to_market_time(timestamps, timezone)
+    if sessions is None:
+        valid = local[~local.isna()]
+        if len(valid) == 0:
+            return pd.DatetimeIndex([pd.NaT] * len(local))
+        sessions = trading_sessions(valid.min(), valid.max() + pd.Timedelta(days=10), holidays)
+    sessions = pd.DatetimeIndex(sessions).normalize().unique().sort_values().as_unit('ns')
+    session_closes = (sessions + _close_offset(market_close)).asi8
+
+    # First session whose close is strictly after the timestamp
+    position = np.searchsorted(session_closes, local.asi8, side='right')
+    in_range = ~local.isna() & (position < len(sessions))
+    aligned = np.full(len(local), np.datetime64('NaT'), dtype='datetime64[ns]')
+    aligned[in_range] = sessions.values[position[in_range]]
+    return pd.DatetimeIndex(aligned)
+
+
+def align_news_to_sessions(news_df: pd.DataFrame, stock_data_dict: dict = None,
+                           date_col: str = config.NEWS_DATE_COLUMN,
+                           stock_col: str = config.NEWS_STOCK_COLUMN,
+                           output_col: str = config.NEWS_SESSION_DATE_COLUMN,
+                           market_close: str = config.MARKET_CLOSE_TIME,
+                           timezone: str = config.MARKET_TIMEZONE,
+                           holidays=None) -> pd.DataFrame:
+    """
+    Adds `output_col` with the trading session each article belongs to (see
+    align_to_sessions). Without `stock_data_dict` every article uses the market calendar.
+    With {TICKER: price df} each article is matched to the next close of its own ticker's
+    price dates, for all tickers in one merge_asof; articles of tickers without prices get NaT.
+    Aggregate on the new column (aggregate_daily_sentiment(..., date_col=output_col))
+    and the result joins exactly to the price index.
+    """
+    if news_df is None or date_col not in news_df.columns:
+        print(f"Error: DataFrame is None or date column '{date_col}' not found.")
+        return news_df if news_df is not None else pd.DataFrame()
+
+    df = news_df.copy()
+    if stock_data_dict is None:
+        df[output_col] = align_to_sessions(df[date_col], market_close=market_close,
+                                           timezone=timezone, holidays=holidays)
+        return df
+
+    close_offset = _close_offset(market_close)
+    session_frames = [pd.DataFrame({'ticker_key': str(ticker).upper(),
+                                    output_col: pd.DatetimeIndex(prices.index).normalize().unique().as_unit('ns')})
+                      for ticker, prices in stock_data_dict.items() if prices is not None and len(prices)]
+    if not session_frames:
+        df[output_col] = pd.NaT
+        return df
+    sessions = pd.concat(session_frames, ignore_index=True)
+    sessions['session_close'] = sessions[output_col] + close_offset
+
+    articles = pd.DataFrame({'ticker_key': df[stock_col].astype(str).str.upper().to_numpy(),
+                             'local_time': to_market_time(df[date_col], timezone),
+                             'row': np.arange(len(df))})
+    articles = articles.dropna(subset=['local_time']).sort_values('local_time', kind='stable')
+    matched = pd.merge_asof(articles, sessions.sort_values('session_close'),
+                            left_on='local_time', right_on='session_close', by='ticker_key',
+                            direction='forward', allow_exact_matches=False)
+
+    aligned = np.full(len(df), np.datetime64('NaT'), dtype='datetime64[ns]')
+    aligned[matched['row'].to_numpy()] = matched[output_col].to_numpy()
+    df[output_col] = aligned
+    return df
@@ -1,86 +1,256 @@
 
-import matplotlib.pyplot as plt
-import seaborn as sns
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 import pandas as pd
 
-def plot_stock_with_indicators(stock_df: pd.DataFrame, ticker: str, 
-                               price_col='Close', sma_cols=['SMA_20', 'SMA_50'], 
-                               rsi_col='RSI_14', macd_cols=['MACD', 'MACD_signal']):
-    """Plots stock price with SMA, RSI, and MACD."""
 
-    plot_df = stock_df.dropna(subset=sma_cols + [rsi_col] + macd_cols).copy()
-    if plot_df.empty:
-     
+def _plotting():
+    """Imports matplotlib/seaborn on first use so importing this module stays cheap."""
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    return plt, sns
+
+
+DEFAULT_DPI = 100
+STOCK_FIGSIZE = (14, 12)
+PRICE_ONLY_FIGSIZE = (14, 7)
+SCATTER_FIGSIZE = (10, 6)
+SCATTER_MAX_POINTS = 20_000  # Above this, correlation plots switch from a scatter to a hexbin density
+
+
+def lttb_indices(x, y, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: indices of `n_out` points (first and last included)
+    that keep the visual shape of the line y(x). Returns all indices when n_out >= len(x).
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)  # n_out - 2 buckets between the end points
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    anchor = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], max(edges[i + 1], edges[i] + 1)
+        if i < n_out - 3:
+            next_start, next_end = edges[i + 1], max(edges[i + 2], edges[i + 1] + 1)
+            next_x, next_y = x[next_start:next_end].mean(), y[next_start:next_end].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+        area = np.abs((x[anchor] - next_x) * (y[start:end] - y[anchor])
+                      - (x[anchor] - x[start:end]) * (next_y - y[anchor]))
+        anchor = start + int(np.argmax(area))
+        selected[i + 1] = anchor
+    return selected
+
+
+def _downsampled(series: pd.Series, max_points: int = None):
+    """(x, y) of a series without NaNs, LTTB-downsampled to `max_points` when given."""
+    series = series[series.notna()]
+    x, y = series.index, series.to_numpy(dtype=np.float64)
+    if max_points and len(series) > max_points:
+        keep = lttb_indices(x.asi8 if isinstance(x, pd.DatetimeIndex) else np.asarray(x, dtype=np.float64),
+                            y, max_points)
+        x, y = x[keep], y[keep]
+    return x, y
+
+
+def _draw_stock_with_indicators(fig, stock_df: pd.DataFrame, ticker: str, price_col='Close',
+                                sma_cols=('SMA_20', 'SMA_50'), rsi_col='RSI_14',
+                                macd_cols=('MACD', 'MACD_signal'), max_points: int = None) -> bool:
+    """
+    Draws the indicator chart onto `fig`. With max_points every line is LTTB-downsampled
+    and the MACD histogram is drawn as one filled step area instead of a bar per day.
+    Returns False when only the price could be drawn.
+    """
+    sma_cols, macd_cols = list(sma_cols), list(macd_cols)
+    complete = stock_df[sma_cols + [rsi_col] + macd_cols].notna().all(axis=1) \
+        if all(c in stock_df.columns for c in sma_cols + [rsi_col] + macd_cols) else None
+    if complete is None or not complete.any():
         if price_col in stock_df.columns:
-            plt.figure(figsize=(14, 7))
-            stock_df[price_col].plot(label=f'{ticker} {price_col}')
-            plt.title(f'{ticker} {price_col}')
-            plt.legend()
-            plt.show()
-        return
+            fig.set_size_inches(PRICE_ONLY_FIGSIZE)
+            ax = fig.subplots()
+            ax.plot(*_downsampled(stock_df[price_col], max_points), label=f'{ticker} {price_col}')
+            ax.set_title(f'{ticker} {price_col}')
+            ax.legend()
+        return False
+    plot_df = stock_df[complete]
 
-    fig, axes = plt.subplots(3, 1, figsize=(14, 12), sharex=True, 
-                             gridspec_kw={'height_ratios': [3, 1, 1]})
+    axes = fig.subplots(3, 1, sharex=True, gridspec_kw={'height_ratios': [3, 1, 1]})
     fig.suptitle(f'Technical Indicators for {ticker}', fontsize=16)
 
-    axes[0].plot(plot_df.index, plot_df[price_col], label=f'{ticker} {price_col}', color='blue')
+    axes[0].plot(*_downsampled(plot_df[price_col], max_points), label=f'{ticker} {price_col}', color='blue')
     if sma_cols[0] in plot_df.columns:
-        axes[0].plot(plot_df.index, plot_df[sma_cols[0]], label=sma_cols[0], color='orange', alpha=0.7)
+        axes[0].plot(*_downsampled(plot_df[sma_cols[0]], max_points), label=sma_cols[0], color='orange', alpha=0.7)
     if sma_cols[1] in plot_df.columns:
-        axes[0].plot(plot_df.index, plot_df[sma_cols[1]], label=sma_cols[1], color='green', alpha=0.7)
+        axes[0].plot(*_downsampled(plot_df[sma_cols[1]], max_points), label=sma_cols[1], color='green', alpha=0.7)
     axes[0].set_ylabel('Price')
     axes[0].legend()
     axes[0].grid(True)
 
+    axes[1].plot(*_downsampled(plot_df[rsi_col], max_points), label=rsi_col, color='purple')
+    axes[1].axhline(70, color='red', linestyle='--', alpha=0.5, label='Overbought (70)')
+    axes[1].axhline(30, color='green', linestyle='--', alpha=0.5, label='Oversold (30)')
+    axes[1].set_ylabel('RSI')
+    axes[1].legend()
+    axes[1].grid(True)
 
-    if rsi_col in plot_df.columns:
-        axes[1].plot(plot_df.index, plot_df[rsi_col], label=rsi_col, color='purple')
-        axes[1].axhline(70, color='red', linestyle='--', alpha=0.5, label='Overbought (70)')
-        axes[1].axhline(30, color='green', linestyle='--', alpha=0.5, label='Oversold (30)')
-        axes[1].set_ylabel('RSI')
-        axes[1].legend()
-        axes[1].grid(True)
-
-    
-    if macd_cols[0] in plot_df.columns and macd_cols[1] in plot_df.columns:
-        axes[2].plot(plot_df.index, plot_df[macd_cols[0]], label=macd_cols[0], color='red')
-        axes[2].plot(plot_df.index, plot_df[macd_cols[1]], label=macd_cols[1], color='cyan')
-        if 'MACD_hist' in plot_df.columns: 
-             axes[2].bar(plot_df.index, plot_df['MACD_hist'], label='MACD Hist', color='grey', alpha=0.5, width=0.7)
-        axes[2].set_ylabel('MACD')
-        axes[2].legend()
-        axes[2].grid(True)
-    
-    plt.xlabel('Date')
-    plt.tight_layout(rect=[0, 0, 1, 0.96]) 
-    plt.show()
+    axes[2].plot(*_downsampled(plot_df[macd_cols[0]], max_points), label=macd_cols[0], color='red')
+    axes[2].plot(*_downsampled(plot_df[macd_cols[1]], max_points), label=macd_cols[1], color='cyan')
+    if 'MACD_hist' in plot_df.columns:
+        if max_points:
+            hist_x, hist_y = _downsampled(plot_df['MACD_hist'], max_points)
+            axes[2].fill_between(hist_x, 0, hist_y, step='mid', label='MACD Hist', color='grey', alpha=0.5)
+        else:
+            axes[2].bar(plot_df.index, plot_df['MACD_hist'], label='MACD Hist', color='grey', alpha=0.5, width=0.7)
+    axes[2].set_ylabel('MACD')
+    axes[2].legend()
+    axes[2].grid(True)
+    axes[2].set_xlabel('Date')
+    fig.tight_layout(rect=[0, 0, 1, 0.96])
+    return True
 
 
+def plot_stock_with_indicators(stock_df: pd.DataFrame, ticker: str, 
+                               price_col='Close', sma_cols=['SMA_20', 'SMA_50'], 
+                               rsi_col='RSI_14', macd_cols=['MACD', 'MACD_signal'],
+                               output_path: str = None, downsample: bool = False, dpi: int = None):
+    """
+    Plots stock price with SMA, RSI, and MACD.
+    With output_path the chart is written to that file (format from the extension)
+    instead of shown; downsample=True reduces each line to the figure's pixel width.
+    """
+    if output_path is not None:
+        return _render_stock_chart((stock_df, ticker, str(output_path), price_col, sma_cols, rsi_col,
+                                    macd_cols, downsample, dpi or DEFAULT_DPI))
+    plt, _ = _plotting()
+    fig = plt.figure(figsize=STOCK_FIGSIZE, dpi=dpi)
+    _draw_stock_with_indicators(fig, stock_df, ticker, price_col, sma_cols, rsi_col, macd_cols,
+                                max_points=int(STOCK_FIGSIZE[0] * fig.dpi) if downsample else None)
+    if fig.axes:
+        plt.show()
+    else:
+        plt.close(fig)
 
-def plot_correlation_scatter(df: pd.DataFrame, x_col: str, y_col: str, title: str, stock_symbol:str =""):
-    """Plots a scatter plot for correlation analysis."""
-    if df is None or df.empty or x_col not in df.columns or y_col not in df.columns:
-        print(f"Cannot plot correlation for {stock_symbol}: DataFrame is empty or columns missing.")
-        return
-    
-    plt.figure(figsize=(10, 6))
-    sns.scatterplot(data=df, x=x_col, y=y_col, alpha=0.5)
-   
-    if df[[x_col, y_col]].dropna().shape[0] >= 2: 
+
+def _render_stock_chart(args) -> str:
+    """Draws one ticker's chart on a pyplot-free Agg figure and saves it; returns the path."""
+    from matplotlib.figure import Figure
+    stock_df, ticker, output_path, price_col, sma_cols, rsi_col, macd_cols, downsample, dpi = args
+    fig = Figure(figsize=STOCK_FIGSIZE, dpi=dpi)
+    _draw_stock_with_indicators(fig, stock_df, ticker, price_col, sma_cols, rsi_col, macd_cols,
+                                max_points=int(STOCK_FIGSIZE[0] * dpi) if downsample else None)
+    fig.savefig(output_path)
+    return output_path
+
+
+def _use_agg_backend():
+    """Process-pool initializer: renders headless in every worker."""
+    import matplotlib
+    matplotlib.use('Agg')
+
+
+def _render_many(render, tasks: list, n_workers: int) -> list:
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+    if n_workers <= 1 or len(tasks) <= 1:
+        return [render(task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=n_workers, initializer=_use_agg_backend) as executor:
+        return list(executor.map(render, tasks))
+
+
+def render_stock_charts(stock_data_dict: dict, output_dir: str, fmt: str = 'png', n_workers: int = 1,
+                        price_col='Close', sma_cols=('SMA_20', 'SMA_50'), rsi_col='RSI_14',
+                        macd_cols=('MACD', 'MACD_signal'), downsample: bool = True, dpi: int = DEFAULT_DPI) -> dict:
+    """
+    Batch version of plot_stock_with_indicators for {TICKER: df with indicators}:
+    writes <output_dir>/<TICKER>_indicators.<fmt> (png, svg, pdf...) without any GUI,
+    spreading tickers over `n_workers` processes (None = all cores).
+    Returns {TICKER: path}.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    tasks = [(df, ticker, os.path.join(output_dir, f'{ticker}_indicators.{fmt}'), price_col, list(sma_cols),
+              rsi_col, list(macd_cols), downsample, dpi)
+             for ticker, df in stock_data_dict.items() if df is not None and not df.empty]
+    return dict(zip([task[1] for task in tasks], _render_many(_render_stock_chart, tasks, n_workers)))
+
+
+def _draw_correlation_scatter(ax, df: pd.DataFrame, x_col: str, y_col: str, title: str,
+                              stock_symbol: str = "", max_points: int = SCATTER_MAX_POINTS):
+    """Scatter of x vs y with the Pearson correlation in the title; a hexbin density above max_points."""
+    points = df[[x_col, y_col]].dropna()
+    if max_points and len(points) > max_points:
+        image = ax.hexbin(points[x_col].to_numpy(), points[y_col].to_numpy(), gridsize=80, mincnt=1,
+                          bins='log', cmap='viridis')
+        ax.figure.colorbar(image, ax=ax, label='Points (log)')
+    else:
+        _, sns = _plotting()
+        sns.scatterplot(data=df, x=x_col, y=y_col, alpha=0.5, ax=ax)
+
+    if points.shape[0] >= 2:
         correlation = df[x_col].corr(df[y_col])
         plot_title = f'{title} for {stock_symbol}\nCorrelation: {correlation:.2f}'
     else:
         plot_title = f'{title} for {stock_symbol}\nCorrelation: N/A (insufficient data)'
-    
-    plt.title(plot_title)
-    plt.xlabel(x_col.replace('_', ' ').title())
-    plt.ylabel(y_col.replace('_', ' ').title())
-    plt.grid(True)
-    plt.axhline(0, color='grey', linestyle='--')
-    plt.axvline(0, color='grey', linestyle='--')
-    plt.tight_layout()
+
+    ax.set_title(plot_title)
+    ax.set_xlabel(x_col.replace('_', ' ').title())
+    ax.set_ylabel(y_col.replace('_', ' ').title())
+    ax.grid(True)
+    ax.axhline(0, color='grey', linestyle='--')
+    ax.axvline(0, color='grey', linestyle='--')
+
+
+def plot_correlation_scatter(df: pd.DataFrame, x_col: str, y_col: str, title: str, stock_symbol:str ="",
+                             output_path: str = None, max_points: int = SCATTER_MAX_POINTS, dpi: int = None):
+    """
+    Plots a scatter plot for correlation analysis.
+    Point sets larger than `max_points` are drawn as a hexbin density; with output_path
+    the chart is written to that file instead of shown.
+    """
+    if df is None or df.empty or x_col not in df.columns or y_col not in df.columns:
+        print(f"Cannot plot correlation for {stock_symbol}: DataFrame is empty or columns missing.")
+        return
+    if output_path is not None:
+        return _render_correlation_scatter((df, x_col, y_col, title, stock_symbol, str(output_path), max_points,
+                                            dpi or DEFAULT_DPI))
+
+    plt, _ = _plotting()
+    fig = plt.figure(figsize=SCATTER_FIGSIZE, dpi=dpi)
+    _draw_correlation_scatter(fig.add_subplot(), df, x_col, y_col, title, stock_symbol, max_points)
+    fig.tight_layout()
     plt.show()
-    
+
+
+def _render_correlation_scatter(args) -> str:
+    from matplotlib.figure import Figure
+    df, x_col, y_col, title, stock_symbol, output_path, max_points, dpi = args
+    fig = Figure(figsize=SCATTER_FIGSIZE, dpi=dpi)
+    _draw_correlation_scatter(fig.add_subplot(), df, x_col, y_col, title, stock_symbol, max_points)
+    fig.tight_layout()
+    fig.savefig(output_path)
+    return output_path
+
+
+def render_correlation_scatters(merged_df: pd.DataFrame, output_dir: str, x_col: str, y_col: str,
+                                title: str = 'Sentiment vs. Return', group_col: str = 'stock_symbol',
+                                fmt: str = 'png', n_workers: int = 1, max_points: int = SCATTER_MAX_POINTS,
+                                dpi: int = DEFAULT_DPI) -> dict:
+    """
+    Batch plot_correlation_scatter: one <output_dir>/<group>_correlation.<fmt> per value of
+    `group_col`, rendered headless over `n_workers` processes. Returns {group: path}.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    tasks = [(group, x_col, y_col, title, str(key), os.path.join(output_dir, f'{key}_correlation.{fmt}'),
+              max_points, dpi)
+             for key, group in merged_df.groupby(group_col, sort=True)]
+    return dict(zip([task[4] for task in tasks], _render_many(_render_correlation_scatter, tasks, n_workers)))
+
+
 if __name__ == '__main__':
      corr_data = pd.DataFrame({
          'avg_sentiment_compound': [0.1, -0.2, 0.5, 0.0, -0.5, 0.8, -0.1, 0.3, 0.2, -0.3],
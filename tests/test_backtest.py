@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.synthetic_data import make_stock_data_dict
+from src import backtest
+
+
+def _data(seed=5):
+    rng = np.random.default_rng(seed)
+    stock_dict = make_stock_data_dict(6, 260, seed=seed)
+    stock_dict = {t: df[rng.random(len(df)) > 0.05] for t, df in stock_dict.items()}  # A few missing bars
+    sentiment = pd.concat([pd.DataFrame({'date_sentiment': df.index[rng.random(len(df)) < 0.6], 'stock_symbol': t})
+                           for t, df in stock_dict.items()], ignore_index=True)
+    sentiment['avg_sentiment_score'] = rng.normal(0.0, 0.3, len(sentiment))
+    return backtest.prepare_backtest_data(stock_dict, sentiment)
+
+
+def _reference_returns(data, window, threshold, rsi_limit, macd_filter, trend_filter, holding_days, cost_bps):
+    """One combination, looped over tickers with pandas."""
+    ind = {name: pd.DataFrame(values, index=data.dates) for name, values in data.indicators.items()}
+    forward = pd.DataFrame(data.forward_returns, index=data.dates)
+    signal = pd.DataFrame(data.sentiment, index=data.dates).rolling(window, min_periods=1).mean().astype(np.float32)
+    pnl = pd.Series(0.0, index=data.dates)
+    for j in range(len(data.tickers)):
+        macd, macd_signal = ind['MACD'][j], ind['MACD_signal'][j]
+        sides = []
+        for sign in (1, -1):
+            above = sign * (macd - macd_signal) > 0
+            entry = (signal[j] * sign >= np.float32(threshold)) & forward[j].notna()
+            if rsi_limit < 100:
+                entry &= (ind['RSI'][j] < rsi_limit) if sign == 1 else (ind['RSI'][j] > 100 - rsi_limit)
+            if macd_filter == 'above':
+                entry &= above
+            elif macd_filter == 'cross':
+                entry &= above & ~above.shift(1, fill_value=False)
+            if trend_filter:
+                entry &= sign * (ind['SMA_fast'][j] - ind['SMA_slow'][j]) > 0
+            sides.append(entry.astype(int).rolling(holding_days, min_periods=1).max())
+        position = sides[0] - sides[1]
+        pnl += position * forward[j].fillna(0.0) - cost_bps / 10_000 * position.diff().fillna(position).abs()
+    return pnl / np.maximum((~np.isnan(data.close)).sum(axis=1), 1)
+
+
+def test_sweep_matches_looped_reference():
+    data = _data()
+    grid = {'sentiment_window': [1, 3], 'sentiment_threshold': [0.1, 0.25], 'rsi_limit': [100, 65],
+            'macd_filter': ['none', 'above', 'cross'], 'trend_filter': [False, True], 'holding_days': [1, 4]}
+    result = backtest.run_parameter_sweep(data, grid, cost_bps=10, chunk_size=7)
+    assert len(result) == 2 * 2 * 2 * 3 * 2 * 2
+
+    active = ~np.isnan(data.forward_returns).all(axis=1)
+    for _, row in result.iloc[::9].iterrows():
+        params = row[list(backtest.PARAMETERS)]
+        expected = _reference_returns(data, row['sentiment_window'], row['sentiment_threshold'], row['rsi_limit'],
+                                      row['macd_filter'], row['trend_filter'], row['holding_days'], 10)
+        simulated = backtest.simulate(data, cost_bps=10, **params.to_dict())
+        np.testing.assert_allclose(simulated['return'], expected, atol=1e-12)
+        returns = expected[active]
+        assert np.isclose(row['sharpe'], returns.mean() / returns.std() * np.sqrt(252))
+        equity = (1 + returns).cumprod()
+        assert np.isclose(row['max_drawdown'], (1 - equity / equity.cummax().clip(lower=1.0)).max())
+        assert np.isclose(row['turnover'], simulated['turnover'][active].mean())
+
+    parallel = backtest.run_parameter_sweep(data, grid, cost_bps=10, chunk_size=7, n_workers=2)
+    pd.testing.assert_frame_equal(parallel, result)
+
+
+def test_parameter_grid_rejects_unknown_parameters():
+    with pytest.raises(ValueError, match='stop_loss'):
+        backtest.parameter_grid({'stop_loss': [0.1]})
@@ -0,0 +1,52 @@
+import json
+
+import pandas as pd
+import pytest
+
+from scripts import benchmark_suite
+from scripts.synthetic_data import make_news_frame, make_stock_data_dict, make_tickers
+from src.financial_analysis import load_stock_prices_from_csvs
+
+
+def test_synthetic_data_is_deterministic_and_loadable(tmp_path):
+    news = make_news_frame(5_000, n_tickers=30, duplicate_rate=0.4, seed=3)
+    pd.testing.assert_frame_equal(news, make_news_frame(5_000, n_tickers=30, duplicate_rate=0.4, seed=3))
+    assert news['headline'].nunique() <= 3_000
+    assert set(news['stock']) <= set(make_tickers(30))
+    assert news['date'].is_monotonic_increasing
+
+    stock_dict = make_stock_data_dict(4, 300, seed=1)
+    for ticker, df in stock_dict.items():
+        df.to_csv(tmp_path / f'{ticker}_historical_data.csv')
+    loaded = load_stock_prices_from_csvs(list(stock_dict), str(tmp_path))
+    pd.testing.assert_series_equal(loaded['B']['Close'], stock_dict['B']['Close'], check_freq=False)
+
+
+def test_suite_writes_results_and_flags_regressions(tmp_path):
+    results = benchmark_suite.run_suite(
+        ['tiny'], cases=['aggregate_daily_sentiment', 'merge_sentiment_with_returns', 'calculate_pearson_correlation'],
+        repeat=1, scale_specs={'tiny': {'headlines': 2_000, 'tickers': 5, 'days': 400}}, log=lambda _: None)
+    json.loads(json.dumps(results))
+    entry = results['results']['merge_sentiment_with_returns']['tiny']
+    assert entry['rows'] > 0 and entry['seconds'] > 0 and entry['peak_mb'] > 0
+
+    assert benchmark_suite.find_regressions(results, results) == []
+    slower = json.loads(json.dumps(results))
+    slower['results']['merge_sentiment_with_returns']['tiny']['seconds'] += 1.0
+    regressions = benchmark_suite.find_regressions(slower, results, threshold=0.25)
+    assert len(regressions) == 1 and regressions[0].startswith('merge_sentiment_with_returns [tiny]')
+
+
+def test_cases_missing_optional_data_are_skipped_but_errors_raise(monkeypatch):
+    spec = {'tiny': {'headlines': 200, 'tickers': 2, 'days': 50}}
+    monkeypatch.setattr(benchmark_suite.data_processing, 'ensure_nltk_resources', lambda **kwargs: ['stopwords'])
+    results = benchmark_suite.run_suite(['tiny'], cases=['preprocess_text_data'], repeat=1, scale_specs=spec,
+                                        log=lambda _: None)
+    assert results['results']['preprocess_text_data']['tiny'] == {'skipped': 'missing NLTK stopwords'}
+
+    def broken(workload):
+        raise KeyError('Close')
+
+    monkeypatch.setitem(benchmark_suite.CASES, 'broken', (broken, len))
+    with pytest.raises(KeyError):
+        benchmark_suite.run_suite(['tiny'], cases=['broken'], repeat=1, scale_specs=spec, log=lambda _: None)
@@ -0,0 +1,62 @@
+import pandas as pd
+import pytest
+
+from src import correlation_analysis
+from src.data_processing import iter_financial_news_chunks, load_financial_news_data
+from src.sentiment_tool import add_sentiment_to_df
+
+
+def _write_news_csv(path):
+    pd.DataFrame({
+        'headline': ['Stock soars on great earnings', 'Shares fall after weak guidance',
+                     'Analyst upgrades stock', 'Company misses estimates',
+                     'Stock soars on great earnings', 'Neutral update', 'Bad quarter'] * 3,
+        'url': ['u'] * 21,
+        'publisher': ['NewsHub', 'FinanceTimes', 'NewsHub', 'Wire', 'Wire', 'NewsHub', 'Wire'] * 3,
+        'date': ['2020-06-01', '2020-06-01', '2020-06-02', 'not a date',
+                 '2020-06-02', '2020-06-03', '2020-06-03'] * 3,
+        'stock': ['aapl', 'AAPL', 'msft', 'MSFT', 'aapl', 'msft', 'AAPL'] * 3,
+    }).to_csv(path)
+
+
+def test_chunks_are_typed_and_trimmed(tmp_path):
+    path = tmp_path / 'news.csv'
+    _write_news_csv(path)
+
+    chunks = list(iter_financial_news_chunks(str(path), chunksize=5))
+    assert len(chunks) == 5
+    assert sum(len(c) for c in chunks) == 18  # Unparseable dates dropped per chunk
+    for chunk in chunks:
+        assert list(chunk.columns) == ['headline', 'publisher', 'date', 'stock']
+        assert isinstance(chunk['stock'].dtype, pd.CategoricalDtype)
+        assert chunk['date'].dtype == 'datetime64[ns, UTC]'
+
+
+@pytest.mark.filterwarnings('error::UserWarning')
+def test_chunk_dates_do_not_depend_on_chunk_boundaries(tmp_path):
+    path = tmp_path / 'news.csv'
+    pd.DataFrame({'headline': ['a', 'b', 'c', 'd'], 'stock': ['AAPL'] * 4,
+                  'date': ['2020-06-01 10:00:00-04:00', '2020-06-01 11:00:00-04:00',
+                           '2020-01-02 10:00:00-05:00', '2020-06-02 10:00:00-04:00']}).to_csv(path, index=False)
+
+    chunks = list(iter_financial_news_chunks(str(path), chunksize=2))  # One single-offset chunk, one mixed
+    assert [chunk['date'].dtype for chunk in chunks] == ['datetime64[ns, UTC]'] * 2
+    assert list(pd.concat(chunks)['date']) == list(pd.to_datetime(
+        ['2020-06-01 14:00', '2020-06-01 15:00', '2020-01-02 15:00', '2020-06-02 14:00'], utc=True))
+
+
+def test_chunked_aggregation_matches_full_frame(tmp_path):
+    path = tmp_path / 'news.csv'
+    _write_news_csv(path)
+
+    full = add_sentiment_to_df(load_financial_news_data(str(path)), 'headline')
+    full['date'] = full['date'].dt.tz_localize('UTC')  # The chunks hold UTC dates
+    expected = correlation_analysis.aggregate_daily_sentiment(
+        full, date_col='date', sentiment_col='sentiment_compound')
+
+    scored_chunks = (add_sentiment_to_df(chunk, 'headline')
+                     for chunk in iter_financial_news_chunks(str(path), chunksize=4))
+    result = correlation_analysis.aggregate_daily_sentiment_chunked(
+        scored_chunks, date_col='date', sentiment_col='sentiment_compound', compact_every=2)
+
+    pd.testing.assert_frame_equal(result, expected, check_exact=False)
@@ -0,0 +1,156 @@
+import numpy as np
+import pandas as pd
+
+from src import config, correlation_analysis
+
+
+def _reference_merge(sentiment, stock_dict, lag_days):
+    """The original per-ticker loop of merge_sentiment_with_returns, kept as the reference."""
+    parts = []
+    for ticker, stock_df in stock_dict.items():
+        rows = sentiment[sentiment['stock_symbol'] == ticker]
+        if rows.empty or 'daily_return' not in stock_df.columns:
+            continue
+        returns = stock_df[['daily_return']].copy()
+        returns['shifted_return'] = returns['daily_return'].shift(-lag_days)
+        returns.index.name = 'date_return'
+        merged = pd.merge(rows[['date_sentiment', 'avg_sentiment_score', 'num_articles']],
+                          returns[['shifted_return']].reset_index(),
+                          left_on='date_sentiment', right_on='date_return', how='inner')
+        if not merged.empty:
+            merged['stock_symbol'] = ticker
+            parts.append(merged.rename(columns={'shifted_return': 'daily_return'}))
+    return pd.concat(parts, ignore_index=True)
+
+
+def _sample_inputs():
+    rng = np.random.default_rng(11)
+    stock_dict = {}
+    for i, ticker in enumerate(['AAA', 'BBB', 'CCC']):
+        dates = pd.bdate_range('2021-01-01', periods=30 + 5 * i, name='Date')
+        close = 20 * np.exp(np.cumsum(rng.normal(0, 0.01, len(dates))))
+        stock_dict[ticker] = correlation_analysis.calculate_daily_stock_returns(pd.DataFrame({'Close': close}, index=dates))
+    stock_dict['NORET'] = pd.DataFrame({'Close': [1.0]}, index=pd.DatetimeIndex(['2021-01-04'], name='Date'))
+
+    rows = [(date, ticker, rng.normal(), int(rng.integers(1, 5)))
+            for ticker in ['CCC', 'AAA', 'ZZZ', 'NORET']
+            for date in pd.date_range('2020-12-28', '2021-02-20')[rng.random(55) < 0.6]]
+    rng.shuffle(rows)
+    sentiment = pd.DataFrame(rows, columns=['date_sentiment', 'stock_symbol', 'avg_sentiment_score', 'num_articles'])
+    return sentiment, stock_dict
+
+
+def test_multi_lag_merge_matches_per_ticker_loop():
+    sentiment, stock_dict = _sample_inputs()
+    lags = [0, 1, -1, 3]
+    merged = correlation_analysis.merge_sentiment_with_lagged_returns(sentiment, stock_dict, lags=lags)
+
+    assert list(merged[config.MERGED_LAG_COLUMN].unique()) == lags
+    for lag in lags:
+        expected = _reference_merge(sentiment, stock_dict, lag)
+        single = correlation_analysis.merge_sentiment_with_returns(sentiment, stock_dict, lag_days=lag)
+        pd.testing.assert_frame_equal(single, expected)
+        from_multi = merged[merged[config.MERGED_LAG_COLUMN] == lag].drop(columns=config.MERGED_LAG_COLUMN)
+        pd.testing.assert_frame_equal(from_multi.reset_index(drop=True), expected)
+
+
+def test_merge_without_matches_returns_empty_frame():
+    sentiment, stock_dict = _sample_inputs()
+    only_unknown = sentiment[sentiment['stock_symbol'] == 'ZZZ']
+    assert correlation_analysis.merge_sentiment_with_returns(only_unknown, stock_dict).empty
+    assert correlation_analysis.merge_sentiment_with_lagged_returns(sentiment.iloc[:0], stock_dict).empty
+
+
+def _merged_for_windows():
+    sentiment, stock_dict = _sample_inputs()
+    merged = correlation_analysis.merge_sentiment_with_lagged_returns(sentiment, stock_dict, lags=[0, 1])
+    merged.loc[merged.index[[3, 40]], 'daily_return'] = np.nan
+    merged.loc[merged.index[10:30], 'avg_sentiment_score'] = merged['avg_sentiment_score'].round(0)  # Ties
+    return merged
+
+
+def test_windowed_pearson_matches_pandas_rolling():
+    merged = _merged_for_windows()
+    for window in [None, 10, '21D']:
+        result = correlation_analysis.calculate_windowed_correlation(merged, window=window, min_observations=5)
+        for (ticker, lag), group in merged.dropna().groupby(['stock_symbol', 'lag_days']):
+            group = group.sort_values('date_sentiment', kind='stable')
+            x, y = group['avg_sentiment_score'], group['daily_return']
+            if window is None:
+                expected = x.expanding(min_periods=5).corr(y)
+            elif isinstance(window, str):
+                expected = x.set_axis(group['date_sentiment']).rolling(window, min_periods=5).corr(
+                    y.set_axis(group['date_sentiment']))
+            else:
+                expected = x.rolling(window, min_periods=5).corr(y)
+            got = result[(result['stock_symbol'] == ticker) & (result['lag_days'] == lag)]
+            np.testing.assert_allclose(got['correlation'].to_numpy(), expected.to_numpy(), rtol=1e-9, atol=1e-9,
+                                       err_msg=f'{ticker} {lag} {window}')
+
+
+def test_windowed_spearman_and_constant_windows():
+    merged = _merged_for_windows()
+    merged['avg_sentiment_score'] = merged['avg_sentiment_score'].round(1)  # Plenty of tied ranks
+    result = correlation_analysis.calculate_windowed_correlation(merged, window=8, method='spearman', min_observations=4)
+    group = merged.dropna()
+    group = group[(group['stock_symbol'] == 'AAA') & (group['lag_days'] == 1)].sort_values('date_sentiment')
+    got = result[(result['stock_symbol'] == 'AAA') & (result['lag_days'] == 1)]['correlation'].to_numpy()
+    for i in range(3, len(group)):
+        window = group.iloc[max(0, i - 7):i + 1]
+        expected = window['avg_sentiment_score'].corr(window['daily_return'], method='spearman')
+        np.testing.assert_allclose(got[i], expected, rtol=1e-12, atol=1e-12)
+
+    flat = merged.assign(avg_sentiment_score=0.25)
+    flat_result = correlation_analysis.calculate_windowed_correlation(flat, window=10, min_observations=3)
+    assert flat_result['correlation'].isna().all()
+    assert flat_result['n_obs'].max() == 10
+
+
+def test_expanding_spearman_on_long_series_is_blocked_by_window_width():
+    rng = np.random.default_rng(5)
+    n = 2_000
+    merged = pd.DataFrame({'stock_symbol': 'AAA', 'lag_days': 0,
+                           'date_sentiment': pd.bdate_range('2010-01-01', periods=n),
+                           'avg_sentiment_score': rng.normal(size=n).round(1),
+                           'daily_return': rng.normal(size=n)})
+    result = correlation_analysis.calculate_windowed_correlation(merged, window=None, method='spearman',
+                                                                 min_observations=5)
+    for i in [4, 999, n - 1]:
+        window = merged.iloc[:i + 1]
+        expected = window['avg_sentiment_score'].corr(window['daily_return'], method='spearman')
+        np.testing.assert_allclose(result['correlation'].iloc[i], expected, rtol=1e-10)
+
+    x, y = merged['avg_sentiment_score'].to_numpy(), merged['daily_return'].to_numpy()
+    starts = np.zeros(n, dtype=np.int64)
+    np.testing.assert_allclose(correlation_analysis._windowed_spearman(x, y, starts, block_elements=100_000),
+                               correlation_analysis._windowed_spearman(x, y, starts), rtol=1e-12)
+
+
+def test_correlation_significance_is_reproducible_and_sensible():
+    rng = np.random.default_rng(2)
+    n = 120
+    dates = pd.bdate_range('2022-01-03', periods=n)
+    signal = rng.normal(size=n)
+    merged = pd.concat([
+        pd.DataFrame({'stock_symbol': 'LINKED', 'date_sentiment': dates, 'avg_sentiment_score': signal,
+                      'daily_return': 0.8 * signal + rng.normal(0, 0.5, n)}),
+        pd.DataFrame({'stock_symbol': 'NOISE', 'date_sentiment': dates, 'avg_sentiment_score': rng.normal(size=n),
+                      'daily_return': rng.normal(size=n)}),
+        pd.DataFrame({'stock_symbol': 'FEW', 'date_sentiment': dates[:5], 'avg_sentiment_score': rng.normal(size=5),
+                      'daily_return': rng.normal(size=5)}),
+    ], ignore_index=True)
+
+    kwargs = dict(n_permutations=999, n_bootstrap=500, seed=42, batch_size=128)
+    serial = correlation_analysis.calculate_correlation_significance(merged, **kwargs)
+    parallel = correlation_analysis.calculate_correlation_significance(merged, n_workers=2, **kwargs)
+    pd.testing.assert_frame_equal(serial, parallel)
+
+    stats = serial.set_index('stock_symbol')
+    for ticker in ['LINKED', 'NOISE']:
+        group = merged[merged['stock_symbol'] == ticker]
+        expected, n_obs = correlation_analysis.calculate_pearson_correlation(group, 'avg_sentiment_score', 'daily_return')
+        assert np.isclose(stats.loc[ticker, 'correlation'], expected) and stats.loc[ticker, 'n_obs'] == n_obs
+        assert stats.loc[ticker, 'ci_lower'] <= stats.loc[ticker, 'correlation'] <= stats.loc[ticker, 'ci_upper']
+    assert stats.loc['LINKED', 'p_value'] == 1 / 1000
+    assert stats.loc['NOISE', 'p_value'] > 0.01
+    assert stats.loc['FEW', ['correlation', 'p_value', 'ci_lower']].isna().all()
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+
+from scripts.synthetic_data import make_close_panel, make_stock_data_dict
+from src import correlation_analysis, correlation_matrix
+
+
+def _gappy_returns(n_tickers=7, n_days=300, seed=4):
+    returns = make_close_panel(n_tickers, n_days, seed=seed).pct_change()
+    returns = returns.mask(np.random.default_rng(seed).random(returns.shape) < 0.3)
+    returns.iloc[:, 0] = returns.iloc[:, 0].where(returns.index < returns.index[250])  # Mostly non-overlapping tail
+    returns.iloc[:, 1] = 0.01  # Constant
+    return returns
+
+
+def test_pairwise_correlation_matches_pandas_for_any_block_size():
+    returns = _gappy_returns()
+    expected = returns.corr(min_periods=40)
+    counts = returns.notna().astype(int)
+    for block_size in (1, 3, 64):
+        result = correlation_matrix.pairwise_correlation(returns, min_observations=40, block_size=block_size)
+        pd.testing.assert_frame_equal(result.correlation, expected, atol=1e-12)
+        np.testing.assert_array_equal(result.n_obs.to_numpy(), (counts.T @ counts).to_numpy())
+        pd.testing.assert_frame_equal(result.valid, result.n_obs >= 40)
+
+    cross = correlation_matrix.pairwise_correlation(returns.iloc[:, :3], returns.iloc[:, 2:], min_observations=40,
+                                                    block_size=2)
+    pd.testing.assert_frame_equal(cross.correlation, expected.iloc[:3, 2:], atol=1e-12)
+
+
+def test_sentiment_return_correlations_match_scalar_loop():
+    stock_dict = make_stock_data_dict(5, 250, seed=6)
+    rng = np.random.default_rng(6)
+    stock_dict = {t: df[rng.random(len(df)) > 0.15] for t, df in stock_dict.items()}  # Own calendars per ticker
+    returns = {t: correlation_analysis.calculate_daily_stock_returns(df) for t, df in stock_dict.items()}
+    sentiment = pd.concat([pd.DataFrame({'date_sentiment': df.index[rng.random(len(df)) < 0.5], 'stock_symbol': t})
+                           for t, df in stock_dict.items()], ignore_index=True)
+    sentiment['avg_sentiment_score'] = rng.normal(size=len(sentiment))
+    sentiment['num_articles'] = 1
+
+    result = correlation_matrix.sentiment_return_correlations(sentiment, returns, lags=[0, 1, -2], min_observations=20,
+                                                              pooled_label='ALL')
+    merged = correlation_analysis.merge_sentiment_with_lagged_returns(sentiment, returns, lags=[0, 1, -2])
+    for (ticker, lag), group in merged.groupby(['stock_symbol', 'lag_days']):
+        expected, n_obs = correlation_analysis.calculate_pearson_correlation(
+            group, 'avg_sentiment_score', 'daily_return', 20)
+        assert np.isclose(result.correlation.loc[ticker, lag], expected, equal_nan=True)
+        assert result.n_obs.loc[ticker, lag] == n_obs
+    for lag, group in merged.groupby('lag_days'):
+        expected, n_obs = correlation_analysis.calculate_pearson_correlation(
+            group, 'avg_sentiment_score', 'daily_return', 20)
+        assert np.isclose(result.correlation.loc['ALL', lag], expected) and result.n_obs.loc['ALL', lag] == n_obs
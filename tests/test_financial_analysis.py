@@ -0,0 +1,115 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src import financial_analysis
+
+
+def _write_csv(directory, ticker, df):
+    df.to_csv(os.path.join(directory, f'{ticker}_historical_data.csv'), index=False)
+
+
+@pytest.fixture
+def price_dir(tmp_path):
+    rng = np.random.default_rng(0)
+
+    def frame(n, start):
+        dates = pd.bdate_range(start, periods=n)
+        return pd.DataFrame({'Date': dates.strftime('%Y-%m-%d'), 'Open': rng.random(n), 'High': rng.random(n),
+                             'Low': rng.random(n), 'Close': rng.random(n), 'Volume': rng.integers(1, 100, n)})
+
+    _write_csv(tmp_path, 'AAA', frame(30, '2020-01-01').sample(frac=1, random_state=1))
+    _write_csv(tmp_path, 'BBB', frame(25, '2020-01-08').rename(columns={'Open': 'open', 'High': 'HIGH'}))
+    adjusted = frame(20, '2020-01-01').rename(columns={'Close': 'Adj Close'}).astype({'Adj Close': object})
+    adjusted.loc[3, 'Adj Close'] = 'null'
+    _write_csv(tmp_path, 'CCC', adjusted)
+    _write_csv(tmp_path, 'DDD', frame(10, '2020-01-01').drop(columns='Low'))  # Missing essential column
+    return str(tmp_path)
+
+
+def test_loader_resolves_columns_and_cleans_rows(price_dir):
+    data = financial_analysis.load_stock_prices_from_csvs(['aaa', 'BBB', 'CCC', 'DDD', 'EEE'], price_dir)
+
+    assert list(data) == ['AAA', 'BBB', 'CCC']
+    assert data['AAA'].index.is_monotonic_increasing
+    assert list(data['BBB'].columns) == ['Open', 'High', 'Low', 'Close', 'Volume']
+    assert len(data['CCC']) == 19  # Unparseable close dropped
+    assert (data['CCC'].dtypes == 'float64').all()
+
+
+def test_concurrent_loader_outputs(price_dir):
+    tickers = ['AAA', 'BBB', 'CCC', 'DDD']
+    expected = financial_analysis.load_stock_prices_from_csvs(tickers, price_dir)
+
+    threaded = financial_analysis.load_stock_prices_concurrently(tickers, price_dir, max_workers=3)
+    assert list(threaded) == list(expected)
+    for ticker in expected:
+        pd.testing.assert_frame_equal(threaded[ticker], expected[ticker])
+
+    long = financial_analysis.load_stock_prices_concurrently(tickers, price_dir, output='long')
+    pd.testing.assert_frame_equal(long.loc['BBB'], expected['BBB'])
+
+    panel = financial_analysis.load_stock_prices_concurrently(tickers, price_dir, output='panel',
+                                                              use_processes=True, max_workers=2)
+    assert panel.values.shape == (5, 30, 3)
+    close = panel.values[panel.fields.index('Close'), :, panel.tickers.index('BBB')]
+    assert np.isnan(close[:5]).all()
+    np.testing.assert_array_equal(close[5:], expected['BBB']['Close'].to_numpy())
+
+    wide = financial_analysis.load_stock_prices_concurrently(tickers, price_dir, output='wide')
+    pd.testing.assert_series_equal(wide[('Close', 'CCC')].dropna(), expected['CCC']['Close'],
+                                   check_names=False, check_freq=False)
+
+
+def _random_walk_data(lengths):
+    rng = np.random.default_rng(7)
+    data = {}
+    for i, n in enumerate(lengths):
+        dates = pd.bdate_range('2015-01-01', periods=n + 3 * i, name='Date')[3 * i:]
+        close = 50 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+        data[f'T{i}'] = pd.DataFrame({'High': close * 1.01, 'Low': close * 0.99, 'Close': close}, index=dates)
+    data['FLAT'] = pd.DataFrame({'High': 11.0, 'Low': 9.0, 'Close': 10.0},
+                                index=pd.bdate_range('2015-01-01', periods=40, name='Date'))
+    return data
+
+
+def test_panel_indicators_match_per_ticker_formulas():
+    from src.panel_indicators import calculate_technical_indicators_panel
+
+    data = _random_walk_data([10, 14, 15, 25, 26, 34, 60, 400])
+    data['GAPS'] = data['T7'].drop(data['T7'].index[[30, 100, 101, 102, 250]])  # Bars missing mid-series
+    panel_result = calculate_technical_indicators_panel(data)
+    for ticker, df in data.items():
+        expected = financial_analysis.calculate_technical_indicators(df)
+        for col in ['SMA_20', 'SMA_50', 'RSI_14', 'MACD', 'MACD_signal', 'MACD_hist']:
+            np.testing.assert_allclose(panel_result[ticker][col].to_numpy(dtype=float),
+                                       expected[col].to_numpy(dtype=float, na_value=np.nan), rtol=1e-12, atol=1e-12,
+                                       err_msg=f'{ticker} {col}')
+
+
+def test_panel_extra_indicators_match_pandas():
+    from src.panel_indicators import calculate_panel_indicators
+
+    data = _random_walk_data([120, 90])
+    close = pd.DataFrame({t: df['Close'] for t, df in data.items()})
+    high = pd.DataFrame({t: df['High'] for t, df in data.items()})
+    low = pd.DataFrame({t: df['Low'] for t, df in data.items()})
+    result = calculate_panel_indicators(close, high, low, sma_periods=(), rsi_period=None, macd_periods=None,
+                                        ema_periods=(10,), bollinger=(20, 2), atr_period=14)
+
+    ticker = 'T1'
+    prices = data[ticker]['Close']
+    prev_close = prices.shift()
+    true_range = pd.concat([data[ticker]['High'] - data[ticker]['Low'], (data[ticker]['High'] - prev_close).abs(),
+                            (data[ticker]['Low'] - prev_close).abs()], axis=1).max(axis=1)
+    expected = {
+        'EMA_10': prices.ewm(span=10, adjust=False, min_periods=10).mean(),
+        'BB_upper_20': prices.rolling(20).mean() + 2 * prices.rolling(20).std(),
+        'ATR_14': true_range.ewm(alpha=1 / 14, adjust=False, min_periods=14).mean(),
+    }
+    for name, series in expected.items():
+        np.testing.assert_allclose(result[name][ticker].dropna().to_numpy(), series.dropna().to_numpy(),
+                                   rtol=1e-12, err_msg=name)
+        assert result[name][ticker].first_valid_index() == series.first_valid_index()
@@ -0,0 +1,31 @@
+import pkgutil
+import subprocess
+import sys
+
+import src
+from src import config
+
+SRC_MODULES = sorted(f'src.{module.name}' for module in pkgutil.iter_modules(src.__path__))
+HEAVY_MODULES = ['nltk', 'vaderSentiment', 'sklearn', 'matplotlib', 'seaborn', 'scipy', 'pyarrow']
+
+_IMPORT_SCRIPT = f"""
+import sys, time
+import numpy, pandas
+already_loaded = set(sys.modules)
+start = time.perf_counter()
+for name in {SRC_MODULES!r}:
+    __import__(name)
+elapsed = time.perf_counter() - start
+loaded = [m for m in {HEAVY_MODULES!r} if m in sys.modules and m not in already_loaded]
+print(elapsed, ','.join(loaded))
+"""
+
+
+def test_src_import_is_lazy_and_within_budget():
+    # Fresh interpreter so earlier tests' imports don't hide eager loading; modules that
+    # pandas itself pulls in (e.g. pyarrow) are not counted against src
+    output = subprocess.run([sys.executable, '-c', _IMPORT_SCRIPT], capture_output=True, text=True,
+                            check=True, cwd=config.BASE_DIR).stdout.split()
+    elapsed, loaded = float(output[0]), output[1:]
+    assert loaded == [], f"heavy dependencies imported eagerly: {loaded}"
+    assert elapsed < config.IMPORT_TIME_BUDGET_SECONDS
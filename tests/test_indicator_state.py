@@ -0,0 +1,50 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from src import financial_analysis
+from src.indicator_state import TA_COLUMNS, IncrementalIndicatorState
+
+
+def _price_frame(n=300, seed=3):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.015, n)))
+    close[[40, 41, 170]] = np.nan  # Missing closes must be carried the way pandas does
+    close[200:205] = close[199]  # Flat stretch: zero losses, EWM skips equal values
+    return pd.DataFrame({'Close': close}, index=pd.bdate_range('2020-01-01', periods=n, name='Date'))
+
+
+def _assert_matches_full_recompute(streamed: pd.DataFrame, full: pd.DataFrame):
+    for col in TA_COLUMNS:
+        np.testing.assert_allclose(streamed[col].to_numpy(dtype=float),
+                                   full.loc[streamed.index, col].to_numpy(dtype=float, na_value=np.nan),
+                                   rtol=1e-12, atol=1e-12, err_msg=col)
+
+
+def test_streamed_bars_match_full_recompute(tmp_path):
+    df = _price_frame()
+    full = financial_analysis.calculate_technical_indicators(df)
+
+    state = IncrementalIndicatorState.from_history(df.iloc[:5])  # Before any indicator is defined
+    streamed = [state.update_frame(df.iloc[5:120])]
+
+    state = IncrementalIndicatorState.from_dict(json.loads(json.dumps(state.to_dict())))
+    streamed.append(state.update_frame(df.iloc[100:210]))  # Overlapping rows are skipped
+    state.save(tmp_path / 'state.json')
+    state = IncrementalIndicatorState.load(tmp_path / 'state.json')
+    streamed += [state.update_frame(df.iloc[[i]]) for i in range(210, len(df))]
+
+    streamed = pd.concat(streamed)
+    assert streamed.index.equals(df.index[5:])
+    # Row 13 is excluded: a full recompute back-fills its RSI once a 15th price exists
+    _assert_matches_full_recompute(streamed.iloc[10:], full)
+
+
+def test_rsi_waits_for_fifteen_valid_prices():
+    df = _price_frame().iloc[:16]
+    state = IncrementalIndicatorState()
+    values = [state.update(price) for price in df['Close']]
+    assert np.isnan(values[13]['RSI_14'])
+    full = financial_analysis.calculate_technical_indicators(df)
+    assert values[14]['RSI_14'] == full['RSI_14'].iloc[14]
@@ -0,0 +1,48 @@
+import pandas as pd
+
+from scripts.synthetic_data import make_news_frame, make_stock_data_dict
+from src import correlation_analysis, financial_analysis, instrumentation
+
+
+def test_stages_are_written_as_json_lines(tmp_path):
+    stock_dict = make_stock_data_dict(3, 200, seed=4)
+    for ticker, df in stock_dict.items():
+        df.to_csv(tmp_path / f'{ticker}_historical_data.csv')
+    news = make_news_frame(500, n_tickers=3, start='2000-01-03', end='2000-10-01', seed=4, with_sentiment=True)
+    news['date_sentiment'] = news['date'].dt.tz_localize(None).dt.normalize()
+    path = tmp_path / 'metrics.jsonl'
+
+    run_id = instrumentation.enable_metrics(str(path), trace_memory=True)
+    try:
+        loaded = financial_analysis.load_stock_prices_from_csvs(list(stock_dict) + ['MISSING'], str(tmp_path))
+        agg = correlation_analysis.aggregate_daily_sentiment(news)
+        returns = {t: correlation_analysis.calculate_daily_stock_returns(df) for t, df in loaded.items()}
+        correlation_analysis.merge_sentiment_with_returns(agg, returns)
+    finally:
+        instrumentation.disable_metrics()
+    financial_analysis.load_stock_prices_from_csvs(list(stock_dict), str(tmp_path))  # Not recorded
+
+    metrics = instrumentation.read_metrics(str(path), run_id)
+    stages = metrics.dropna(subset=['wall_s']).set_index('stage', drop=False)
+    assert (metrics['run_id'] == run_id).all()
+
+    per_ticker = metrics[metrics['stage'] == 'load_ticker_csv']
+    assert sorted(per_ticker['ticker']) == sorted(stock_dict)
+    assert (per_ticker['parent'] == 'load_stock_prices_from_csvs').all()
+    assert stages.loc['load_stock_prices_from_csvs', 'rows_out'] == sum(len(df) for df in stock_dict.values())
+    assert stages.loc['aggregate_daily_sentiment', 'rows_in'] == len(news)
+    assert stages.loc['merge_sentiment_with_lagged_returns', 'parent'] == 'merge_sentiment_with_returns'
+    assert (stages[['wall_s', 'cpu_s', 'traced_peak_mb']] >= 0).all().all()
+
+    messages = metrics.dropna(subset=['message'])
+    assert messages['message'].str.startswith('Daily sentiment aggregation complete').any()
+    assert messages.loc[messages['message'].str.startswith('Daily'), 'stage'].iloc[0] == 'aggregate_daily_sentiment'
+
+
+def test_disabled_instrumentation_returns_plain_results():
+    assert not instrumentation.metrics_enabled()
+    with instrumentation.stage('anything', ticker='X') as current:
+        current.record(rows_out=1)
+    frame = pd.DataFrame({'Close': [1.0, 2.0, 4.0]})
+    pd.testing.assert_series_equal(financial_analysis.calculate_daily_returns(frame)['daily_return'],
+                                   frame['Close'].pct_change(), check_names=False)
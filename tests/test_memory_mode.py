@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+
+from scripts.synthetic_data import make_news_frame, make_stock_data_dict, price_dates
+from src import correlation_analysis, data_processing, sentiment_tool
+from src.memory_mode import compact_mode, compact_mode_enabled, set_compact_mode, upper_labels
+
+
+def _run(news_path, stock_dict):
+    news = data_processing.load_financial_news_data(news_path)
+    before = news.copy()
+    scored = sentiment_tool.add_sentiment_to_df(news, 'headline')
+    pd.testing.assert_frame_equal(news, before)  # The caller's frame is never modified
+    scored['date_sentiment'] = scored['date'].dt.tz_localize(None).dt.normalize()
+    daily = correlation_analysis.aggregate_daily_sentiment(scored, sentiment_col='sentiment_compound')
+    returns = {t: correlation_analysis.calculate_daily_stock_returns(df) for t, df in stock_dict.items()}
+    return news, scored, correlation_analysis.merge_sentiment_with_returns(daily, returns)
+
+
+def test_compact_mode_matches_default_results(tmp_path):
+    news_path = str(tmp_path / 'news.csv')
+    dates = price_dates(400)
+    news = make_news_frame(2_000, n_tickers=4, start=str(dates[0]), end=str(dates[-1]), seed=3)
+    news.assign(date=news['date'].dt.tz_convert('UTC')).to_csv(news_path, index=False)
+    stock_dict = make_stock_data_dict(4, 400, seed=3)
+
+    default_news, default_scored, default_merged = _run(news_path, stock_dict)
+    with compact_mode():
+        assert compact_mode_enabled() and pd.get_option('mode.copy_on_write') is True
+        compact_news, compact_scored, compact_merged = _run(news_path, stock_dict)
+    assert not compact_mode_enabled() and pd.get_option('mode.copy_on_write') is False
+
+    assert isinstance(compact_news['stock'].dtype, pd.CategoricalDtype)
+    assert isinstance(compact_news['publisher'].dtype, pd.CategoricalDtype)
+    assert compact_scored['sentiment_compound'].dtype == np.float32
+    assert default_scored['sentiment_compound'].dtype == np.float64
+    np.testing.assert_allclose(compact_scored['sentiment_compound'], default_scored['sentiment_compound'], atol=1e-6)
+    assert (compact_scored['sentiment_label'].astype(str) == default_scored['sentiment_label']).all()
+
+    assert len(default_merged) > 0
+    pd.testing.assert_frame_equal(compact_merged, default_merged, check_dtype=False, check_categorical=False,
+                                  atol=1e-6)
+
+
+def test_upper_labels_merges_categories():
+    values = pd.Series(pd.Categorical(['aapl', 'AAPL', None, 'msft']))
+    labels = upper_labels(values)
+    assert list(labels) == ['AAPL', 'AAPL', 'NAN', 'MSFT']
+    assert list(labels.cat.categories) == ['AAPL', 'MSFT', 'NAN']
+    assert list(upper_labels(values.astype(object))) == list(values.astype(object).astype(str).str.upper())
+
+
+def test_compact_mode_restores_user_copy_on_write():
+    with pd.option_context('mode.copy_on_write', True):
+        set_compact_mode(True)
+        set_compact_mode(False)
+        assert pd.get_option('mode.copy_on_write') is True
+        set_compact_mode(False)  # Already off: the option is left alone
+        assert pd.get_option('mode.copy_on_write') is True
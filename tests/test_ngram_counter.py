@@ -0,0 +1,47 @@
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from src.ngram_counter import NGramCounter, count_ngrams, iter_ngrams
+
+
+def _headlines(n=3000, seed=8):
+    rng = np.random.default_rng(seed)
+    vocabulary = np.array([f'w{i}' for i in range(300)])
+    weights = 1.0 / np.arange(1, 301)  # Zipf-like, so there are clear heavy hitters
+    texts = [' '.join(rng.choice(vocabulary, rng.integers(1, 9), p=weights / weights.sum())) for _ in range(n)]
+    texts[5] = None
+    return pd.DataFrame({'processed_headline': texts,
+                         'stock': rng.choice(['AAPL', 'MSFT', 'TSLA'], n),
+                         'publisher': rng.choice(['Wire', 'NewsHub'], n)})
+
+
+def _true_counts(texts, n):
+    return Counter(gram for text in texts if isinstance(text, str) for gram in iter_ngrams(text.split(), n))
+
+
+def test_exact_counts_per_group_in_one_pass():
+    news = _headlines()
+    chunks = (news.iloc[start:start + 700] for start in range(0, len(news), 700))
+    counter = count_ngrams(chunks, n=3, top_k=10, group_cols=('stock', 'publisher'))
+
+    assert counter.most_common() == _true_counts(news['processed_headline'], 3).most_common(10)
+    tsla = news.loc[news['stock'] == 'TSLA', 'processed_headline']
+    assert counter.most_common(5, by='stock', value='TSLA') == _true_counts(tsla, 3).most_common(5)
+    by_publisher = counter.to_frame(by='publisher', top_n=3)
+    assert sorted(by_publisher['publisher'].unique()) == ['NewsHub', 'Wire'] and len(by_publisher) == 6
+
+
+def test_approximate_mode_finds_heavy_hitters_and_merges():
+    news = _headlines()
+    true = _true_counts(news['processed_headline'], 2)
+    left = NGramCounter(n=2, top_k=10, mode='approximate', group_cols=('stock',), sketch_width=4096)
+    right = NGramCounter(n=2, top_k=10, mode='approximate', group_cols=('stock',), sketch_width=4096)
+    left.update(news.iloc[:1500])
+    right.update(news.iloc[1500:])
+    merged = left.merge(right).most_common(5)
+
+    assert [gram for gram, _ in merged] == [gram for gram, _ in true.most_common(5)]
+    assert all(estimate >= true[gram] for gram, estimate in merged)  # Count-Min never under-counts
+    assert left.sketch.nbytes == 4 * 4096 * 8
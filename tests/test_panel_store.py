@@ -0,0 +1,43 @@
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from src.panel_store import PanelStore, write_panel_store
+
+
+def _stock_data():
+    rng = np.random.default_rng(1)
+    data = {}
+    for ticker, start, n in [('AAA', '2020-01-01', 40), ('BBB', '2020-01-15', 20), ('CCC', '2020-01-03', 30)]:
+        dates = pd.bdate_range(start, periods=n, name='Date')
+        data[ticker] = pd.DataFrame({col: rng.random(n) for col in ['Open', 'High', 'Low', 'Close', 'Volume']},
+                                    index=dates)
+    data['CCC'] = data['CCC'].drop(data['CCC'].index[[5, 6]])  # Gaps inside its range
+    return data
+
+
+def test_round_trip_and_zero_copy_slices(tmp_path):
+    data = _stock_data()
+    store = PanelStore(write_panel_store(str(tmp_path / 'panel'), data))
+
+    restored = store.to_stock_data_dict()
+    for ticker, df in data.items():
+        pd.testing.assert_frame_equal(restored[ticker], df, check_freq=False)
+
+    frame = store.ticker_frame('bbb', start='2020-01-20', end='2020-01-31')
+    assert frame.index[0] == pd.Timestamp('2020-01-20') and frame.index[-1] == pd.Timestamp('2020-01-31')
+    assert np.shares_memory(frame['Close'].to_numpy(), store._arrays['Close'])
+
+    close = store.field_matrix('Close')
+    assert close.shape == (len(store.dates), 3)
+    assert np.shares_memory(close.to_numpy(), store._arrays['Close'])
+    assert close['BBB'].first_valid_index() == pd.Timestamp('2020-01-15')
+
+
+def test_pickles_by_path(tmp_path):
+    store = PanelStore(write_panel_store(str(tmp_path / 'panel'), _stock_data()))
+    payload = pickle.dumps(store)
+    assert len(payload) < 1000
+    clone = pickle.loads(payload)
+    np.testing.assert_array_equal(clone.ticker_arrays('AAA')['Close'], store.ticker_arrays('AAA')['Close'])
@@ -0,0 +1,102 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from scripts.synthetic_data import make_stock_data_dict, write_news_csv
+from src import correlation_analysis, data_processing, pipeline, resampling
+
+
+def _inputs(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_processing, 'get_stop_words', lambda: frozenset(['the', 'on', 'in', 'to', 'by', 'at']))
+    prices = tmp_path / 'prices'
+    prices.mkdir()
+    stock_dict = make_stock_data_dict(4, 400, seed=9)
+    for ticker, df in stock_dict.items():
+        df.to_csv(prices / f'{ticker}_historical_data.csv')
+    news_path = str(tmp_path / 'news.csv')
+    write_news_csv(news_path, 3_000, n_tickers=5, start='2000-01-03', end='2001-07-01', seed=9)
+    return news_path, str(prices)
+
+
+def test_pipeline_memoizes_stages(tmp_path, monkeypatch):
+    news_path, prices = _inputs(tmp_path, monkeypatch)
+    cache = pipeline.StageCache(str(tmp_path / 'cache'))
+
+    def build(lags, **kwargs):
+        return pipeline.build_pipeline(news_path, prices, lags=lags, min_observations=5, cache=cache, **kwargs)
+
+    first = build([0, 1])
+    result = first.run('correlation')
+    assert first.executed == ['news', 'text', 'sentiment', 'daily_sentiment', 'returns', 'correlation']
+    assert all(pipeline in first.stages[name][3] for name in ('daily_sentiment', 'returns', 'correlation'))
+    assert sorted(result['stock_symbol'].unique()) == ['A', 'ALL', 'B', 'C', 'D']  # E has news but no prices
+    assert result['n_obs'].gt(0).all() and result['correlation'].notna().all()
+
+    # Same inputs through the library functions directly
+    daily = first.run('daily_sentiment')
+    returns = first.run('returns')
+    merged = correlation_analysis.merge_sentiment_with_returns(daily, returns, lag_days=1)
+    expected, n_obs = correlation_analysis.calculate_pearson_correlation(
+        merged[merged['stock_symbol'] == 'B'], 'avg_sentiment_score', 'daily_return', 5)
+    row = result[(result['stock_symbol'] == 'B') & (result['lag_days'] == 1)].iloc[0]
+    assert np.isclose(row['correlation'], expected) and row['n_obs'] == n_obs
+
+    again = build([0, 1])
+    pd.testing.assert_frame_equal(again.run('correlation'), result)
+    assert again.executed == []
+
+    new_lags = build([0, 1, -1])
+    assert new_lags.run('correlation')['lag_days'].nunique() == 3
+    assert new_lags.executed == ['correlation']
+
+    changed = os.path.join(prices, 'C_historical_data.csv')
+    os.utime(changed, ns=(os.stat(changed).st_atime_ns, os.stat(changed).st_mtime_ns + 10 ** 9))
+    calls = []
+    original = pipeline._ticker_returns_task
+
+    def counting_task(args):
+        calls.append(args[0])
+        return original(args)
+
+    monkeypatch.setattr(pipeline, '_ticker_returns_task', counting_task)
+    touched = build([0, 1, -1])
+    touched.run('correlation')
+    assert touched.executed == ['returns', 'correlation'] and calls == ['C']
+
+    calls.clear()
+    refreshed = build([0, 1, -1], refresh=['returns'])
+    refreshed.run('returns')
+    assert refreshed.executed == ['returns'] and calls == ['A', 'B', 'C', 'D']
+
+
+def test_cli_writes_output(tmp_path, monkeypatch):
+    news_path, prices = _inputs(tmp_path, monkeypatch)
+    output = tmp_path / 'corr.csv'
+    pipeline.main(['--news', news_path, '--prices-dir', prices, '--tickers', 'a', 'b', '--lags', '0',
+                   '--min-observations', '5', '--no-cache', '--output', str(output)])
+    written = pd.read_csv(output)
+    assert list(written['stock_symbol']) == ['A', 'B', 'ALL'] and (written['lag_days'] == 0).all()
+
+
+def test_timeframe_reuses_daily_stages(tmp_path, monkeypatch):
+    news_path, prices = _inputs(tmp_path, monkeypatch)
+    cache = pipeline.StageCache(str(tmp_path / 'cache'))
+
+    def build(timeframe):
+        return pipeline.build_pipeline(news_path, prices, lags=[0, 1], min_observations=5, cache=cache,
+                                       timeframe=timeframe)
+
+    build(None).run('correlation')
+
+    weekly = build('weekly')
+    result = weekly.run('correlation')
+    assert weekly.executed == ['correlation']
+    daily, returns = weekly.run('daily_sentiment'), weekly.run('returns')
+    merged = correlation_analysis.merge_sentiment_with_returns(
+        resampling.resample_sentiment(daily, 'weekly'), resampling.resample_returns(returns, 'weekly'), lag_days=1)
+    expected, n_obs = correlation_analysis.calculate_pearson_correlation(
+        merged[merged['stock_symbol'] == 'A'], 'avg_sentiment_score', 'daily_return', 5)
+    row = result[(result['stock_symbol'] == 'A') & (result['lag_days'] == 1)].iloc[0]
+    assert np.isclose(row['correlation'], expected) and row['n_obs'] == n_obs
+    assert n_obs < 80  # Weekly bars over the 18 months of daily data
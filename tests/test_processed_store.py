@@ -0,0 +1,64 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from src import data_processing, financial_analysis
+from src.processed_store import ProcessedDataStore
+
+
+def _write_prices(directory, ticker, n=40):
+    dates = pd.bdate_range('2019-12-02', periods=n)
+    close = np.linspace(10, 20, n)
+    pd.DataFrame({'Date': dates.strftime('%Y-%m-%d'), 'Open': close, 'High': close + 1, 'Low': close - 1,
+                  'Close': close, 'Volume': np.arange(n) * 100}).to_csv(
+        os.path.join(directory, f'{ticker}_historical_data.csv'), index=False)
+
+
+def test_price_cache_matches_loader_and_invalidates(tmp_path, monkeypatch):
+    csv_dir = tmp_path / 'prices'
+    csv_dir.mkdir()
+    for ticker in ['AAPL', 'MSFT']:
+        _write_prices(csv_dir, ticker)
+    store = ProcessedDataStore(str(tmp_path / 'store'))
+
+    expected = financial_analysis.load_stock_prices_from_csvs(['AAPL', 'MSFT'], str(csv_dir))
+    cached = store.load_stock_prices(['aapl', 'MSFT'], str(csv_dir))
+    for ticker in expected:
+        pd.testing.assert_frame_equal(cached[ticker], expected[ticker], check_freq=False)
+
+    calls = []
+    original = financial_analysis.load_stock_prices_from_csvs
+    monkeypatch.setattr(financial_analysis, 'load_stock_prices_from_csvs',
+                        lambda tickers, *args: calls.append(tickers) or original(tickers, *args))
+    store.load_stock_prices(['AAPL', 'MSFT'], str(csv_dir))
+    assert calls == []
+
+    _write_prices(csv_dir, 'MSFT', n=45)
+    reloaded = store.load_stock_prices(['AAPL', 'MSFT'], str(csv_dir), columns=['Close'],
+                                       start='2020-01-01', end='2020-01-31')
+    assert calls == [['MSFT']]
+    assert list(reloaded['MSFT'].columns) == ['Close']
+    assert reloaded['MSFT'].index.min() >= pd.Timestamp('2020-01-01')
+    assert reloaded['MSFT'].index.max() <= pd.Timestamp('2020-01-31')
+
+
+def test_news_cache_round_trip_with_partition_filters(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_processing, 'get_stop_words', lambda: frozenset(['the', 'on', 'in', 'to', 'by', 'at']))
+    news_path = tmp_path / 'news.csv'
+    pd.DataFrame({
+        'headline': ['Stock Alpha soars', 'Beta misses estimates', 'Alpha target raised'],
+        'publisher': ['NewsHub', 'Wire', 'NewsHub'],
+        'date': ['2020-06-01 09:30:00', '2021-03-02 10:00:00', '2021-03-03 16:00:00'],
+        'stock': ['ALPHA', 'BETA', 'ALPHA'],
+    }).to_csv(news_path, index=False)
+    store = ProcessedDataStore(str(tmp_path / 'store'))
+
+    first = store.load_processed_news(str(news_path))
+    second = store.load_processed_news(str(news_path))
+    pd.testing.assert_frame_equal(first, second)
+    assert list(first['headline']) == ['Stock Alpha soars', 'Beta misses estimates', 'Alpha target raised']
+
+    subset = store.load_processed_news(str(news_path), columns=['processed_headline', 'stock'],
+                                       tickers=['ALPHA'], years=[2021])
+    assert subset.to_dict('records') == [{'processed_headline': 'alpha target raised', 'stock': 'ALPHA'}]
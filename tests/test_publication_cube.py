@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src import eda_analysis
+from src.data_processing import extract_date_features
+from src.publication_cube import PublicationCube
+
+
+def _news(n=2000, seed=6):
+    rng = np.random.default_rng(seed)
+    dates = pd.Timestamp('2020-03-01', tz='America/New_York') + pd.to_timedelta(rng.integers(0, 90 * 24 * 60, n), 'min')
+    publishers = rng.choice(['Wire', 'NewsHub', 'Desk', None], n, p=[0.5, 0.3, 0.15, 0.05])
+    return pd.DataFrame({'date': dates, 'publisher': publishers, 'stock': rng.choice(['AAPL', 'MSFT', 'TSLA'], n)})
+
+
+def test_cube_rollups_match_frame_group_bys():
+    news = _news()
+    features = extract_date_features(news)
+    chunks = (news.iloc[start:start + 600] for start in range(0, len(news), 600))
+    cube = PublicationCube.from_chunks(chunks)
+    assert len(cube) == len(news)
+
+    from_frame = eda_analysis.publication_trend_counts(features)
+    from_cube = eda_analysis.publication_trend_counts(cube=cube)
+    np.testing.assert_array_equal(from_cube['per_day'].to_numpy(), from_frame['per_day'].to_numpy())
+    assert list(from_cube['per_day'].index.date) == list(from_frame['per_day'].index)
+    pd.testing.assert_series_equal(from_cube['by_day_of_week'], from_frame['by_day_of_week'],
+                                   check_names=False, check_dtype=False, check_index_type=False)
+    np.testing.assert_array_equal(from_cube['by_hour'].index, from_frame['by_hour'].index)
+    np.testing.assert_array_equal(from_cube['by_hour'].to_numpy(), from_frame['by_hour'].to_numpy())
+
+    pd.testing.assert_series_equal(eda_analysis.publisher_counts(cube=cube, top_n=3),
+                                   eda_analysis.publisher_counts(news, top_n=3), check_names=False, check_index_type=False)
+    with pytest.raises(ValueError):
+        eda_analysis.publication_trend_counts()
+
+
+def test_cube_slices_and_multi_dimension_rollups():
+    news = _news()
+    cube = PublicationCube.from_frame(news)
+    april = news[(news['date'].dt.month == 4) & (news['stock'] == 'TSLA')]
+    expected = april.groupby(april['date'].dt.hour).size()
+    got = cube.counts('hour', stocks=['TSLA'], start='2020-04-01', end='2020-04-30')
+    np.testing.assert_array_equal(got.index, expected.index)
+    np.testing.assert_array_equal(got.to_numpy(), expected.to_numpy())
+
+    by_stock_publisher = cube.counts(['stock', 'publisher'])
+    assert by_stock_publisher.sum() == news['publisher'].notna().sum()
+    assert by_stock_publisher[('MSFT', 'Wire')] == ((news['stock'] == 'MSFT') & (news['publisher'] == 'Wire')).sum()
@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.synthetic_data import make_stock_data_dict
+from src import correlation_analysis, financial_analysis, resampling
+
+OHLCV_RULES = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}
+
+
+def _stock_dict(seed=1):
+    rng = np.random.default_rng(seed)
+    stock_dict = make_stock_data_dict(4, 400, seed=seed)
+    stock_dict = {t: df[rng.random(len(df)) > 0.1] for t, df in stock_dict.items()}  # Missing bars
+    stock_dict['A'] = stock_dict['A'].iloc[60:300]  # Listed late, delisted early
+    return stock_dict
+
+
+@pytest.mark.parametrize('timeframe, rule', [('weekly', 'W-FRI'), ('monthly', 'ME'), ('W-WED', 'W-WED')])
+def test_resampled_bars_match_pandas(timeframe, rule):
+    stock_dict = _stock_dict()
+    resampled = resampling.resample_stock_data(stock_dict, timeframe)
+    for ticker, df in stock_dict.items():
+        expected = df.resample(rule).agg(OHLCV_RULES).dropna(subset=['Close'])
+        pd.testing.assert_frame_equal(resampled[ticker][list(OHLCV_RULES)], expected, check_freq=False,
+                                      check_dtype=False)  # Panels hold Volume as float
+
+        returns = correlation_analysis.calculate_daily_stock_returns(df, timeframe=timeframe)
+        pd.testing.assert_series_equal(returns['daily_return'], expected['Close'].pct_change(), check_freq=False,
+                                       check_names=False)
+
+
+def test_weekly_returns_compound_daily_returns():
+    df = make_stock_data_dict(1, 120, seed=3)['A']
+    daily = financial_analysis.calculate_daily_returns(df)['daily_return']
+    weekly = financial_analysis.calculate_daily_returns(df, timeframe='weekly')['daily_return']
+    compounded = (1 + daily).groupby(resampling.bin_labels(daily.index, 'weekly')).prod() - 1
+    np.testing.assert_allclose(weekly.iloc[1:], compounded.iloc[1:].to_numpy())  # First week has no prior close
+
+
+def test_sentiment_is_article_weighted_and_labelled_like_prices():
+    stock_dict = _stock_dict()
+    rng = np.random.default_rng(2)
+    news = pd.concat([pd.DataFrame({'date_sentiment': df.index[rng.integers(0, len(df), 3 * len(df))], 'stock': t})
+                      for t, df in stock_dict.items()], ignore_index=True)  # Uneven article counts per day
+    news['sentiment_score'] = rng.normal(size=len(news))
+
+    weekly = correlation_analysis.aggregate_daily_sentiment(news, timeframe='weekly')
+    daily = correlation_analysis.aggregate_daily_sentiment(news)
+    pd.testing.assert_frame_equal(resampling.resample_sentiment(daily, 'weekly'), weekly, check_dtype=False)
+    labels = resampling.bin_labels(news['date_sentiment'], 'weekly')
+    expected = news.assign(week=labels).groupby(['week', 'stock'])['sentiment_score'].mean().to_numpy()
+    np.testing.assert_allclose(weekly['avg_sentiment_score'], expected)
+
+    returns = {t: correlation_analysis.calculate_daily_stock_returns(df, timeframe='weekly')
+               for t, df in stock_dict.items()}
+    merged = correlation_analysis.merge_sentiment_with_returns(weekly, returns)
+    assert len(merged) == len(weekly)  # Every week with news has a price bar
+
+
+def test_weekly_sentiment_bins_mixed_offsets_on_market_dates():
+    news = pd.DataFrame({
+        'stock': ['AAA', 'AAA', 'AAA', 'AAA'],
+        'date': ['2023-01-06 15:00:00-05:00',   # Friday
+                 '2023-01-07 02:00:00+00:00',   # Friday 21:00 in New York
+                 '2023-01-09 10:00:00-05:00',   # Monday
+                 '2023-07-07 10:00:00-04:00'],  # Friday, daylight saving time
+        'sentiment_score': [1.0, 0.5, -1.0, 0.25],
+    })
+    weekly = correlation_analysis.aggregate_daily_sentiment(news, date_col='date', timeframe='weekly')
+    assert list(weekly['date_sentiment']) == list(pd.to_datetime(['2023-01-06', '2023-01-13', '2023-07-07']))
+    assert list(weekly['num_articles']) == [2, 1, 1]
+    assert weekly['avg_sentiment_score'].iloc[0] == pytest.approx(0.75)
+
+
+def test_multi_timeframe_panel_caches_and_counts_bars():
+    stock_dict = _stock_dict()
+    panel = resampling.MultiTimeframePanel(stock_dict)
+    assert panel.prices('weekly') is panel.prices('W-FRI')
+    assert panel.returns('monthly') is panel.returns('ME')
+    five_bar = panel.stock_data(5)
+    calendar = resampling.price_calendar(stock_dict)
+    assert five_bar['B'].index.isin(calendar[4::5].append(calendar[-1:])).all()
+    expected = stock_dict['B']['Close'].groupby(resampling.bin_labels(stock_dict['B'].index, 5, calendar)).last()
+    pd.testing.assert_series_equal(five_bar['B']['Close'], expected, check_names=False, check_index_type=False)
+    with pytest.raises(ValueError):
+        resampling.timeframe_key('2W')
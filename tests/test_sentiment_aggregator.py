@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+
+from src import correlation_analysis
+from src.sentiment_aggregator import DailySentimentAggregator
+
+
+def _scored_news(n=400, seed=4):
+    rng = np.random.default_rng(seed)
+    scores = rng.uniform(-1, 1, n)
+    scores[rng.random(n) < 0.05] = np.nan
+    return pd.DataFrame({
+        'date_sentiment': pd.Timestamp('2019-12-25') + pd.to_timedelta(rng.integers(0, 20, n), 'D'),
+        'stock': rng.choice(['aapl', 'AAPL', 'msft', 'goog', 'Tsla'], n),
+        'sentiment_score': scores,
+    })
+
+
+def test_incremental_batches_and_merge_match_full_aggregation(tmp_path):
+    news = _scored_news()
+    news.loc[news.index[[5, 6]], 'date_sentiment'] = pd.NaT
+    news.loc[news['date_sentiment'] == pd.Timestamp('2020-01-01'), 'sentiment_score'] = np.nan  # No valid scores
+    expected = correlation_analysis.aggregate_daily_sentiment(news.copy())
+
+    incremental = DailySentimentAggregator()
+    for start in range(0, 200, 25):
+        incremental.update(news.iloc[start:start + 25])
+    incremental.save(tmp_path / 'agg.npz')
+    incremental = DailySentimentAggregator.load(tmp_path / 'agg.npz')
+
+    worker_a, worker_b = DailySentimentAggregator(), DailySentimentAggregator()
+    worker_a.update(news.iloc[200:300])
+    worker_b.update(news.iloc[300:])
+    incremental.merge(worker_b).merge(worker_a)
+
+    pd.testing.assert_frame_equal(incremental.to_frame(), expected, check_exact=False)
+
+
+def test_update_returns_current_totals_for_touched_keys():
+    news = _scored_news()
+    aggregator = DailySentimentAggregator()
+    aggregator.update(news.iloc[:300])
+    touched = aggregator.update(news.iloc[300:310], return_updates=True)
+
+    full = aggregator.to_frame().set_index(['date_sentiment', 'stock_symbol'])
+    touched = touched.set_index(['date_sentiment', 'stock_symbol'])
+    assert len(touched) == len(news.iloc[300:310].assign(stock=lambda d: d['stock'].str.upper())
+                                   .drop_duplicates(['date_sentiment', 'stock']))
+    pd.testing.assert_frame_equal(touched, full.loc[touched.index])
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+
+from src import sentiment_tool
+from src.sentiment_cache import SentimentCache
+
+
+def test_cache_roundtrip_and_lru_eviction(tmp_path):
+    with SentimentCache(str(tmp_path / 'cache.sqlite'), max_entries=2) as cache:
+        cache.put_many(['a b', 'c'], np.array([[0.0, 1.0, 0.0, 0.0], [0.1, 0.8, 0.1, 0.2]]))
+        scores, found = cache.get_many(['a   b', 'missing'])  # Whitespace-normalized hit
+        assert found.tolist() == [True, False]
+        np.testing.assert_array_equal(scores[0], [0.0, 1.0, 0.0, 0.0])
+
+        cache.put_many(['d'], np.array([[0.2, 0.6, 0.2, 0.0]]))
+        assert len(cache) == 2
+        assert cache.get_many(['c'])[1].tolist() == [False]  # Least recently used
+        assert cache.get_many(['a b', 'd'])[1].tolist() == [True, True]
+
+
+def test_texts_sharing_a_key_all_hit(tmp_path):
+    with SentimentCache(str(tmp_path / 'cache.sqlite')) as cache:
+        cache.put_many(['a b'], np.array([[0.1, 0.7, 0.2, 0.3]]))
+        scores, found = cache.get_many(['a b', 'a  b', 'new', 'a b'])
+        assert found.tolist() == [True, True, False, True]
+        np.testing.assert_array_equal(scores[[0, 1, 3]], [[0.1, 0.7, 0.2, 0.3]] * 3)
+        assert np.isnan(scores[2]).all()
+
+
+def test_add_sentiment_reuses_cache_and_scores_only_new_unique_text(tmp_path, monkeypatch):
+    day_one = pd.DataFrame({'headline': ['good news today', 'bad news', 'good news today', None]})
+    day_two = pd.DataFrame({'headline': ['good news today', 'bad news', 'great rally', 'great rally']})
+    expected = sentiment_tool.add_sentiment_to_df(day_two, 'headline')
+
+    scored = []
+    original = sentiment_tool.score_sentiment_batch
+
+    def counting_score(texts, **kwargs):
+        scored.extend(texts)
+        return original(texts, **kwargs)
+
+    monkeypatch.setattr(sentiment_tool, 'score_sentiment_batch', counting_score)
+    with SentimentCache(str(tmp_path / 'cache.sqlite')) as cache:
+        sentiment_tool.add_sentiment_to_df(day_one, 'headline', cache=cache)
+        assert sorted(scored) == ['bad news', 'good news today']
+
+        scored.clear()
+        result = sentiment_tool.add_sentiment_to_df(day_two, 'headline', cache=cache)
+        assert scored == ['great rally']
+
+    pd.testing.assert_frame_equal(result, expected)
@@ -0,0 +1,26 @@
+import numpy as np
+import pandas as pd
+
+from src import sentiment_tool
+
+
+HEADLINES = ['good news today', 'bad news yesterday', 'neutral statement',
+             None, 'stock soars on great earnings', 'terrible losses reported'] * 5
+
+
+def test_batch_scores_match_per_row_scores():
+    df = pd.DataFrame({'headline': HEADLINES})
+    result = sentiment_tool.add_sentiment_to_df(df, 'headline', chunk_size=4)
+
+    expected = pd.json_normalize(df['headline'].apply(sentiment_tool.get_sentiment_scores_vader).tolist())
+    for field in sentiment_tool.SENTIMENT_FIELDS:
+        np.testing.assert_array_equal(result[f'sentiment_{field}'].to_numpy(), expected[field].to_numpy())
+    assert result.loc[1, 'sentiment_label'] == 'negative'
+    assert result.loc[3, 'sentiment_label'] == 'neutral'
+    assert result.loc[4, 'sentiment_label'] == 'positive'
+
+
+def test_process_pool_matches_serial():
+    serial = sentiment_tool.score_sentiment_batch(HEADLINES, n_workers=1, chunk_size=7)
+    parallel = sentiment_tool.score_sentiment_batch(HEADLINES, n_workers=2, chunk_size=7)
+    np.testing.assert_array_equal(serial, parallel)
@@ -0,0 +1,45 @@
+import pandas as pd
+import pytest
+from nltk.tokenize import NLTKWordTokenizer
+
+from src import data_processing
+
+HEADLINES = [
+    "Apple's stock soars 5% after Q3 earnings beat; analysts can't keep up!",
+    "Why you CANNOT ignore this $TSLA rally -- gonna be huge?",
+    "Gimme, lemme & wanna: traders' slang in 2020... (explained)",
+    "I gotta say: Tesla's Q4 deliveries were 'fine'",
+    "Übernahme: Siemens AG kauft Startup für 1,2 Mrd. € — Aktie +3%",
+    "  multiple   spaces\tand\nnewlines  ",
+    "snake_case_ticker_cannot2 and _cannot tokens",
+    "",
+    None,
+    float('nan'),
+    12345,
+] * 3
+
+
+@pytest.fixture
+def nltk_reference(monkeypatch):
+    """Real NLTK resources when installed; otherwise the Treebank tokenizer word_tokenize
+    applies to a single sentence and a fixed stop-word list."""
+    if data_processing.ensure_nltk_resources():
+        monkeypatch.setattr(data_processing, 'word_tokenize', NLTKWordTokenizer().tokenize)
+        stop_words = frozenset(['i', 'you', 'this', 'and', 'can', 'not', 'be', 'after', 'up', 'were', 'why'])
+        monkeypatch.setattr(data_processing, 'get_stop_words', lambda: stop_words)
+
+
+def test_fast_normalization_matches_nltk_path(nltk_reference):
+    df = pd.DataFrame({'headline': HEADLINES}, index=range(100, 100 + len(HEADLINES)))
+
+    reference = data_processing.preprocess_text_data(df, method='nltk')
+    fast = data_processing.preprocess_text_data(df)
+    pd.testing.assert_frame_equal(fast, reference)
+    assert fast.loc[101, 'processed_headline'] == 'ignore tsla rally gon huge'
+
+
+def test_parallel_normalization_matches_serial(nltk_reference):
+    texts = pd.Series(HEADLINES * 4)
+    serial = data_processing.normalize_headlines(texts)
+    parallel = data_processing.normalize_headlines(texts, n_workers=2, chunk_size=3)
+    pd.testing.assert_series_equal(parallel, serial)
@@ -0,0 +1,53 @@
+import pandas as pd
+
+from src import trading_calendar
+
+
+def test_align_to_sessions_uses_close_weekends_and_holidays():
+    timestamps = pd.Series(pd.to_datetime([
+        '2023-01-12 15:59:00-05:00',  # Thursday before the close
+        '2023-01-12 16:00:00-05:00',  # At the close -> Friday
+        '2023-01-13 20:30:00+00:00',  # 15:30 New York time, Friday
+        '2023-01-13 18:00:00-05:00',  # Friday evening -> Tuesday (MLK day Monday)
+        '2023-01-14 10:00:00-05:00',  # Saturday -> Tuesday
+    ], utc=True))
+    aligned = trading_calendar.align_to_sessions(timestamps)
+    expected = pd.to_datetime(['2023-01-12', '2023-01-13', '2023-01-13', '2023-01-17', '2023-01-17'])
+    assert list(aligned) == list(expected)
+
+    naive_dates = pd.Series(pd.to_datetime(['2023-07-03', '2023-07-04']))  # Date-only: before the close
+    assert list(trading_calendar.align_to_sessions(naive_dates)) == list(pd.to_datetime(['2023-07-03', '2023-07-05']))
+
+
+def test_naive_strings_and_datetimes_are_local_time():
+    values = ['2023-01-12 18:00:00', '2023-01-12 10:00:00', None]
+    from_strings = trading_calendar.align_to_sessions(pd.Series(values, dtype=object))
+    from_datetimes = trading_calendar.align_to_sessions(pd.Series(pd.to_datetime(values)))
+    expected = [pd.Timestamp('2023-01-13'), pd.Timestamp('2023-01-12'), pd.NaT]
+    assert list(from_strings) == list(from_datetimes) == expected
+
+    mixed = pd.Series(['2023-01-12 18:00:00', '2023-01-12 22:00:00+00:00', '2023-07-12 15:00:00-04:00'])
+    assert list(trading_calendar.to_market_time(mixed)) == list(pd.to_datetime(
+        ['2023-01-12 18:00:00', '2023-01-12 17:00:00', '2023-07-12 15:00:00']))
+
+    formats = pd.Series(['2020-07-02', '2020-07-02 12:00:00', '2020-07-02 12:00:00-04:00',
+                         '2020-07-02 12:00-04:00', '2020-07-02T16:00:00Z'])
+    expected = [pd.Timestamp('2020-07-02')] + [pd.Timestamp('2020-07-02 12:00')] * 4
+    assert list(trading_calendar.to_market_time(formats)) == expected
+
+
+def test_align_news_to_ticker_price_dates():
+    news = pd.DataFrame({
+        'headline': ['a', 'b', 'c', 'd'],
+        'stock': ['aaa', 'BBB', 'AAA', 'ZZZ'],
+        'date': pd.to_datetime(['2023-03-03 17:00:00-05:00', '2023-03-03 09:00:00-05:00',
+                                '2023-03-01 12:00:00-05:00', '2023-03-01 12:00:00-05:00'], utc=True),
+    })
+    dates = pd.to_datetime(['2023-03-01', '2023-03-03', '2023-03-07'])  # AAA did not trade on Mar 6
+    prices = {'AAA': pd.DataFrame({'Close': [1.0, 2.0, 3.0]}, index=dates),
+              'BBB': pd.DataFrame({'Close': [1.0]}, index=pd.to_datetime(['2023-03-06']))}
+
+    aligned = trading_calendar.align_news_to_sessions(news, prices)
+    assert list(aligned['headline']) == ['a', 'b', 'c', 'd']
+    assert list(aligned['session_date']) == [pd.Timestamp('2023-03-07'), pd.Timestamp('2023-03-06'),
+                                             pd.Timestamp('2023-03-01'), pd.NaT]
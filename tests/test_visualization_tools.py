@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+
+from src import visualization_tools
+from src.financial_analysis import calculate_technical_indicators
+
+
+def test_lttb_keeps_endpoints_and_extremes():
+    x = np.arange(5000, dtype=float)
+    y = np.sin(x / 200.0)
+    y[2500] = 10.0  # A spike any faithful downsample must keep
+    keep = visualization_tools.lttb_indices(x, y, 300)
+    assert len(keep) == 300
+    assert keep[0] == 0 and keep[-1] == 4999
+    assert np.all(np.diff(keep) > 0)
+    assert 2500 in keep
+    assert len(visualization_tools.lttb_indices(x[:100], y[:100], 300)) == 100
+
+
+def test_batch_rendering_writes_files(tmp_path):
+    dates = pd.bdate_range('2015-01-01', periods=3000, name='Date')
+    rng = np.random.default_rng(5)
+    stock_dict = {}
+    for ticker in ['AAA', 'BBB']:
+        close = 50 * np.exp(np.cumsum(rng.normal(0, 0.01, len(dates))))
+        stock_dict[ticker] = calculate_technical_indicators(pd.DataFrame({'Close': close}, index=dates))
+    stock_dict['RAW'] = pd.DataFrame({'Close': np.arange(10.0)}, index=dates[:10])
+
+    paths = visualization_tools.render_stock_charts(stock_dict, tmp_path / 'charts', fmt='svg', n_workers=2)
+    assert sorted(paths) == ['AAA', 'BBB', 'RAW']
+    assert all((tmp_path / 'charts' / f'{t}_indicators.svg').stat().st_size > 0 for t in paths)
+
+    merged = pd.DataFrame({'stock_symbol': np.repeat(['AAA', 'BBB'], [50, 30_000]),
+                           'avg_sentiment_score': rng.normal(size=30_050),
+                           'daily_return': rng.normal(size=30_050)})
+    scatters = visualization_tools.render_correlation_scatters(merged, tmp_path / 'scatter', 'avg_sentiment_score',
+                                                               'daily_return')
+    assert all((tmp_path / 'scatter' / f'{t}_correlation.png').stat().st_size > 0 for t in ['AAA', 'BBB'])
+    assert len(scatters) == 2